@@ -5,8 +5,11 @@ This exposes the core functionality via REST endpoints for a React frontend.
 
 import os
 import sys
+import asyncio
 import logging
 import random
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 
@@ -21,12 +24,12 @@ for path in [ROOT_DIR, BASE_DIR, SRC_DIR]:
 
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 # Database and models
-from backend.database import SessionLocal, Base, engine
+from backend.database import SessionLocal, Base, engine, get_db_context
 import backend.models  # noqa: F401 - Ensure all models are registered
 
 # Shared dependencies and utilities
@@ -40,6 +43,7 @@ from backend.utils.security import (
     OTP_MAX_ATTEMPTS,
 )
 from backend.utils.auth import create_parent_token, verify_parent_token
+from backend.utils.sse import SSE_HEADERS, sse_event
 
 # Models
 from backend.models.students import Student
@@ -53,6 +57,7 @@ from backend.schemas import (
     OtpRequest,
     OtpVerifyRequest,
     QuizRequest,
+    QuizExplanationRequest,
     QuizScoreRequest,
     PerkBuyRequest,
     RoadmapRequest,
@@ -68,9 +73,28 @@ from backend.routes.meta_router import router as meta_router
 from backend.routes.students_router import router as students_router
 from backend.routes.subchapters_router import router as subchapters_router
 from backend.routes.chat_router import router as chat_router
+from backend.routes.quiz_bank_router import router as quiz_bank_router
+from backend.routes.quiz_jobs_router import router as quiz_jobs_router
 
 # Services
-from backend.services.flashcard_service import save_flashcards_from_quiz
+from backend.services.flashcard_writer import flashcard_writer
+from backend.services.quiz_bank_service import quiz_bank
+from backend.services.adaptive_quiz_service import resolve_levels
+from backend.services.explanation_service import explain_questions, explain_quiz
+from backend.services.quiz_job_service import quiz_jobs
+from backend.services.quiz_prefetch_service import quiz_prefetcher
+
+# Metrics
+from src.utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    RequestTimings,
+    current_request_timings,
+    db_queries_total,
+    db_request_seconds,
+    http_request_seconds,
+    instrument_engine,
+    registry as metrics_registry,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -142,6 +166,13 @@ def run_migrations():
                 if "subchapter_id" not in flash_cols:
                     print("Migrating: Adding subchapter_id to flashcard table...")
                     cursor.execute("ALTER TABLE flashcard ADD COLUMN subchapter_id TEXT")
+                if "fingerprint" not in flash_cols:
+                    print("Migrating: Adding fingerprint to flashcard table...")
+                    cursor.execute("ALTER TABLE flashcard ADD COLUMN fingerprint TEXT")
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_flashcard_chapter_student_fingerprint "
+                    "ON flashcard (chapter_id, student_id, fingerprint)"
+                )
 
                 # Quiz table migrations
                 cursor.execute("PRAGMA table_info(quiz)")
@@ -149,6 +180,34 @@ def run_migrations():
                 if "created_at" not in quiz_cols:
                     print("Migrating: Adding created_at to quiz table...")
                     cursor.execute("ALTER TABLE quiz ADD COLUMN created_at DATETIME")
+                for col_name in ("subchapter_id", "grade_band", "source"):
+                    if col_name not in quiz_cols:
+                        print(f"Migrating: Adding {col_name} to quiz table...")
+                        cursor.execute(f"ALTER TABLE quiz ADD COLUMN {col_name} TEXT")
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_quiz_bank_lookup "
+                    "ON quiz (chapter_id, grade_band, difficulty, source)"
+                )
+
+                # Question table migrations
+                cursor.execute("PRAGMA table_info(question)")
+                question_cols = [info[1] for info in cursor.fetchall()]
+                if "extra" not in question_cols:
+                    print("Migrating: Adding extra to question table...")
+                    cursor.execute("ALTER TABLE question ADD COLUMN extra TEXT")
+                if "fingerprint" not in question_cols:
+                    print("Migrating: Adding fingerprint to question table...")
+                    cursor.execute("ALTER TABLE question ADD COLUMN fingerprint TEXT")
+
+                # Quiz job table migrations (the table may not exist yet; create_all adds it below)
+                cursor.execute("PRAGMA table_info(quiz_jobs)")
+                job_cols = [info[1] for info in cursor.fetchall()]
+                if job_cols and "worker" not in job_cols:
+                    print("Migrating: Adding worker to quiz_jobs table...")
+                    cursor.execute("ALTER TABLE quiz_jobs ADD COLUMN worker TEXT")
+                if job_cols and "heartbeat_at" not in job_cols:
+                    print("Migrating: Adding heartbeat_at to quiz_jobs table...")
+                    cursor.execute("ALTER TABLE quiz_jobs ADD COLUMN heartbeat_at DATETIME")
 
                 # Scorecard table migrations
                 cursor.execute("PRAGMA table_info(scorecard)")
@@ -195,12 +254,26 @@ def run_migrations():
 # Run migrations on startup
 run_migrations()
 
+# Time every SQL statement so DB time can be attributed to routes
+instrument_engine(engine)
+
 
 # === FastAPI App ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resume quiz jobs queued (or interrupted) before a restart
+    quiz_jobs.start()
+    yield
+    quiz_jobs.stop()
+    # Write flashcards still queued before exiting
+    flashcard_writer.stop()
+
+
 app = FastAPI(
     title="Euri AI Tutor API",
     version="2.0",
-    description="AI-powered educational platform for students"
+    description="AI-powered educational platform for students",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -217,6 +290,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record request latency and the database time spent inside it, per route."""
+    timings = RequestTimings()
+    token = current_request_timings.set(timings)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        current_request_timings.reset(token)
+        # Label by route template (e.g. /chapters/{id}) to keep cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_request_seconds.observe(
+            time.perf_counter() - start, method=request.method, route=route, status=str(status)
+        )
+        db_request_seconds.observe(timings.db_seconds, route=route)
+        if timings.db_queries:
+            db_queries_total.inc(timings.db_queries, route=route)
+
+
 # Include routers
 app.include_router(flashcards_router)
 app.include_router(chapters_router)
@@ -225,6 +322,8 @@ app.include_router(meta_router)
 app.include_router(students_router)
 app.include_router(subchapters_router)
 app.include_router(chat_router)
+app.include_router(quiz_bank_router)
+app.include_router(quiz_jobs_router)
 
 
 # === AI Tutor Initialization ===
@@ -298,6 +397,12 @@ def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics: LLM, retrieval, HTTP and database latency."""
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # === Parent Authentication ===
 from pydantic import BaseModel
 
@@ -482,53 +587,77 @@ def api_complete_video_watching(
 
 
 # === Quiz Endpoints ===
+def _resolve_quiz_student(db: Session, request: QuizRequest, student_id: Optional[str]) -> Optional[str]:
+    """Validate the student (if any) and apply their grade band to the request."""
+    effective_student_id = student_id or request.student_id
+    if effective_student_id:
+        student = db.query(Student).filter(Student.id == effective_student_id).first()
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+
+        # Use student's grade if different from request
+        if student.grade_band and student.grade_band != request.grade_band:
+            logger.info(f"Using student's grade {student.grade_band} instead of {request.grade_band}")
+            request.grade_band = student.grade_band
+
+    return effective_student_id
+
+    """(student id, levels) for a streaming request, resolved in a session of its own."""
+def _resolve_quiz_request(request: QuizRequest, student_id: Optional[str]) -> tuple:
+    """_resolve_quiz_student and resolve_levels in a session of their own (for worker threads)."""
+    with get_db_context() as db:
+        effective_student_id = _resolve_quiz_student(db, request, student_id)
+        return effective_student_id, resolve_levels(db, request, effective_student_id)
+
+
+def _save_quiz_flashcards(request: QuizRequest, student_id: Optional[str], quizzes: dict):
+    """Queue a quiz set ({difficulty: [quiz]}) for the background flashcard writer."""
+    flashcard_writer.submit(
+        quizzes,
+        subject_name=request.subject,
+        chapter_title=request.subchapter_title or request.chapter_title,
+        chapter_summary=request.subchapter_summary or request.chapter_summary,
+        student_id=student_id,
+        chapter_id=request.chapter_id,
+        subchapter_id=request.subchapter_id,
+    )
+
+
 @app.post("/generate_quiz")
 def generate_quiz(
     request: QuizRequest,
     student_id: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Generate quizzes for all difficulty levels and save flashcards."""
-    try:
-        tutor = get_tutor_interface()
-
-        # Validate student if provided
-        effective_student_id = student_id or request.student_id
-        if effective_student_id:
-            student = db.query(Student).filter(Student.id == effective_student_id).first()
-            if not student:
-                raise HTTPException(status_code=404, detail="Student not found")
+    """
+    Generate quizzes and save flashcards.
 
-            # Use student's grade if different from request
-            if student.grade_band and student.grade_band != request.grade_band:
-                logger.info(f"Using student's grade {student.grade_band} instead of {request.grade_band}")
-                request.grade_band = student.grade_band
+    All difficulty levels by default. In adaptive mode only the level picked
+    from the student's Scorecard history is returned; other levels can be
+    fetched later by passing them in `levels`.
+    """
+    try:
+        effective_student_id = _resolve_quiz_student(db, request, student_id)
+        levels = resolve_levels(db, request, effective_student_id)
 
-        # Generate quiz
-        result = tutor.generate_all_quizzes(
+        # Serve from the quiz bank; levels it lacks are generated live
+        result = quiz_bank.get_quizzes(
+            db,
             subject=request.subject,
             grade_band=request.grade_band,
-            chapter_id=request.subchapter_id or request.chapter_id,
-            chapter_title=request.subchapter_title or request.chapter_title,
-            chapter_summary=request.subchapter_summary or request.chapter_summary,
+            chapter_id=request.chapter_id,
+            chapter_title=request.chapter_title,
+            chapter_summary=request.chapter_summary,
+            subchapter_id=request.subchapter_id,
+            subchapter_title=request.subchapter_title,
+            subchapter_summary=request.subchapter_summary,
+            student_id=effective_student_id,
+            levels=levels,
+            single_call=request.single_call,
         )
 
-        # Save flashcards for each difficulty level
-        for difficulty_level, quizzes in result.items():
-            for quiz in quizzes:
-                try:
-                    save_flashcards_from_quiz(
-                        quiz_data=quiz,
-                        subject_name=request.subject,
-                        chapter_title=request.subchapter_title or request.chapter_title,
-                        chapter_summary=request.subchapter_summary or request.chapter_summary,
-                        db=db,
-                        student_id=effective_student_id,
-                        chapter_id=request.chapter_id,
-                        subchapter_id=request.subchapter_id,
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to save flashcards: {e}")
+        # Flashcards are written in the background; the quiz goes out now
+        _save_quiz_flashcards(request, effective_student_id, result)
 
         return result
 
@@ -539,6 +668,69 @@ def generate_quiz(
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {e}")
 
 
+@app.post("/generate_quiz/stream")
+async def generate_quiz_stream(request: QuizRequest, student_id: Optional[str] = None):
+    """
+    Streaming variant of /generate_quiz (Server-Sent Events).
+
+    Emits a `question` event for every question as soon as it is parsed from
+    the model output (or immediately for quiz bank hits), a `quiz` event with
+    the full quiz once a difficulty level is complete (its flashcards are saved
+    then), and a final `done` event.
+    """
+    effective_student_id, levels = await asyncio.to_thread(_resolve_quiz_request, request, student_id)
+
+    async def event_stream():
+        try:
+            async for event in quiz_bank.astream_quizzes(
+                subject=request.subject,
+                grade_band=request.grade_band,
+                chapter_id=request.chapter_id,
+                chapter_title=request.chapter_title,
+                chapter_summary=request.chapter_summary,
+                subchapter_id=request.subchapter_id,
+                subchapter_title=request.subchapter_title,
+                subchapter_summary=request.subchapter_summary,
+                student_id=effective_student_id,
+                levels=levels,
+            ):
+                if event["type"] == "quiz":
+                    _save_quiz_flashcards(request, effective_student_id, {event["difficulty"]: [event["quiz"]]})
+                yield sse_event(event["type"], event)
+            yield sse_event("done", {"type": "done"})
+        except Exception as e:
+            logger.error(f"Streaming quiz error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@app.post("/quiz_explanations")
+def api_quiz_explanations(req: QuizExplanationRequest, db: Session = Depends(get_db)):
+    """
+    Explanations for a served quiz, generated on first request and cached in
+    its Question/Flashcard rows. Pass question_indexes for one question as it
+    is answered, or omit them to explain the whole quiz after submission.
+    Quizzes not stored (yet) are explained from `questions`, if sent.
+    """
+    try:
+        result = explain_quiz(db, req.quiz_id, req.question_indexes, req.grade_band)
+        if result is None and req.questions:
+            result = explain_questions(req.quiz_id, req.questions, req.question_indexes,
+                                       req.subject, req.grade_band, req.chapter_title)
+    except Exception as e:
+        logger.error(f"Explanation generation error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error generating explanations: {e}")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return result
+
+
 @app.post("/calculate_quiz_score")
 def api_calculate_quiz_score(
     req: QuizScoreRequest,
@@ -573,6 +765,9 @@ def api_calculate_quiz_score(
                 game_state.update_streak()
 
             db.commit()
+
+            # The next chapter is usually opened right after this one
+            quiz_prefetcher.after_score(req.student_id, req.chapter_id)
     except Exception as e:
         logger.error(f"Error saving score: {e}")
         db.rollback()
@@ -734,14 +929,14 @@ def api_generate_roadmap(req: RoadmapRequest):
 
 
 @app.post("/chat_with_tutor")
-def api_chat_with_tutor(req: ChatRequest):
+async def api_chat_with_tutor(req: ChatRequest):
     """Chat with the AI tutor."""
     if not tutor_ready:
         return {"response": "The AI Tutor is currently offline. Please try again later."}
 
     try:
         tutor = get_tutor_interface()
-        bot_response = tutor.chat_with_tutor(req.message, req.subject, req.grade)
+        bot_response = await tutor.achat_with_tutor(req.message, req.subject, req.grade)
         return {"response": bot_response}
     except Exception as e:
         logger.error(f"Chat error: {e}")
@@ -32,12 +32,21 @@ if not DATABASE_URL:
 def _get_engine_kwargs() -> dict:
     """
     Returns appropriate engine configuration based on database type.
-    SQLite uses StaticPool (single connection), PostgreSQL/MySQL use QueuePool.
+    In-memory SQLite uses StaticPool (single connection); file-based SQLite
+    gives each session its own connection so background workers (e.g. the
+    quiz bank refill) don't share a transaction with requests.
+    PostgreSQL/MySQL use QueuePool.
     """
     if "sqlite" in DATABASE_URL:
+        if ":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:":
+            return {
+                "connect_args": {"check_same_thread": False},
+                "poolclass": StaticPool,
+                "echo": os.getenv("SQL_ECHO", "false").lower() == "true",
+            }
         return {
-            "connect_args": {"check_same_thread": False},
-            "poolclass": StaticPool,
+            # Wait on SQLite's write lock instead of failing immediately
+            "connect_args": {"check_same_thread": False, "timeout": 30},
             "echo": os.getenv("SQL_ECHO", "false").lower() == "true",
         }
     else:
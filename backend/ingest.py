@@ -8,12 +8,17 @@ Usage:
     python ingest.py --source grade --grade 8  # Ingest only grade 8 from GRADE
     python ingest.py --source all            # Ingest chapters + GRADE PDFs
     python ingest.py --hf                    # Use HuggingFace embeddings
+    python ingest.py --backend stub          # Offline deterministic embeddings (benchmarks)
 """
 import os
 import sys
 import argparse
+import json
 import re
-from typing import List
+import shutil
+import uuid
+from datetime import datetime
+from typing import Dict, List
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
@@ -23,11 +28,16 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 load_dotenv()
 
+from src.tutor.lexical_index import BM25_FILE, BM25Index  # noqa: E402
+from src.tutor.retrieval_cache import VERSION_FILE  # noqa: E402
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CHAPTERS_DIR = os.path.join(BASE_DIR, "data", "chapters")
 GRADE_DIR = os.path.join(BASE_DIR, "data", "GRADE")
 VECTOR_STORE_PATH = os.path.join(BASE_DIR, "data", "vector_store", "faiss_index")
+# One index per (grade, subject) plus manifest.json, searched by PartitionedRetriever
+PARTITIONS_PATH = os.path.join(BASE_DIR, "data", "vector_store", "partitions")
 
 
 def get_embeddings(use_huggingface: bool = False):
@@ -42,6 +52,50 @@ def get_embeddings(use_huggingface: bool = False):
         return EuriaiEmbeddings(model="gemini-embedding-001")
 
 
+def partition_name(grade: str | None, subject: str | None) -> str:
+    """Directory name of a (grade, subject) partition, e.g. grade-8_mathematics."""
+    subject_slug = re.sub(r"[^a-z0-9]+", "-", (subject or "").lower()).strip("-")
+    return f"grade-{grade or 'any'}_{subject_slug or 'any'}"
+
+
+def save_partitions(text_embeddings: List[tuple], metadatas: List[Dict], embeddings, ids: List[str],
+                    version: str, path: str = PARTITIONS_PATH):
+    """
+    Write one FAISS index per (grade, subject) from already computed embeddings,
+    plus a manifest; the previous partitions are replaced as a whole.
+    Chunks keep the docstore ids they have in the global index.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for i, metadata in enumerate(metadatas):
+        match = re.search(r"\d+", str(metadata.get("grade") or ""))
+        grade = str(int(match.group(0))) if match else None
+        groups.setdefault((grade, metadata.get("subject") or None), []).append(i)
+
+    staging = path + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    partitions = []
+    for (grade, subject), indexes in sorted(groups.items(), key=lambda item: partition_name(*item[0])):
+        name = partition_name(grade, subject)
+        store = FAISS.from_embeddings(
+            [text_embeddings[i] for i in indexes],
+            embeddings,
+            metadatas=[metadatas[i] for i in indexes],
+            ids=[ids[i] for i in indexes],
+        )
+        store.save_local(os.path.join(staging, name))
+        partitions.append({"name": name, "grade": grade, "subject": subject, "chunks": len(indexes)})
+
+    manifest = {"version": version, "partitions": partitions}
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+    return partitions
+
+
 def ingest_documents(use_huggingface: bool = False, *, source: str = "auto", grade: int | None = None, limit: int | None = None):
     """
     Ingests PDF documents and creates a FAISS vector store.
@@ -201,9 +255,29 @@ def ingest_documents(use_huggingface: bool = False, *, source: str = "auto", gra
 
     try:
         embeddings = get_embeddings(use_huggingface)
-        vector_store = FAISS.from_documents(all_splits, embeddings)
+        # Embed once; the global index and the partitions share the vectors
+        texts = [doc.page_content for doc in all_splits]
+        metadatas = [doc.metadata for doc in all_splits]
+        text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+        # One id per chunk across the global index, partitions and BM25 (retrieval cache entries use it)
+        ids = [str(uuid.uuid4()) for _ in texts]
+        version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+        vector_store = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
         vector_store.save_local(VECTOR_STORE_PATH)
         print(f"✅ Vector store saved to: {VECTOR_STORE_PATH}")
+
+        # Lexical index over the same chunks, referencing them by docstore id
+        bm25 = BM25Index.build(texts, ids)
+        bm25.save(os.path.join(VECTOR_STORE_PATH, BM25_FILE))
+        print(f"✅ BM25 index saved to: {os.path.join(VECTOR_STORE_PATH, BM25_FILE)}")
+
+        partitions = save_partitions(text_embeddings, metadatas, embeddings, ids, version)
+        print(f"✅ {len(partitions)} grade/subject partitions saved to: {PARTITIONS_PATH}")
+
+        # Written last: a new version invalidates cached retrieval results on reload
+        with open(os.path.join(VECTOR_STORE_PATH, VERSION_FILE), "w", encoding="utf-8") as f:
+            f.write(version)
         print("🎉 Done! Restart the backend to load the new knowledge base.")
 
     except Exception as e:
@@ -223,6 +297,16 @@ if __name__ == "__main__":
     )
     parser.add_argument("--grade", type=int, default=None, help="Restrict GRADE ingestion to a single grade (1-10)")
     parser.add_argument("--limit", type=int, default=None, help="Limit number of PDFs to ingest (debug)")
+    parser.add_argument(
+        "--backend",
+        choices=["http", "stub", "record", "replay"],
+        default=None,
+        help="EuriAI backend for embeddings (default: EURIAI_BACKEND or http)",
+    )
     args = parser.parse_args()
 
+    if args.backend:
+        # Read when the embeddings module is first imported
+        os.environ["EURIAI_BACKEND"] = args.backend
+
     ingest_documents(use_huggingface=args.hf, source=args.source, grade=args.grade, limit=args.limit)
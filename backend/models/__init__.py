@@ -27,6 +27,8 @@ from backend.models.subchapter import Subchapter
 # Learning and assessment
 from backend.models.quiz import Quiz
 from backend.models.question import Question
+from backend.models.quiz_serve import QuizServe
+from backend.models.quiz_job import QuizJob
 from backend.models.flashcard import Flashcard
 from backend.models.scorecard import Scorecard
 from backend.models.student_progress import StudentProgress
@@ -51,6 +53,8 @@ __all__ = [
     'Subchapter',
     'Quiz',
     'Question',
+    'QuizServe',
+    'QuizJob',
     'Flashcard',
     'Scorecard',
     'StudentProgress',
@@ -45,6 +45,7 @@ class Flashcard(Base):
     correct_option = Column(String(255))
     explanation = Column(Text)
     difficulty = Column(String(50))
+    fingerprint = Column(String(16))  # SimHash of question + answer, for near-duplicate checks
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
@@ -57,4 +58,6 @@ class Flashcard(Base):
     __table_args__ = (
         Index('ix_flashcard_student_subject_chapter', 'student_id', 'subject_id', 'chapter_id'),
         Index('ix_flashcard_student_created', 'student_id', 'created_at'),
+        # Per-chapter fingerprint lookup when saving new flashcards
+        Index('ix_flashcard_chapter_student_fingerprint', 'chapter_id', 'student_id', 'fingerprint'),
     )
@@ -29,6 +29,8 @@ class Question(Base):
     explanation = Column(Text)
     type = Column(String(50))  # "mcq" | "true_false" | "fill_in_the_blank" | etc.
     difficulty = Column(String(50))
+    extra = Column(Text)  # JSON string: remaining quiz fields (interactive_element, phonetic_hint, ...)
+    fingerprint = Column(String(16))  # SimHash of question + answer (utils.fingerprint)
 
     # Relationship
     quiz = relationship("Quiz", back_populates="questions")
@@ -29,8 +29,16 @@ class Quiz(Base):
         index=True
     )
 
+    subchapter_id = Column(
+        String(36),
+        ForeignKey("subchapters.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
     # Quiz metadata
     difficulty = Column(String(50), nullable=False, default="basic")
+    grade_band = Column(String(20))
+    source = Column(String(20))  # "bank" for shared pre-generated quizzes (see quiz_bank_service)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
@@ -41,4 +49,5 @@ class Quiz(Base):
     # Composite indexes
     __table_args__ = (
         Index('ix_quiz_subject_chapter_difficulty', 'subject_id', 'chapter_id', 'difficulty'),
+        Index('ix_quiz_bank_lookup', 'chapter_id', 'grade_band', 'difficulty', 'source'),
     )
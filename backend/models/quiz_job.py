@@ -0,0 +1,46 @@
+"""
+QuizJob model - durable queue of asynchronous quiz generation jobs.
+Rows survive restarts; running jobs whose worker stops heartbeating are re-queued.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from backend.database import Base
+
+
+class QuizJob(Base):
+    __tablename__ = "quiz_jobs"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    student_id = Column(
+        String(36),
+        ForeignKey("students.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True
+    )
+
+    # Job state
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | completed | failed
+    request = Column(Text, nullable=False)  # JSON QuizRequest
+    result = Column(Text)  # JSON {level: [quiz]}
+    error = Column(Text)
+    questions_ready = Column(Integer, nullable=False, default=0)
+    questions_total = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # Lease: the process running the job and its last heartbeat
+    worker = Column(String(64))
+    heartbeat_at = Column(DateTime)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    # Workers claim the oldest queued job
+    __table_args__ = (
+        Index('ix_quiz_jobs_status_created', 'status', 'created_at'),
+    )
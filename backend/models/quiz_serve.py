@@ -0,0 +1,35 @@
+"""
+QuizServe model recording which bank quizzes a student has been given.
+Lets the quiz bank avoid repeating a quiz for the same student.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, String, UniqueConstraint
+
+from backend.database import Base
+
+
+class QuizServe(Base):
+    __tablename__ = "quiz_serve"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    student_id = Column(
+        String(36),
+        ForeignKey("students.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    quiz_id = Column(
+        String(36),
+        ForeignKey("quiz.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    served_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('student_id', 'quiz_id', name='uq_quiz_serve_student_quiz'),
+    )
@@ -4,10 +4,13 @@ Provides stateful, memory-enabled chat endpoints.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 import logging
 
+from backend.utils.sse import SSE_HEADERS, sse_event
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
@@ -107,6 +110,38 @@ async def chat(request: ChatRequest, tutor=Depends(get_enhanced_tutor)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, tutor=Depends(get_enhanced_tutor)):
+    """
+    Streaming variant of the chat endpoint (Server-Sent Events).
+
+    Emits a `meta` event once intent and context are known, a `token` event
+    for every chunk as it arrives from the model, and a final `done` event
+    carrying the full response. If the model stream breaks midway an `error`
+    event replaces `done`: the tokens sent so far are incomplete and are not
+    saved to memory.
+    """
+    async def event_stream():
+        try:
+            async for event in tutor.astream_chat(
+                message=request.message,
+                student_id=request.student_id,
+                subject=request.subject,
+                grade=request.grade,
+            ):
+                yield sse_event(event["type"], event)
+        except Exception as e:
+            logger.error(f"Streaming chat error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.post("/simple")
 async def chat_simple(
     message: str,
@@ -20,14 +20,10 @@ from backend.models.students import Student
 
 from backend.services.flashcard_service import save_flashcards_from_quiz, get_flashcards
 from backend.services.progress_service import update_progress, get_due_flashcards
+from backend.services.quiz_bank_service import quiz_bank
 
 from backend.schemas import QuizRequest, ProgressRequest, FlashcardFetchRequest
 
-# Lazy import to avoid circular import issues
-def get_ai_tutor():
-    from backend.src.tutor.interface import tutor_interface
-    return tutor_interface
-
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/flashcards", tags=["Flashcards"])
 
@@ -48,9 +44,6 @@ def api_save_flashcards_from_quiz(
     If student_id is not provided, it will be auto-detected from the database.
     """
     try:
-        # Get AI Tutor instance
-        AI_TUTOR = get_ai_tutor()
-
         # Use provided student_id or from request, or auto-detect
         effective_student_id = student_id or req.student_id
 
@@ -65,13 +58,20 @@ def api_save_flashcards_from_quiz(
                     detail="No student_id provided and no students in database"
                 )
 
-        # Generate quiz using AI Tutor
-        result = AI_TUTOR.generate_all_quizzes(
+        # Draw the basic quiz from the quiz bank (generated live on a miss)
+        result = quiz_bank.get_quizzes(
+            db,
             subject=req.subject,
             grade_band=req.grade_band,
-            chapter_id=req.subchapter_id or req.chapter_id,
-            chapter_title=req.subchapter_title or req.chapter_title,
-            chapter_summary=req.subchapter_summary or req.chapter_summary,
+            chapter_id=req.chapter_id,
+            chapter_title=req.chapter_title,
+            chapter_summary=req.chapter_summary,
+            subchapter_id=req.subchapter_id,
+            subchapter_title=req.subchapter_title,
+            subchapter_summary=req.subchapter_summary,
+            student_id=effective_student_id,
+            levels=["basic"],
+            single_call=req.single_call,
         )
 
         # Save "basic" flashcards
@@ -89,7 +89,7 @@ def api_save_flashcards_from_quiz(
 
         return {
             "message": response["message"],
-            "saved_flashcards": len(basic_quiz.get("questions", [])),
+            "saved_flashcards": response["saved_flashcards"],
             "student_id": effective_student_id,
         }
 
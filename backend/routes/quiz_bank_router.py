@@ -0,0 +1,36 @@
+"""
+Quiz Bank Router
+Inspect and warm the pre-generated quiz bank.
+Uses shared dependencies for database access.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from backend.schemas import QuizRequest
+from backend.services.quiz_bank_service import quiz_bank, resolve_scope
+from backend.services.quiz_prefetch_service import quiz_prefetcher
+
+# Use shared dependencies
+from backend.utils.dependencies import get_db
+
+router = APIRouter(prefix="/quiz_bank", tags=["Quiz Bank"])
+
+
+@router.get("/stats")
+def get_quiz_bank_stats():
+    """Bank configuration, refills currently in flight and next-chapter prefetches."""
+    return {**quiz_bank.stats(), "prefetch": quiz_prefetcher.stats()}
+
+
+@router.post("/prefill")
+def prefill_quiz_bank(req: QuizRequest, db: Session = Depends(get_db)):
+    """Queue background generation so a chapter is served from the bank (e.g. before a class)."""
+    scope = resolve_scope(
+        db, req.subject, req.grade_band, req.chapter_id, req.chapter_title, req.chapter_summary,
+        req.subchapter_id, req.subchapter_title, req.subchapter_summary
+    )
+    if scope is None:
+        raise HTTPException(status_code=404, detail="Subject or chapter not found")
+
+    return {"queued_levels": quiz_bank.refill(db, scope)}
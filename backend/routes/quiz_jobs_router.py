@@ -0,0 +1,117 @@
+"""
+Quiz Jobs Router
+Asynchronous quiz generation: enqueue a job, then poll it or subscribe to its events.
+Uses shared dependencies for database access.
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from backend.database import get_db_context
+from backend.models.students import Student
+from backend.schemas import QuizRequest
+from backend.services.quiz_job_service import (
+    FINISHED_STATUSES,
+    enqueue_job,
+    get_job,
+    job_to_dict,
+    quiz_jobs,
+)
+
+# Use shared dependencies
+from backend.utils.dependencies import get_db
+from backend.utils.sse import SSE_HEADERS, sse_event
+
+router = APIRouter(prefix="/quiz_jobs", tags=["Quiz Jobs"])
+
+# How often the event stream re-reads job progress
+EVENT_POLL_SECONDS = 0.5
+
+
+@router.post("", status_code=202)
+def create_quiz_job(request: QuizRequest, student_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Queue quiz generation and return the job id immediately.
+
+    Levels follow /generate_quiz (explicit `levels`, the adaptive pick, or all);
+    `single_call` and question counts other than five are rejected.
+    """
+    effective_student_id = student_id or request.student_id
+    if effective_student_id:
+        student = db.query(Student).filter(Student.id == effective_student_id).first()
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        if student.grade_band:
+            request.grade_band = student.grade_band
+
+    try:
+        job = enqueue_job(db, request, effective_student_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": f"/quiz_jobs/{job.id}",
+        "events_url": f"/quiz_jobs/{job.id}/events",
+    }
+
+
+@router.get("/stats")
+def get_quiz_job_stats():
+    """Worker count and jobs per status."""
+    return quiz_jobs.stats()
+
+
+@router.get("/{job_id}")
+def get_quiz_job(job_id: str, db: Session = Depends(get_db)):
+    """Job status and progress; `result` holds the quizzes once completed."""
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Quiz job not found")
+    return job_to_dict(job)
+
+
+def _job_snapshot(job_id: str, include_result: bool = False) -> Optional[dict]:
+    with get_db_context() as db:
+        job = get_job(db, job_id)
+        return job_to_dict(job, include_result) if job else None
+
+
+@router.get("/{job_id}/events")
+async def stream_quiz_job(job_id: str):
+    """
+    Server-Sent Events for one job.
+
+    Emits `progress` whenever the status or question count changes, then a
+    final `completed` event with the quizzes (or `failed` with the error).
+    """
+    snapshot = await asyncio.to_thread(_job_snapshot, job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Quiz job not found")
+
+    async def event_stream():
+        last = None
+        current = snapshot
+        while current is not None:
+            if current["status"] in FINISHED_STATUSES:
+                final = await asyncio.to_thread(_job_snapshot, job_id, True)
+                yield sse_event(final["status"], final)
+                return
+
+            state = (current["status"], current["questions_ready"])
+            if state != last:
+                last = state
+                yield sse_event("progress", current)
+
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+            current = await asyncio.to_thread(_job_snapshot, job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -114,6 +114,20 @@ class QuizRequest(BaseModel):
     num_questions: int = Field(default=5, ge=1, le=20)
     difficulty: str = "basic"
     student_id: Optional[str] = None  # Added for proper student tracking
+    single_call: Optional[bool] = None  # All difficulty levels in one LLM request (default: QUIZ_SINGLE_CALL)
+    adaptive: Optional[bool] = None  # Only the level picked from the student's scores (default: QUIZ_ADAPTIVE)
+    levels: Optional[List[Literal["basic", "medium", "hard"]]] = None  # Explicit levels, e.g. one skipped by adaptive mode
+
+
+class QuizExplanationRequest(BaseModel):
+    quiz_id: str
+    question_indexes: Optional[List[int]] = None  # 0-based positions; all questions if omitted
+    grade_band: Optional[str] = None  # Used when the stored quiz has none
+    # The served quiz, for quizzes not stored yet (live quizzes the bank did not keep);
+    # explained from these questions, without caching, when quiz_id is not found
+    questions: Optional[List[dict]] = None
+    subject: Optional[str] = None
+    chapter_title: Optional[str] = None
 
 
 class QuizScoreRequest(BaseModel):
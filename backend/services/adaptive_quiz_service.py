@@ -0,0 +1,100 @@
+"""
+Adaptive Quiz Service
+Picks the quiz difficulty a student should get next from their Scorecard history,
+so /generate_quiz can generate one level instead of all three.
+"""
+
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.models.scorecard import Scorecard
+from backend.schemas import QuizRequest
+from backend.services.quiz_bank_service import QUIZ_LEVELS, resolve_scope
+from src.utils.metrics import quiz_adaptive_picks_total
+
+logger = logging.getLogger(__name__)
+
+QUIZ_ADAPTIVE = os.getenv("QUIZ_ADAPTIVE", "false").strip().lower() in {"1", "true", "yes", "y"}
+# Recent attempts considered (per chapter, falling back to the whole subject)
+QUIZ_ADAPTIVE_WINDOW = int(os.getenv("QUIZ_ADAPTIVE_WINDOW", "5"))
+# Average percentage at the current level needed to move up / below which to move down
+QUIZ_ADAPTIVE_PROMOTE_PCT = float(os.getenv("QUIZ_ADAPTIVE_PROMOTE_PCT", "80"))
+QUIZ_ADAPTIVE_DEMOTE_PCT = float(os.getenv("QUIZ_ADAPTIVE_DEMOTE_PCT", "50"))
+
+
+def adaptive_enabled(requested: Optional[bool]) -> bool:
+    return QUIZ_ADAPTIVE if requested is None else requested
+
+
+def _recent_scores(db: Session, student_id: str, subject_id: str, chapter_id: Optional[str]) -> List[Scorecard]:
+    # Served by ix_scorecard_student_subject_chapter (or its student/subject prefix)
+    query = db.query(Scorecard).filter(
+        Scorecard.student_id == student_id,
+        Scorecard.subject_id == subject_id,
+    )
+    if chapter_id:
+        query = query.filter(Scorecard.chapter_id == chapter_id)
+    return query.order_by(Scorecard.timestamp.desc()).limit(QUIZ_ADAPTIVE_WINDOW).all()
+
+
+def next_level(scores: List[Scorecard]) -> str:
+    """
+    Level after the most recent attempts (newest first).
+
+    Starts from the level of the latest attempt and moves one step up or down
+    based on the average percentage of the recent attempts at that level.
+    """
+    if not scores:
+        return QUIZ_LEVELS[0]
+
+    current = scores[0].difficulty if scores[0].difficulty in QUIZ_LEVELS else QUIZ_LEVELS[0]
+    at_level = [s for s in scores if s.difficulty == current and s.total_questions]
+    if not at_level:
+        return current
+
+    pct = sum(100.0 * s.score / s.total_questions for s in at_level) / len(at_level)
+    index = QUIZ_LEVELS.index(current)
+    if pct >= QUIZ_ADAPTIVE_PROMOTE_PCT:
+        index = min(index + 1, len(QUIZ_LEVELS) - 1)
+    elif pct < QUIZ_ADAPTIVE_DEMOTE_PCT:
+        index = max(index - 1, 0)
+    return QUIZ_LEVELS[index]
+
+
+def pick_level(db: Session, student_id: str, subject_id: str, chapter_id: str) -> Tuple[str, str]:
+    """
+    Difficulty for the student's next quiz on a chapter, and the history it was based on
+    ("chapter", "subject" for a chapter they haven't attempted, or "none").
+    """
+    basis = "chapter"
+    scores = _recent_scores(db, student_id, subject_id, chapter_id)
+    if not scores:
+        basis = "subject"
+        scores = _recent_scores(db, student_id, subject_id, None)
+    if not scores:
+        basis = "none"
+
+    level = next_level(scores)
+    quiz_adaptive_picks_total.inc(difficulty=level, basis=basis)
+    logger.info(f"Adaptive quiz level for {student_id}: {level} (from {basis} history)")
+    return level, basis
+
+
+def resolve_levels(db: Session, request: QuizRequest, student_id: Optional[str]) -> Optional[List[str]]:
+    """Levels to serve: explicit request.levels, the adaptive pick for the student, or None for all."""
+    if request.levels:
+        return list(dict.fromkeys(request.levels))
+    if not student_id or not adaptive_enabled(request.adaptive):
+        return None
+
+    scope = resolve_scope(
+        db, request.subject, request.grade_band, request.chapter_id, request.chapter_title,
+        request.chapter_summary, request.subchapter_id
+    )
+    if scope is None:
+        return None
+    level, _ = pick_level(db, student_id, scope.subject_id, scope.chapter_id)
+    return [level]
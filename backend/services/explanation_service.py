@@ -0,0 +1,159 @@
+"""
+Explanation Service
+Generates quiz explanations on demand (see QUIZ_LAZY_EXPLANATIONS) and caches them
+in the Question rows and the flashcards copied from them. Quizzes that were never
+stored are explained from the questions the client was served.
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from backend.models.flashcard import Flashcard
+from backend.models.quiz import Quiz
+from backend.models.subchapter import Subchapter
+from backend.services.quiz_bank_service import correct_option_text, get_ai_tutor
+from src.utils.metrics import quiz_explanations_total
+
+logger = logging.getLogger(__name__)
+
+
+def _position(row) -> int:
+    return json.loads(row.extra or "{}").get("_position", 0)
+
+
+def _chapter_title(db: Session, quiz: Quiz) -> str:
+    if quiz.subchapter_id:
+        subchapter = db.query(Subchapter).filter(Subchapter.id == quiz.subchapter_id).first()
+        if subchapter:
+            return subchapter.title
+    return quiz.chapter.title if quiz.chapter else ""
+
+
+def _selected(count: int, indexes: Optional[List[int]]) -> List[int]:
+    return list(range(count)) if indexes is None else [i for i in dict.fromkeys(indexes) if 0 <= i < count]
+
+
+def _count_outcomes(quiz_id: str, selected: List[int], pending: List[int], generated: Dict[int, str]):
+    if pending:
+        quiz_explanations_total.inc(len(generated), outcome="generated")
+        if len(generated) < len(pending):
+            quiz_explanations_total.inc(len(pending) - len(generated), outcome="missing")
+            logger.warning(f"Model skipped {len(pending) - len(generated)} explanations for quiz {quiz_id}")
+    cached = len(selected) - len(pending)
+    if cached:
+        quiz_explanations_total.inc(cached, outcome="cached")
+
+
+def explain_quiz(
+        db: Session,
+        quiz_id: str,
+        indexes: Optional[List[int]] = None,
+        grade_band: Optional[str] = None,
+) -> Optional[Dict]:
+    """
+    Explanations for a stored quiz, by question position (all questions if indexes is None).
+
+    Only questions without a stored explanation are sent to the model, in one
+    batch; results are saved to Question.explanation and to matching flashcards
+    of the chapter. Returns None if the quiz does not exist.
+    """
+    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    if not quiz:
+        return None
+
+    rows = sorted(quiz.questions, key=_position)
+    selected = _selected(len(rows), indexes)
+    pending = [i for i in selected if not rows[i].explanation]
+
+    generated = {}
+    if pending:
+        generated = get_ai_tutor().generate_explanations(
+            subject=quiz.subject.name if quiz.subject else "general",
+            grade_band=quiz.grade_band or grade_band or "",
+            chapter_title=_chapter_title(db, quiz),
+            questions=[
+                {
+                    "question_text": rows[i].question_text,
+                    "options": json.loads(rows[i].options or "[]"),
+                    "correct_option": rows[i].correct_option,
+                }
+                for i in pending
+            ],
+        )
+
+        for position, text in generated.items():
+            row = rows[pending[position]]
+            row.explanation = text
+            # Flashcards are copies of the question; fill the ones still without an explanation
+            db.query(Flashcard).filter(
+                Flashcard.chapter_id == quiz.chapter_id,
+                Flashcard.question_text == row.question_text,
+                or_(Flashcard.explanation.is_(None), Flashcard.explanation == ""),
+            ).update({Flashcard.explanation: text}, synchronize_session=False)
+        db.commit()
+    _count_outcomes(quiz_id, selected, pending, generated)
+
+    return {
+        "quiz_id": quiz.id,
+        "explanations": [
+            {
+                "index": i,
+                "question_text": rows[i].question_text,
+                "explanation": rows[i].explanation or None,
+                "cached": i not in pending,
+            }
+            for i in selected
+        ],
+    }
+
+
+def explain_questions(
+        quiz_id: str,
+        questions: List[Dict],
+        indexes: Optional[List[int]] = None,
+        subject: Optional[str] = None,
+        grade_band: Optional[str] = None,
+        chapter_title: Optional[str] = None,
+) -> Dict:
+    """
+    Same result as explain_quiz for a quiz that is not stored (a live quiz that was
+    not banked, before the flashcard writer saves it), from the served questions.
+    Nothing is cached; questions that came with an explanation are returned as is.
+    """
+    selected = _selected(len(questions), indexes)
+    pending = [i for i in selected if not questions[i].get("explanation")]
+
+    generated = {}
+    if pending:
+        generated = get_ai_tutor().generate_explanations(
+            subject=subject or "general",
+            grade_band=grade_band or "",
+            chapter_title=chapter_title or "",
+            questions=[
+                {
+                    "question_text": questions[i].get("question_text", ""),
+                    "options": questions[i].get("options", []),
+                    "correct_option": correct_option_text(questions[i]),
+                }
+                for i in pending
+            ],
+        )
+    _count_outcomes(quiz_id, selected, pending, generated)
+
+    explanations = {pending[position]: text for position, text in generated.items()}
+    return {
+        "quiz_id": quiz_id,
+        "explanations": [
+            {
+                "index": i,
+                "question_text": questions[i].get("question_text", ""),
+                "explanation": questions[i].get("explanation") or explanations.get(i),
+                "cached": i not in pending,
+            }
+            for i in selected
+        ],
+    }
@@ -5,14 +5,19 @@ Now includes student-based linking for personalized flashcard tracking.
 Automatically assigns student_id if missing.
 """
 
+from typing import Dict, List
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from backend.models.flashcard import Flashcard
 from backend.models.subject import Subject
 from backend.models.chapter import Chapter
 from backend.models.students import Student
 from backend.models.student_progress import StudentProgress
+from backend.utils.fingerprint import FingerprintIndex, question_fingerprint
+from src.utils.metrics import question_duplicates_total
 from datetime import datetime
 import json
+import uuid
 
 
 # NOTE: Use backend.database.get_db for FastAPI Depends()
@@ -22,20 +27,27 @@ import json
 # -----------------------------------------------------------
 # Save flashcards after a quiz
 # -----------------------------------------------------------
-def save_flashcards_from_quiz(
-        quiz_data: dict,
+def save_flashcards_from_quizzes(
+        quizzes: Dict[str, List[dict]],
         subject_name: str,
         chapter_title: str,
         chapter_summary: str,
         db: Session,
         student_id: str | None = None,
-        chapter_id: str | None = None,  # ✅ Added chapter_id
+        chapter_id: str | None = None,
         subchapter_id: str | None = None,
+        commit: bool = True,
 ):
     """
-    Saves quiz questions as flashcards.
+    Saves every quiz of a quiz set ({difficulty: [quiz, ...]}) as flashcards.
     ❗ Never creates subject or chapter.
     ❗ Only uses existing DB records.
+    Quizzes whose quiz_id names a stored quiz (e.g. one served from the quiz
+    bank) reuse their Quiz/Question rows and only get flashcards. Questions
+    that near-duplicate a flashcard the student already has for the chapter
+    (SimHash fingerprints) get no new flashcard. Everything
+    else is written with client-side IDs as one bulk insert per table, in a
+    single transaction (left open with commit=False so callers can batch sets).
     """
 
     from backend.models.quiz import Quiz
@@ -71,61 +83,127 @@ def save_flashcards_from_quiz(
             "Do not auto-create — please add manually."
         )
 
-    # 4️⃣ Create quiz record (schema has no grade_band column)
-    quiz = Quiz(
-        subject_id=subject.id,
-        chapter_id=chapter.id,
-        difficulty=quiz_data.get("difficulty", "basic")
-    )
-    db.add(quiz)
-    db.commit()
-    db.refresh(quiz)
-
-    # 5️⃣ Save all questions + flashcards
-    for q in quiz_data.get("questions", []):
-
-        correct_option = None
-        options = q.get("options", [])
-        idx = q.get("correct_option_index")
-
-        if isinstance(idx, int) and 0 <= idx < len(options):
-            correct_option = options[idx]
-
-        # Save Question
-        question = Question(
-            quiz_id=quiz.id,
-            question_text=q.get("question_text"),
-            options=json.dumps(options),
-            correct_option=correct_option or "",
-            explanation=q.get("explanation", ""),
-            type=q.get("type"),
-            difficulty=q.get("difficulty")
-        )
-        db.add(question)
-        db.commit()
-        db.refresh(question)
-
-        # Save Flashcard (linked to existing chapter)
-        flashcard = Flashcard(
-            question_text=q.get("question_text"),
-            correct_option=correct_option,
-            explanation=q.get("explanation", ""),
-            subject_id=subject.id,
-            chapter_id=chapter.id,  # 👉 IMPORTANT
-            subchapter_id=subchapter_id,
-            difficulty=quiz_data.get("difficulty", "basic"),
-            student_id=student_id
+    # 4️⃣ Find quizzes that are already stored (one query for the whole set)
+    quiz_list = [quiz for level_quizzes in quizzes.values() for quiz in level_quizzes]
+    quiz_ids = [quiz["quiz_id"] for quiz in quiz_list if quiz.get("quiz_id")]
+    stored_ids = {
+        row.id for row in db.query(Quiz.id).filter(Quiz.id.in_(quiz_ids))
+    } if quiz_ids else set()
+
+    # Flashcards the student already has for this chapter; near-duplicates are skipped
+    known = FingerprintIndex(
+        fingerprint for (fingerprint,) in db.query(Flashcard.fingerprint).filter(
+            Flashcard.chapter_id == chapter.id,
+            Flashcard.student_id == student_id,
+            Flashcard.fingerprint.isnot(None),
         )
+    )
 
-        db.add(flashcard)
-        db.commit()
+    # 5️⃣ Build quiz, question and flashcard rows
+    quiz_rows, question_rows, flashcard_rows = [], [], []
+    duplicates = 0
+    for quiz_data in quiz_list:
+        difficulty = quiz_data.get("difficulty", "basic")
+        quiz_id = quiz_data.get("quiz_id")
+        save_questions = quiz_id not in stored_ids
+        if save_questions:
+            quiz_id = quiz_id or str(uuid.uuid4())
+            quiz_rows.append({
+                "id": quiz_id,
+                "subject_id": subject.id,
+                "chapter_id": chapter.id,
+                "subchapter_id": subchapter_id,
+                "grade_band": quiz_data.get("grade_band"),
+                "difficulty": difficulty,
+            })
+
+        for position, q in enumerate(quiz_data.get("questions", [])):
+            correct_option = None
+            options = q.get("options", [])
+            idx = q.get("correct_option_index")
+
+            if isinstance(idx, int) and 0 <= idx < len(options):
+                correct_option = options[idx]
+            fingerprint = question_fingerprint(q.get("question_text"), correct_option)
+
+            if save_questions:
+                question_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "quiz_id": quiz_id,
+                    "question_text": q.get("question_text"),
+                    "options": json.dumps(options),
+                    "correct_option": correct_option or "",
+                    "explanation": q.get("explanation", ""),
+                    "type": q.get("type"),
+                    "difficulty": q.get("difficulty"),
+                    "extra": json.dumps({"_position": position}),
+                    "fingerprint": fingerprint,
+                })
+
+            if known.find(fingerprint):
+                duplicates += 1
+                continue
+            known.add(fingerprint)
+
+            # Flashcard linked to the existing chapter
+            flashcard_rows.append({
+                "id": str(uuid.uuid4()),
+                "question_text": q.get("question_text"),
+                "correct_option": correct_option,
+                "explanation": q.get("explanation", ""),
+                "subject_id": subject.id,
+                "chapter_id": chapter.id,  # 👉 IMPORTANT
+                "subchapter_id": subchapter_id,
+                "difficulty": difficulty,
+                "student_id": student_id,
+                "fingerprint": fingerprint,
+            })
+
+    # 6️⃣ Bulk insert everything and commit once
+    try:
+        for model, rows in ((Quiz, quiz_rows), (Question, question_rows), (Flashcard, flashcard_rows)):
+            if rows:
+                db.execute(insert(model), rows)
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if duplicates:
+        question_duplicates_total.inc(duplicates, kind="flashcard")
 
     return {
         "message": f"✅ Flashcards saved for existing chapter {chapter_title}",
-        "chapter_id": chapter.id
+        "chapter_id": chapter.id,
+        "saved_flashcards": len(flashcard_rows),
+        "skipped_duplicates": duplicates,
     }
 
 
+def save_flashcards_from_quiz(
+        quiz_data: dict,
+        subject_name: str,
+        chapter_title: str,
+        chapter_summary: str,
+        db: Session,
+        student_id: str | None = None,
+        chapter_id: str | None = None,  # ✅ Added chapter_id
+        subchapter_id: str | None = None,
+):
+    """Saves the questions of a single quiz as flashcards (see save_flashcards_from_quizzes)."""
+    return save_flashcards_from_quizzes(
+        {quiz_data.get("difficulty", "basic"): [quiz_data]},
+        subject_name=subject_name,
+        chapter_title=chapter_title,
+        chapter_summary=chapter_summary,
+        db=db,
+        student_id=student_id,
+        chapter_id=chapter_id,
+        subchapter_id=subchapter_id,
+    )
+
+
 # -----------------------------------------------------------
 # Fetch flashcards (by subject & chapter)
 # -----------------------------------------------------------
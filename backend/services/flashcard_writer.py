@@ -0,0 +1,150 @@
+"""
+Flashcard Writer
+Persists quiz flashcards on a background thread so quiz responses don't wait on the database.
+Sets are queued (bounded) and written in batches, one transaction per batch.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.database import SessionLocal
+from backend.services.flashcard_service import save_flashcards_from_quizzes
+from src.utils.metrics import flashcard_write_batch_seconds, flashcard_writes_total
+
+logger = logging.getLogger(__name__)
+
+# Quiz sets waiting to be written; submissions beyond this are dropped (and counted)
+FLASHCARD_WRITER_QUEUE_SIZE = int(os.getenv("FLASHCARD_WRITER_QUEUE_SIZE", "1000"))
+# Max quiz sets per transaction, and how long to wait for a batch to fill
+FLASHCARD_WRITER_BATCH_SIZE = int(os.getenv("FLASHCARD_WRITER_BATCH_SIZE", "20"))
+FLASHCARD_WRITER_FLUSH_SECONDS = float(os.getenv("FLASHCARD_WRITER_FLUSH_SECONDS", "0.2"))
+
+
+def _count_flashcards(quizzes: Dict[str, List[dict]]) -> int:
+    return sum(len(quiz.get("questions", [])) for level in quizzes.values() for quiz in level)
+
+
+class FlashcardWriter:
+    """
+    Background writer for save_flashcards_from_quizzes.
+
+    Features:
+    - Bounded queue: submit() never blocks the request; overflow is dropped and counted
+    - Batches queued sets into one transaction; if a batch fails, its sets are
+      retried one by one so a bad set doesn't lose the others
+    - Outcomes go to tutor_flashcard_writes_total (saved, failed, dropped)
+    - stop() drains whatever is queued before returning
+    """
+
+    def __init__(self, maxsize: int = FLASHCARD_WRITER_QUEUE_SIZE, batch_size: int = FLASHCARD_WRITER_BATCH_SIZE,
+                 flush_seconds: float = FLASHCARD_WRITER_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------
+    # Lifecycle
+    # ----------------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="flashcard-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Write everything queued so far, then stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until queued sets are written (used by tests/benchmarks); False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # ----------------------------------------------------------
+    # Producer
+    # ----------------------------------------------------------
+    def submit(self, quizzes: Dict[str, List[dict]], **kwargs) -> bool:
+        """
+        Queue a quiz set ({difficulty: [quiz]}) for saving.
+
+        kwargs are passed to save_flashcards_from_quizzes (everything but db).
+        Returns False if the queue is full and the set was dropped.
+        """
+        self.start()
+        try:
+            self._queue.put_nowait({"quizzes": quizzes, **kwargs})
+            return True
+        except queue.Full:
+            flashcard_writes_total.inc(_count_flashcards(quizzes), outcome="dropped")
+            return False
+
+    # ----------------------------------------------------------
+    # Consumer
+    # ----------------------------------------------------------
+    def _next_batch(self) -> List[Optional[Dict]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_seconds
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            items = [item for item in batch if item is not None]
+            try:
+                if items:
+                    self._write(items)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(items) < len(batch):
+                return
+
+    def _write(self, items: List[Dict]):
+        start = time.perf_counter()
+        if not self._save(items) and len(items) > 1:
+            # Isolate the failing set(s)
+            for item in items:
+                self._save([item])
+        flashcard_write_batch_seconds.observe(time.perf_counter() - start)
+
+    @staticmethod
+    def _save(items: List[Dict]) -> bool:
+        """Write the sets in one transaction; a single set that fails is counted as failed."""
+        db = SessionLocal()
+        try:
+            saved = sum(save_flashcards_from_quizzes(db=db, commit=False, **item)["saved_flashcards"] for item in items)
+            db.commit()
+            flashcard_writes_total.inc(saved, outcome="saved")
+            return True
+        except Exception:
+            db.rollback()
+            if len(items) == 1:
+                flashcard_writes_total.inc(_count_flashcards(items[0]["quizzes"]), outcome="failed")
+                logger.debug("Flashcard write failed", exc_info=True)
+            return False
+        finally:
+            db.close()
+
+
+flashcard_writer = FlashcardWriter()
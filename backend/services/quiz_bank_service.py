@@ -0,0 +1,514 @@
+"""
+Quiz Bank Service
+Serves pre-generated quizzes from the Quiz/Question tables so popular chapters
+skip LLM generation, and keeps the bank topped up by background workers.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.database import get_db_context
+from backend.models.chapter import Chapter
+from backend.models.question import Question
+from backend.models.quiz import Quiz
+from backend.models.quiz_serve import QuizServe
+from backend.models.subject import Subject
+from backend.utils.fingerprint import FingerprintIndex, question_fingerprint
+from src.utils.metrics import (
+    question_duplicates_total,
+    quiz_bank_draws_total,
+    quiz_bank_refills_total,
+)
+from src.utils.resilience import resilience
+
+logger = logging.getLogger(__name__)
+
+QUIZ_LEVELS = ["basic", "medium", "hard"]
+BANK_SOURCE = "bank"
+# Questions per generated quiz (bank refills and the streaming generator both use five)
+QUIZ_QUESTIONS_PER_LEVEL = 5
+
+QUIZ_BANK_ENABLED = os.getenv("QUIZ_BANK_ENABLED", "true").strip().lower() in {"1", "true", "yes", "y"}
+# Quizzes kept per (chapter/subchapter, grade band, difficulty). Each one is an LLM
+# generation in the background: the first request for a chapter banks its live quiz
+# and queues (target - 1) more per difficulty level
+QUIZ_BANK_TARGET = int(os.getenv("QUIZ_BANK_TARGET", "2"))
+# Upper bound per key when refilling for students who have seen every banked quiz
+QUIZ_BANK_MAX_PER_KEY = int(os.getenv("QUIZ_BANK_MAX_PER_KEY", "50"))
+QUIZ_BANK_WORKERS = int(os.getenv("QUIZ_BANK_WORKERS", "2"))
+# Refill model calls are background work: each starts only while at most this many
+# model calls are in flight (and none queued) across the process, and a refill that
+# waits longer than QUIZ_BANK_REFILL_WAIT_SECONDS for that is given up
+QUIZ_BANK_REFILL_MAX_IN_FLIGHT = int(os.getenv("QUIZ_BANK_REFILL_MAX_IN_FLIGHT", "2"))
+QUIZ_BANK_REFILL_WAIT_SECONDS = float(os.getenv("QUIZ_BANK_REFILL_WAIT_SECONDS", "60"))
+# Generated quizzes repeating more questions than this (near-duplicates of questions
+# already banked for the chapter) are not banked
+QUIZ_BANK_MAX_DUPLICATES = int(os.getenv("QUIZ_BANK_MAX_DUPLICATES", "1"))
+
+# Quiz fields with their own Question column; the rest round-trips through Question.extra
+QUESTION_COLUMNS = ("question_text", "options", "explanation", "type", "difficulty")
+
+
+def get_ai_tutor():
+    """Lazy import to avoid circular import issues."""
+    from src.tutor.interface import tutor_interface
+    return tutor_interface
+
+
+class BankScope:
+    """Existing subject/chapter rows and grade band that a quiz request maps onto."""
+
+    def __init__(self, subject_id: str, subject_name: str, chapter_id: str, subchapter_id: Optional[str],
+                 grade_band: str, title: str, summary: str):
+        self.subject_id = subject_id
+        self.subject_name = subject_name
+        self.chapter_id = chapter_id
+        self.subchapter_id = subchapter_id
+        self.grade_band = grade_band
+        self.title = title
+        self.summary = summary
+
+    def key(self, difficulty: str) -> tuple:
+        return (self.chapter_id, self.subchapter_id, self.grade_band, difficulty)
+
+
+def resolve_scope(
+        db: Session,
+        subject_name: str,
+        grade_band: str,
+        chapter_id: str,
+        chapter_title: str,
+        chapter_summary: str,
+        subchapter_id: Optional[str] = None,
+        subchapter_title: Optional[str] = None,
+        subchapter_summary: Optional[str] = None,
+) -> Optional[BankScope]:
+    """Look up the subject and chapter like save_flashcards_from_quiz; None if either is missing."""
+    subject = db.query(Subject).filter(Subject.name == subject_name).first()
+    if not subject:
+        return None
+
+    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first() if chapter_id else None
+    if not chapter:
+        chapter = db.query(Chapter).filter(
+            Chapter.title == chapter_title,
+            Chapter.subject_id == subject.id
+        ).first()
+    if not chapter:
+        return None
+
+    return BankScope(
+        subject_id=subject.id,
+        subject_name=subject_name,
+        chapter_id=chapter.id,
+        subchapter_id=subchapter_id,
+        grade_band=grade_band,
+        title=subchapter_title or chapter_title,
+        summary=subchapter_summary or chapter_summary,
+    )
+
+
+# -----------------------------------------------------------
+# Storage
+# -----------------------------------------------------------
+def _bank_query(db: Session, scope: BankScope, difficulty: str):
+    query = db.query(Quiz).filter(
+        Quiz.source == BANK_SOURCE,
+        Quiz.chapter_id == scope.chapter_id,
+        Quiz.grade_band == scope.grade_band,
+        Quiz.difficulty == difficulty,
+    )
+    if scope.subchapter_id:
+        return query.filter(Quiz.subchapter_id == scope.subchapter_id)
+    return query.filter(Quiz.subchapter_id.is_(None))
+
+
+def _unserved(query, student_id: Optional[str]):
+    if not student_id:
+        return query
+    return query.filter(~exists().where(
+        (QuizServe.quiz_id == Quiz.id) & (QuizServe.student_id == student_id)
+    ))
+
+
+def is_fallback_quiz(quiz_data: Dict) -> bool:
+    """True for the placeholder quiz returned when generation failed; never banked."""
+    questions = quiz_data.get("questions") or []
+    return not questions or any(str(q.get("id", "")).startswith("fallback-") for q in questions)
+
+
+def _banked_fingerprints(db: Session, scope: BankScope) -> FingerprintIndex:
+    """Fingerprints of every question banked for the chapter/subchapter, across levels."""
+    query = db.query(Question.fingerprint).join(Quiz, Question.quiz_id == Quiz.id).filter(
+        Quiz.source == BANK_SOURCE,
+        Quiz.chapter_id == scope.chapter_id,
+        Question.fingerprint.isnot(None),
+    )
+    if scope.subchapter_id:
+        query = query.filter(Quiz.subchapter_id == scope.subchapter_id)
+    return FingerprintIndex(fingerprint for (fingerprint,) in query)
+
+
+def correct_option_text(q: Dict) -> str:
+    """Answer text of a generated question (its correct_option_index into options)."""
+    options = q.get("options", [])
+    idx = q.get("correct_option_index")
+    return options[idx] if isinstance(idx, int) and 0 <= idx < len(options) else ""
+
+
+def store_quiz(db: Session, scope: BankScope, quiz_data: Dict) -> Optional[Quiz]:
+    """
+    Persist a generated quiz and its questions as a bank quiz (one commit).
+    Returns None for placeholder quizzes and for near-duplicates of banked ones.
+    """
+    if is_fallback_quiz(quiz_data):
+        return None
+
+    fingerprints = [question_fingerprint(q.get("question_text"), correct_option_text(q)) for q in quiz_data["questions"]]
+    banked = _banked_fingerprints(db, scope)
+    if sum(1 for fingerprint in fingerprints if banked.find(fingerprint)) > QUIZ_BANK_MAX_DUPLICATES:
+        question_duplicates_total.inc(kind="bank_quiz")
+        return None
+
+    difficulty = quiz_data.get("difficulty", "basic")
+    quiz = Quiz(
+        id=quiz_data.get("quiz_id") or str(uuid.uuid4()),
+        subject_id=scope.subject_id,
+        chapter_id=scope.chapter_id,
+        subchapter_id=scope.subchapter_id,
+        grade_band=scope.grade_band,
+        difficulty=difficulty,
+        source=BANK_SOURCE,
+    )
+    for position, (q, fingerprint) in enumerate(zip(quiz_data["questions"], fingerprints)):
+        extra = {k: v for k, v in q.items() if k not in QUESTION_COLUMNS}
+        extra["_position"] = position
+
+        quiz.questions.append(Question(
+            question_text=q.get("question_text"),
+            options=json.dumps(q.get("options", [])),
+            correct_option=correct_option_text(q),
+            explanation=q.get("explanation", ""),
+            type=q.get("type"),
+            difficulty=q.get("difficulty") or difficulty,
+            extra=json.dumps(extra),
+            fingerprint=fingerprint,
+        ))
+
+    db.add(quiz)
+    db.commit()
+    return quiz
+
+
+def quiz_to_dict(quiz: Quiz) -> Dict:
+    """Rebuild the generate_quiz payload from stored rows."""
+    questions = []
+    for row in quiz.questions:
+        q = json.loads(row.extra or "{}")
+        q.update({
+            "type": row.type,
+            "question_text": row.question_text,
+            "options": json.loads(row.options or "[]"),
+            "explanation": row.explanation,
+            "difficulty": row.difficulty,
+        })
+        if "correct_option_index" not in q and row.correct_option in q["options"]:
+            q["correct_option_index"] = q["options"].index(row.correct_option)
+        questions.append(q)
+
+    questions.sort(key=lambda q: q.get("_position", 0))
+    for q in questions:
+        q.pop("_position", None)
+
+    return {
+        "quiz_id": quiz.id,
+        "chapter_id": quiz.subchapter_id or quiz.chapter_id,
+        "grade_band": quiz.grade_band,
+        "difficulty": quiz.difficulty,
+        "questions": questions,
+    }
+
+
+def mark_served(db: Session, student_id: str, quiz_id: str):
+    """Remember that a student got a quiz; concurrent duplicates are ignored."""
+    db.add(QuizServe(student_id=student_id, quiz_id=quiz_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def draw_quiz(db: Session, scope: BankScope, difficulty: str, student_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Oldest bank quiz this student has not been served yet, or None.
+    Anonymous requests (nothing to track) get a random banked quiz instead.
+    """
+    query = _unserved(_bank_query(db, scope, difficulty), student_id).order_by(Quiz.created_at)
+    if student_id:
+        quiz = query.first()
+    else:
+        stock = query.count()
+        quiz = query.offset(random.randrange(stock)).first() if stock else None
+    if quiz is None:
+        quiz_bank_draws_total.inc(difficulty=difficulty, outcome="miss")
+        return None
+
+    quiz_bank_draws_total.inc(difficulty=difficulty, outcome="hit")
+    quiz_data = quiz_to_dict(quiz)
+    if student_id:
+        mark_served(db, student_id, quiz.id)
+    return quiz_data
+
+
+def refill_count(db: Session, scope: BankScope, difficulty: str, student_id: Optional[str] = None) -> int:
+    """How many quizzes to generate so the key reaches its target (or the student has one left)."""
+    query = _bank_query(db, scope, difficulty)
+    stock = query.count()
+    if stock >= QUIZ_BANK_MAX_PER_KEY:
+        return 0
+    if stock < QUIZ_BANK_TARGET:
+        return QUIZ_BANK_TARGET - stock
+    if student_id and _unserved(query, student_id).count() == 0:
+        return 1
+    return 0
+
+
+def has_unserved(db: Session, scope: BankScope, difficulty: str, student_id: str) -> bool:
+    """True if the bank already holds a quiz for this key that the student has not seen."""
+    return _unserved(_bank_query(db, scope, difficulty), student_id).first() is not None
+
+
+def _in_session(fn, *args):
+    """Call fn(db, *args) with a session of its own (Sessions must not move between threads)."""
+    with get_db_context() as db:
+        return fn(db, *args)
+
+
+def generate_into_bank(
+        scope: BankScope,
+        difficulty: str,
+        max_in_flight: int = QUIZ_BANK_REFILL_MAX_IN_FLIGHT,
+        wait_seconds: float = QUIZ_BANK_REFILL_WAIT_SECONDS,
+) -> str:
+    """
+    Generate one quiz for a key as background work and bank it; returns the outcome
+    (stored, duplicate, failed, or busy when interactive traffic kept the model busy).
+    Every model call of the generation, repairs included, waits for idle capacity.
+    """
+    with resilience.background(max_in_flight, wait_seconds) as budget:
+        quiz_data = get_ai_tutor().generate_quiz(
+            grade_band=scope.grade_band,
+            subject=scope.subject_name,
+            chapter_id=scope.subchapter_id or scope.chapter_id,
+            chapter_title=scope.title,
+            chapter_summary=scope.summary,
+            num_questions=QUIZ_QUESTIONS_PER_LEVEL,
+            difficulty=difficulty
+        )
+    if budget.gave_up:
+        return "busy"
+    with get_db_context() as db:
+        stored = store_quiz(db, scope, quiz_data)
+    if stored is not None:
+        return "stored"
+    return "failed" if is_fallback_quiz(quiz_data) else "duplicate"
+
+
+# -----------------------------------------------------------
+# Bank with background refill
+# -----------------------------------------------------------
+class QuizBank:
+    """
+    Draws quizzes from the bank and refills it off the request path.
+
+    Features:
+    - Bank hits need no LLM call; misses are generated live and banked for others
+    - A student is never served the same bank quiz twice
+    - Bounded worker pool refills keys below QUIZ_BANK_TARGET, only while
+      interactive traffic leaves the model idle (see generate_into_bank)
+    - At most one refill in flight per (chapter, subchapter, grade band, difficulty)
+    """
+
+    def __init__(self, workers: int = QUIZ_BANK_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-bank")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.workers = workers
+
+    def request_refill(self, scope: BankScope, difficulty: str, count: int) -> bool:
+        """Queue generation of count quizzes for a key unless one is already queued."""
+        if count <= 0:
+            return False
+        key = scope.key(difficulty)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._refill, scope, difficulty, count)
+        return True
+
+    def _refill(self, scope: BankScope, difficulty: str, count: int):
+        try:
+            for _ in range(count):
+                outcome = generate_into_bank(scope, difficulty)
+                quiz_bank_refills_total.inc(difficulty=difficulty, outcome=outcome)
+                if outcome != "stored":
+                    # Generation is failing, repeating itself or waiting on students; leave the rest
+                    # for the next request
+                    break
+        except Exception as e:
+            quiz_bank_refills_total.inc(difficulty=difficulty, outcome="failed")
+            logger.warning(f"Quiz bank refill failed for {scope.key(difficulty)}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(scope.key(difficulty))
+
+    def refill(self, db: Session, scope: BankScope, levels: Optional[List[str]] = None,
+               student_id: Optional[str] = None) -> List[str]:
+        """Queue refills for the given levels that are low on stock; returns the queued levels."""
+        return [
+            lvl for lvl in (levels or QUIZ_LEVELS)
+            if self.request_refill(scope, lvl, refill_count(db, scope, lvl, student_id))
+        ]
+
+    def get_quizzes(
+            self,
+            db: Session,
+            subject: str,
+            grade_band: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            subchapter_id: Optional[str] = None,
+            subchapter_title: Optional[str] = None,
+            subchapter_summary: Optional[str] = None,
+            student_id: Optional[str] = None,
+            levels: Optional[List[str]] = None,
+            single_call: Optional[bool] = None,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Same result shape as AI_Tutor.generate_all_quizzes ({level: [quiz]}).
+        Levels missing from the bank are generated live in one call and banked.
+        """
+        levels = levels or QUIZ_LEVELS
+        generate_kwargs = dict(
+            subject=subject,
+            grade_band=grade_band,
+            chapter_id=subchapter_id or chapter_id,
+            chapter_title=subchapter_title or chapter_title,
+            chapter_summary=subchapter_summary or chapter_summary,
+            single_call=single_call,
+        )
+
+        scope = None
+        if QUIZ_BANK_ENABLED:
+            scope = resolve_scope(
+                db, subject, grade_band, chapter_id, chapter_title, chapter_summary,
+                subchapter_id, subchapter_title, subchapter_summary
+            )
+        if scope is None:
+            return get_ai_tutor().generate_all_quizzes(**generate_kwargs, levels=levels)
+
+        result = {}
+        for lvl in levels:
+            quiz = draw_quiz(db, scope, lvl, student_id)
+            if quiz:
+                result[lvl] = [quiz]
+
+        missing = [lvl for lvl in levels if lvl not in result]
+        if missing:
+            live = get_ai_tutor().generate_all_quizzes(**generate_kwargs, levels=missing)
+            for lvl in missing:
+                result[lvl] = live[lvl]
+                self._bank_live_quiz(db, scope, live[lvl][0], student_id)
+
+        self.refill(db, scope, levels, student_id)
+        return {lvl: result[lvl] for lvl in levels}
+
+    async def astream_quizzes(
+            self,
+            subject: str,
+            grade_band: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            subchapter_id: Optional[str] = None,
+            subchapter_title: Optional[str] = None,
+            subchapter_summary: Optional[str] = None,
+            student_id: Optional[str] = None,
+            levels: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of get_quizzes yielding AI_Tutor.astream_all_quizzes events.
+        Bank hits are emitted at once; missing levels stream from the model and are banked.
+        DB work runs in worker threads, each step in a session of its own, so the
+        event loop is never blocked.
+        """
+        levels = levels or QUIZ_LEVELS
+
+        scope = None
+        if QUIZ_BANK_ENABLED:
+            scope = await asyncio.to_thread(
+                _in_session, resolve_scope, subject, grade_band, chapter_id, chapter_title, chapter_summary,
+                subchapter_id, subchapter_title, subchapter_summary
+            )
+
+        missing = list(levels)
+        if scope is not None:
+            for lvl in levels:
+                quiz = await asyncio.to_thread(_in_session, draw_quiz, scope, lvl, student_id)
+                if quiz is None:
+                    continue
+                missing.remove(lvl)
+                for index, question in enumerate(quiz["questions"]):
+                    yield {"type": "question", "difficulty": lvl, "index": index, "question": question}
+                yield {"type": "quiz", "difficulty": lvl, "quiz": quiz}
+
+        if missing:
+            async for event in get_ai_tutor().astream_all_quizzes(
+                subject=subject,
+                grade_band=grade_band,
+                chapter_id=subchapter_id or chapter_id,
+                chapter_title=subchapter_title or chapter_title,
+                chapter_summary=subchapter_summary or chapter_summary,
+                levels=missing,
+            ):
+                if event["type"] == "quiz" and scope is not None:
+                    await asyncio.to_thread(_in_session, self._bank_live_quiz, scope, event["quiz"], student_id)
+                yield event
+
+        if scope is not None:
+            await asyncio.to_thread(_in_session, self.refill, scope, levels, student_id)
+
+    def _bank_live_quiz(self, db: Session, scope: BankScope, quiz: Dict, student_id: Optional[str]):
+        """Store a quiz generated on the request path so other students are served from the bank."""
+        try:
+            if store_quiz(db, scope, quiz) is not None and student_id:
+                mark_served(db, student_id, quiz["quiz_id"])
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not bank live quiz: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "enabled": QUIZ_BANK_ENABLED,
+            "target": QUIZ_BANK_TARGET,
+            "workers": self.workers,
+            "pending_refills": pending,
+        }
+
+
+quiz_bank = QuizBank()
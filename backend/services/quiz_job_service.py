@@ -0,0 +1,343 @@
+"""
+Quiz Job Service
+Durable queue of asynchronous quiz generation jobs (rows in quiz_jobs)
+processed by an in-process worker pool, with per-question progress.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal, get_db_context
+from backend.models.quiz_job import QuizJob
+from backend.schemas import QuizRequest
+from backend.services.adaptive_quiz_service import resolve_levels
+from backend.services.flashcard_writer import flashcard_writer
+from backend.services.quiz_bank_service import QUIZ_LEVELS, QUIZ_QUESTIONS_PER_LEVEL, quiz_bank
+
+logger = logging.getLogger(__name__)
+
+QUIZ_JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", "2"))
+# Idle workers re-check the table this often (new jobs in this process wake them at once)
+QUIZ_JOB_POLL_SECONDS = float(os.getenv("QUIZ_JOB_POLL_SECONDS", "2"))
+# A job interrupted by this many restarts is marked failed instead of re-queued
+QUIZ_JOB_MAX_ATTEMPTS = int(os.getenv("QUIZ_JOB_MAX_ATTEMPTS", "3"))
+# Workers renew the lease of their running jobs this often; a running job whose
+# lease is older than QUIZ_JOB_LEASE_SECONDS belongs to a dead process and is re-queued
+QUIZ_JOB_HEARTBEAT_SECONDS = float(os.getenv("QUIZ_JOB_HEARTBEAT_SECONDS", "10"))
+QUIZ_JOB_LEASE_SECONDS = float(os.getenv("QUIZ_JOB_LEASE_SECONDS", "60"))
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+
+def job_to_dict(job: QuizJob, include_result: bool = True) -> Dict:
+    data = {
+        "job_id": job.id,
+        "status": job.status,
+        "student_id": job.student_id,
+        "questions_ready": job.questions_ready,
+        "questions_total": job.questions_total,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": str(job.created_at),
+        "started_at": str(job.started_at) if job.started_at else None,
+        "finished_at": str(job.finished_at) if job.finished_at else None,
+    }
+    if include_result:
+        data["result"] = json.loads(job.result) if job.result else None
+    return data
+
+
+class LeaseLostError(Exception):
+    """The job was re-queued (lease expired) while this worker was still running it."""
+
+
+def job_levels(db: Session, request: QuizRequest, student_id: Optional[str] = None) -> List[str]:
+    """
+    Levels a job generates (explicit levels, the adaptive pick, or all).
+    Raises ValueError for options jobs cannot honour.
+    """
+    if request.single_call:
+        raise ValueError("single_call is not supported for quiz jobs; levels are streamed concurrently")
+    if request.num_questions != QUIZ_QUESTIONS_PER_LEVEL:
+        raise ValueError(f"Quiz jobs generate {QUIZ_QUESTIONS_PER_LEVEL} questions per level")
+    return resolve_levels(db, request, student_id) or list(QUIZ_LEVELS)
+
+
+def enqueue_job(db: Session, request: QuizRequest, student_id: Optional[str] = None) -> QuizJob:
+    """Persist a queued job and wake a worker; raises ValueError for unsupported request options."""
+    # Resolved now, so the job (and its progress total) does not change if scores do meanwhile
+    request.levels = job_levels(db, request, student_id)
+    job = QuizJob(
+        student_id=student_id,
+        request=request.model_dump_json(),
+        questions_total=QUIZ_QUESTIONS_PER_LEVEL * len(request.levels),
+        status=QUEUED,
+    )
+    db.add(job)
+    db.commit()
+
+    quiz_jobs.start()
+    quiz_jobs.notify()
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Optional[QuizJob]:
+    return db.query(QuizJob).filter(QuizJob.id == job_id).first()
+
+
+class QuizJobQueue:
+    """
+    Worker pool for queued quiz jobs.
+
+    Features:
+    - Jobs live in the quiz_jobs table, so queued work survives restarts
+    - Workers claim jobs with a conditional UPDATE (safe across workers and processes)
+    - Each worker keeps one event loop and streams all levels concurrently,
+      saving progress after every question for polling/SSE clients
+    - Flashcards for the whole quiz set go to the background flashcard writer
+    - A running job holds a lease (worker id + heartbeat); only jobs whose lease
+      expired are re-queued, so jobs of other live processes are left alone
+    """
+
+    def __init__(self, workers: int = QUIZ_JOB_WORKERS, poll_seconds: float = QUIZ_JOB_POLL_SECONDS,
+                 max_attempts: int = QUIZ_JOB_MAX_ATTEMPTS, heartbeat_seconds: float = QUIZ_JOB_HEARTBEAT_SECONDS,
+                 lease_seconds: float = QUIZ_JOB_LEASE_SECONDS):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._running = set()  # Job ids this process is generating
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------
+    # Lifecycle
+    # ----------------------------------------------------------
+    def start(self):
+        """Recover jobs with expired leases and start the workers and lease keeper (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self.recover()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"quiz-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._lease_keeper, name="quiz-job-lease", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop taking new jobs; running jobs cut off are re-queued once their lease expires."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def recover(self) -> int:
+        """Re-queue running jobs whose lease expired (their process died); returns how many."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        last_seen = func.coalesce(QuizJob.heartbeat_at, QuizJob.started_at)
+        requeued = 0
+        with get_db_context() as db:
+            expired = db.query(QuizJob).filter(
+                QuizJob.status == RUNNING, (last_seen.is_(None)) | (last_seen < cutoff)
+            ).all()
+            for job in expired:
+                if job.attempts >= self.max_attempts:
+                    values = {QuizJob.status: FAILED, QuizJob.error: f"Interrupted {job.attempts} times",
+                              QuizJob.finished_at: datetime.utcnow()}
+                else:
+                    values = {QuizJob.status: QUEUED}
+                # Conditional on the lease seen above, in case its worker was only slow
+                updated = db.query(QuizJob).filter(
+                    QuizJob.id == job.id,
+                    QuizJob.status == RUNNING,
+                    QuizJob.heartbeat_at.is_(None) if job.heartbeat_at is None
+                    else QuizJob.heartbeat_at == job.heartbeat_at,
+                ).update({**values, QuizJob.worker: None}, synchronize_session=False)
+                if updated and values[QuizJob.status] == QUEUED:
+                    requeued += 1
+        if requeued:
+            logger.info(f"Re-queued {requeued} quiz jobs with expired leases")
+            self.notify()
+        return requeued
+
+    def _heartbeat(self):
+        """Renew the lease of every job this process is running."""
+        with self._lock:
+            job_ids = list(self._running)
+        if not job_ids:
+            return
+        with get_db_context() as db:
+            db.query(QuizJob).filter(
+                QuizJob.id.in_(job_ids), QuizJob.worker == self.worker_id, QuizJob.status == RUNNING
+            ).update({QuizJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+
+    def _lease_keeper(self):
+        while not self._stopping.wait(self.heartbeat_seconds):
+            try:
+                self._heartbeat()
+                self.recover()
+            except Exception as e:
+                logger.warning(f"Quiz job lease upkeep failed: {e}")
+
+    # ----------------------------------------------------------
+    # Workers
+    # ----------------------------------------------------------
+    def _claim(self, db: Session) -> Optional[str]:
+        """Mark the oldest queued job running; None when the queue is empty, "" on a lost race."""
+        job_id = (
+            db.query(QuizJob.id)
+            .filter(QuizJob.status == QUEUED)
+            .order_by(QuizJob.created_at)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            return None
+
+        now = datetime.utcnow()
+        claimed = db.query(QuizJob).filter(QuizJob.id == job_id, QuizJob.status == QUEUED).update(
+            {
+                QuizJob.status: RUNNING,
+                QuizJob.started_at: now,
+                QuizJob.heartbeat_at: now,
+                QuizJob.worker: self.worker_id,
+                QuizJob.attempts: QuizJob.attempts + 1,
+                QuizJob.questions_ready: 0,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        return job_id if claimed else ""
+
+    def _worker(self):
+        # aiohttp sessions are per event loop, so each worker reuses one loop
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    with get_db_context() as db:
+                        job_id = self._claim(db)
+                except Exception as e:
+                    logger.warning(f"Quiz job claim failed: {e}")
+                    job_id = None
+
+                if job_id is None:
+                    self._wakeup.wait(self.poll_seconds)
+                    self._wakeup.clear()
+                elif job_id:
+                    self._run(loop, job_id)
+        finally:
+            loop.close()
+
+    def _update(self, db: Session, job_id: str, values: Dict) -> bool:
+        """Write job fields while this worker still holds the lease; False if it was lost."""
+        updated = db.query(QuizJob).filter(
+            QuizJob.id == job_id, QuizJob.worker == self.worker_id, QuizJob.status == RUNNING
+        ).update(values, synchronize_session=False)
+        db.commit()
+        return bool(updated)
+
+    def _update_in_session(self, job_id: str, values: Dict) -> bool:
+        """_update with a session of its own, for calls from other threads."""
+        with get_db_context() as db:
+            return self._update(db, job_id, values)
+
+    def _run(self, loop: asyncio.AbstractEventLoop, job_id: str):
+        db = SessionLocal()
+        with self._lock:
+            self._running.add(job_id)
+        try:
+            job = get_job(db, job_id)
+            request = QuizRequest.model_validate_json(job.request)
+            try:
+                result = loop.run_until_complete(self._generate(job_id, request, job.student_id))
+                values = {QuizJob.result: json.dumps(result), QuizJob.status: COMPLETED}
+            except LeaseLostError:
+                logger.warning(f"Quiz job {job_id} was re-queued while running; dropping this run")
+                return
+            except Exception as e:
+                logger.error(f"Quiz job {job_id} failed: {e}")
+                db.rollback()
+                values = {QuizJob.status: FAILED, QuizJob.error: str(e)}
+            values[QuizJob.finished_at] = datetime.utcnow()
+            if not self._update(db, job_id, values):
+                logger.warning(f"Quiz job {job_id} was re-queued while running; result discarded")
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+            db.close()
+
+    async def _generate(self, job_id: str, request: QuizRequest, student_id: Optional[str]) -> Dict:
+        """Stream the job's levels through the quiz bank, recording progress and saving flashcards."""
+        levels = request.levels or QUIZ_LEVELS
+        quizzes = {}
+        ready = 0
+        async for event in quiz_bank.astream_quizzes(
+            subject=request.subject,
+            grade_band=request.grade_band,
+            chapter_id=request.chapter_id,
+            chapter_title=request.chapter_title,
+            chapter_summary=request.chapter_summary,
+            subchapter_id=request.subchapter_id,
+            subchapter_title=request.subchapter_title,
+            subchapter_summary=request.subchapter_summary,
+            student_id=student_id,
+            levels=levels,
+        ):
+            if event["type"] == "question":
+                ready += 1
+                progress = {QuizJob.questions_ready: ready, QuizJob.heartbeat_at: datetime.utcnow()}
+                if not await asyncio.to_thread(self._update_in_session, job_id, progress):
+                    raise LeaseLostError(job_id)
+            elif event["type"] == "quiz":
+                quizzes[event["difficulty"]] = [event["quiz"]]
+
+        result = {lvl: quizzes[lvl] for lvl in levels if lvl in quizzes}
+        flashcard_writer.submit(
+            result,
+            subject_name=request.subject,
+            chapter_title=request.subchapter_title or request.chapter_title,
+            chapter_summary=request.subchapter_summary or request.chapter_summary,
+            student_id=student_id,
+            chapter_id=request.chapter_id,
+            subchapter_id=request.subchapter_id,
+        )
+        return result
+
+    def stats(self) -> Dict:
+        with get_db_context() as db:
+            counts = {
+                status: db.query(QuizJob).filter(QuizJob.status == status).count()
+                for status in (QUEUED, RUNNING, COMPLETED, FAILED)
+            }
+        with self._lock:
+            running_here = len(self._running)
+        return {"workers": self.workers, "worker_id": self.worker_id, "running_here": running_here, "jobs": counts}
+
+
+quiz_jobs = QuizJobQueue()
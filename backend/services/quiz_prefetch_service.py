@@ -0,0 +1,147 @@
+"""
+Quiz Prefetch Service
+After a student submits a quiz score, generates their quiz for the next chapter
+(by Chapter.order_index) into the quiz bank, so it is waiting when they get there.
+Prefetch only uses the model while interactive traffic leaves it idle.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.database import get_db_context
+from backend.models.chapter import Chapter
+from backend.models.students import Student
+from backend.services.adaptive_quiz_service import QUIZ_ADAPTIVE, pick_level
+from backend.services.quiz_bank_service import (
+    QUIZ_BANK_ENABLED,
+    QUIZ_LEVELS,
+    BankScope,
+    generate_into_bank,
+    has_unserved,
+)
+from src.utils.metrics import quiz_prefetch_total
+
+logger = logging.getLogger(__name__)
+
+QUIZ_PREFETCH_ENABLED = os.getenv("QUIZ_PREFETCH_ENABLED", "true").strip().lower() in {"1", "true", "yes", "y"}
+QUIZ_PREFETCH_WORKERS = int(os.getenv("QUIZ_PREFETCH_WORKERS", "1"))
+# Prefetches waiting for a worker; further score submissions are not prefetched
+QUIZ_PREFETCH_MAX_PENDING = int(os.getenv("QUIZ_PREFETCH_MAX_PENDING", "100"))
+# Each model call of a prefetch generation starts only while at most this many model
+# calls are in flight (and none are queued for a slot) across the process
+QUIZ_PREFETCH_MAX_IN_FLIGHT = int(os.getenv("QUIZ_PREFETCH_MAX_IN_FLIGHT", "2"))
+# How long a prefetch generation waits for the model to go quiet before it is given up
+QUIZ_PREFETCH_WAIT_SECONDS = float(os.getenv("QUIZ_PREFETCH_WAIT_SECONDS", "60"))
+
+
+def next_chapter(db: Session, chapter: Chapter) -> Optional[Chapter]:
+    """The chapter after this one in its subject (order_index, then chapter_no), or None."""
+    chapters = db.query(Chapter).filter(Chapter.subject_id == chapter.subject_id).all()
+    chapters.sort(key=lambda c: (c.order_index or 0, c.chapter_no or 0, c.title))
+    position = next(i for i, c in enumerate(chapters) if c.id == chapter.id)
+    return chapters[position + 1] if position + 1 < len(chapters) else None
+
+
+class QuizPrefetcher:
+    """
+    Low-priority generation of a student's next-chapter quiz.
+
+    Features:
+    - Own small worker pool (QUIZ_PREFETCH_WORKERS), separate from the bank refill pool
+    - Generations are background work (see generate_into_bank): every model call,
+      repairs included, waits for idle capacity within QUIZ_PREFETCH_MAX_IN_FLIGHT and
+      the generation is dropped after QUIZ_PREFETCH_WAIT_SECONDS, so prefetch never
+      takes a slot from a student waiting on a quiz
+    - Only levels the student has no unserved bank quiz for are generated; the
+      adaptive level when QUIZ_ADAPTIVE is on, otherwise all levels
+    - At most one prefetch queued per (student, chapter); outcomes go to tutor_quiz_prefetch_total
+    """
+
+    def __init__(self, workers: int = QUIZ_PREFETCH_WORKERS, max_pending: int = QUIZ_PREFETCH_MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-prefetch")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.max_pending = max_pending
+
+    def after_score(self, student_id: str, chapter_id: str) -> bool:
+        """Queue a prefetch of the chapter after chapter_id; False if disabled, duplicate or over budget."""
+        if not (QUIZ_PREFETCH_ENABLED and QUIZ_BANK_ENABLED):
+            return False
+        key = (student_id, chapter_id)
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                quiz_prefetch_total.inc(outcome="dropped")
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._prefetch, student_id, chapter_id)
+        return True
+
+    # ----------------------------------------------------------
+    # Worker
+    # ----------------------------------------------------------
+    def _prefetch(self, student_id: str, chapter_id: str):
+        try:
+            scope, levels = self._plan(student_id, chapter_id)
+            for lvl in levels:
+                outcome = generate_into_bank(scope, lvl, QUIZ_PREFETCH_MAX_IN_FLIGHT, QUIZ_PREFETCH_WAIT_SECONDS)
+                quiz_prefetch_total.inc(outcome=outcome)
+                if outcome == "busy":
+                    logger.info(f"Quiz prefetch for {scope.key(lvl)} gave up; model busy")
+                    return
+        except Exception as e:
+            quiz_prefetch_total.inc(outcome="failed")
+            logger.warning(f"Quiz prefetch failed after chapter {chapter_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard((student_id, chapter_id))
+
+    @staticmethod
+    def _plan(student_id: str, chapter_id: str) -> Tuple[Optional[BankScope], List[str]]:
+        """Bank scope of the next chapter and the levels to generate for it."""
+        with get_db_context() as db:
+            student = db.query(Student).filter(Student.id == student_id).first()
+            chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+            upcoming = next_chapter(db, chapter) if chapter else None
+            if not student or not student.grade_band or upcoming is None:
+                quiz_prefetch_total.inc(outcome="skipped")
+                return None, []
+
+            scope = BankScope(
+                subject_id=upcoming.subject_id,
+                subject_name=upcoming.subject.name,
+                chapter_id=upcoming.id,
+                subchapter_id=None,
+                grade_band=student.grade_band,
+                title=upcoming.title,
+                summary=upcoming.description or "",
+            )
+            if QUIZ_ADAPTIVE:
+                levels = [pick_level(db, student_id, upcoming.subject_id, upcoming.id)[0]]
+            else:
+                levels = QUIZ_LEVELS
+            levels = [lvl for lvl in levels if not has_unserved(db, scope, lvl, student_id)]
+
+        if not levels:
+            quiz_prefetch_total.inc(outcome="cached")
+        return scope, levels
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "enabled": QUIZ_PREFETCH_ENABLED and QUIZ_BANK_ENABLED,
+            "workers": self.workers,
+            "max_in_flight": QUIZ_PREFETCH_MAX_IN_FLIGHT,
+            "pending": pending,
+        }
+
+
+quiz_prefetcher = QuizPrefetcher()
@@ -5,7 +5,7 @@ Wraps the existing AI_Tutor with LangChain memory, RAG, and workflows.
 
 import os
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from langchain_core.messages import HumanMessage
 
@@ -45,9 +45,20 @@ class EnhancedAITutor:
         self.memory_manager = memory_manager
         self.llm = ChatEuriai(task_type="chat", complexity="medium")
 
+        self._build_rag()
+
+        logger.info("Enhanced AI Tutor ready!")
+
+    def _build_rag(self):
+        """Create the RAG pipeline and workflow over the base tutor's current indexes."""
         # Create enhanced RAG pipeline if retriever is available
         if self.base_tutor.retriever:
-            self.rag_pipeline = create_rag_pipeline(self.base_tutor.retriever, self.llm)
+            self.rag_pipeline = create_rag_pipeline(
+                self.base_tutor.retriever,
+                self.llm,
+                getattr(self.base_tutor, "partitions", None),
+                getattr(self.base_tutor, "lexical", None),
+            )
             logger.info("Enhanced RAG pipeline initialized")
         else:
             self.rag_pipeline = None
@@ -57,7 +68,10 @@ class EnhancedAITutor:
         self.workflow = create_tutoring_workflow(self.rag_pipeline)
         logger.info(f"LangGraph workflow initialized (available: {LANGGRAPH_AVAILABLE})")
 
-        logger.info("Enhanced AI Tutor ready!")
+    def reload_knowledge_base(self):
+        """Load a re-ingested index; cached retrieval results for the old one are dropped."""
+        self.base_tutor.load_knowledge_base()
+        self._build_rag()
 
     # === Enhanced Chat Methods ===
 
@@ -101,6 +115,33 @@ class EnhancedAITutor:
             "grade": grade,
         }
 
+    async def astream_chat(
+        self,
+        message: str,
+        student_id: str,
+        subject: str = "general",
+        grade: str = "6th",
+    ) -> AsyncIterator[Dict]:
+        """
+        Enhanced chat that streams the response as it is generated.
+
+        Args:
+            message: Student's message
+            student_id: Student identifier
+            subject: Subject context
+            grade: Grade level
+
+        Yields:
+            Event dicts from TutoringWorkflow.astream
+        """
+        async for event in self.workflow.astream(
+            message=message,
+            student_id=student_id,
+            subject=subject,
+            grade=grade,
+        ):
+            yield event
+
     def chat_simple(
         self,
         message: str,
@@ -3,50 +3,70 @@ Optimized EuriAI Framework for AI Tutor
 Uses only available models from EuriAI dashboard
 """
 
-from euriai import EuriaiClient
-import os
+import threading
 import time
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Iterator, Optional, List, Tuple
 from dotenv import load_dotenv
 
+from ..utils.euriai_backends import euriai_backend
+from ..utils.euriai_http import EuriaiHttpClient
+from ..utils.metrics import llm_first_token_seconds, llm_request_seconds, llm_requests_total, llm_tokens_total
+from ..utils.resilience import CallRejected, ResilienceManager, get_timeout, is_model_failure, resilience
+from ..utils.singleflight import SingleFlight
+from .model_router import ModelRouter
+from .response_cache import LLMResponseCache
+
 load_dotenv()
 
 
+class StreamInterrupted(Exception):
+    """The upstream stream failed after some text was already yielded; the response is incomplete."""
+
+
 class EuriaiModelFramework:
     """Intelligent model selection and routing for educational AI"""
 
-    def __init__(self):
-        self.client = EuriaiClient(
-            api_key=os.environ.get("EURIAI_API_KEY"),
-            model="gpt-4.1-nano"  # Default
-        )
+    def __init__(self,
+                 http_client: Optional[EuriaiHttpClient] = None,
+                 response_cache: Optional[LLMResponseCache] = None,
+                 resilience_manager: Optional[ResilienceManager] = None,
+                 model_router: Optional[ModelRouter] = None):
+        # Shared, pooled client; the model is chosen per call, never stored on it
+        # Live HTTP by default; EURIAI_BACKEND can swap in the offline stub or a cassette
+        self.http = http_client or euriai_backend
+        # Opt-in cache for deterministic tasks (see LLM_CACHE_* in .env.example)
+        self.cache = response_cache or LLMResponseCache.from_env()
+        # Collapses concurrent identical requests into one upstream call
+        self.inflight = SingleFlight("llm")
+        # Per-model timeouts, rate limiting and circuit breakers
+        self.resilience = resilience_manager or resilience
+        # Routing table plus rolling latency/error statistics per model
+        self.router = model_router or ModelRouter.from_env()
         self.usage_stats = {}
+        self._stats_lock = threading.Lock()
 
     def select_optimal_model(self,
                              task_type: str,
                              complexity: str = "medium",
                              speed_priority: str = "balanced",
                              subject: str = "general") -> str:
-        """Selects the best model based on the task, complexity, and subject."""
-        selection_matrix = {
-            "chat": {"simple": "gemini-2.5-flash", "medium": "gpt-4.1-nano", "complex": "gpt-4.1-mini"},
-            "math": {"simple": "gpt-4.1-mini", "medium": "deepseek-r1-distill-llama-70b", "complex": "gemini-2.5-pro"},
-            "science": {"simple": "gemini-2.5-flash", "medium": "gpt-4.1-mini", "complex": "gemini-2.5-pro"},
-            "creative": {"simple": "gpt-4.1-nano", "medium": "gpt-4.1-mini", "complex": "gemini-2.5-pro"},
-            "reasoning": {"simple": "gpt-4.1-mini", "medium": "llama-4-scout-17b-16e-instruct",
-                          "complex": "gemini-2.5-pro"},
-        }
+        """Selects the best model based on the task, complexity, subject and live model health."""
+        return self.get_fallback_chain(task_type, complexity, speed_priority, subject)[0]
 
-        model = selection_matrix.get(task_type, {}).get(complexity, "gpt-4.1-nano")
-
-        # Subject-specific overrides for high-complexity tasks
-        if complexity == "complex":
-            if subject == "math":
-                model = "deepseek-r1-distill-llama-70b"
-            elif subject == "science":
-                model = "gemini-2.5-pro"
+    def get_fallback_chain(self,
+                           task_type: str,
+                           complexity: str = "medium",
+                           speed_priority: str = "balanced",
+                           subject: str = "general") -> List[str]:
+        """
+        Ordered models to try for a request (see ModelRouter.route).
 
-        return model
+        Healthy models that meet the quality floor come first, then models
+        breaching their SLO, and models with an open circuit last.
+        """
+        return self.router.route(
+            task_type, complexity, speed_priority, subject, is_available=self.resilience.is_available
+        )
 
     def _adapt_prompt_for_chat(self, prompt: str, grade: str) -> str:
         """Applies a kid-friendly persona ONLY for conversational chat."""
@@ -65,6 +85,181 @@ class EuriaiModelFramework:
         Student's question: "{prompt}"
         """
 
+    def _prepare_request(self,
+                         prompt: str,
+                         task_type: str,
+                         complexity: str,
+                         speed_priority: str,
+                         subject: str,
+                         grade: str) -> Tuple[List[str], str]:
+        """Resolves the model fallback chain and final prompt for a request."""
+        chain = self.get_fallback_chain(task_type, complexity, speed_priority, subject)
+
+        # Adapt prompt only for chat tasks
+        final_prompt = self._adapt_prompt_for_chat(prompt, grade) if task_type == "chat" else prompt
+
+        return chain, final_prompt
+
+    def _build_result(self, selected_model: str, task_type: str, response: Dict, start_time: float) -> Dict:
+        """Parses a raw completion and records usage."""
+        response_time = time.time() - start_time
+
+        parsed_content = self._parse_completion_response(response)
+        self._track_usage(selected_model, task_type, response_time, len(parsed_content), usage=response.get("usage"))
+
+        return {
+            "response": parsed_content,
+            "model_used": selected_model,
+            "response_time": response_time,
+            "usage": response.get("usage"),
+            "success": True
+        }
+
+    def _record_attempt(self,
+                        model: str,
+                        task_type: str,
+                        start_time: float,
+                        error: Optional[Exception] = None,
+                        first_token_time: Optional[float] = None):
+        """Feeds one upstream attempt into the breaker/limiter, the router and the latency metrics."""
+        latency = time.time() - start_time
+        self.resilience.record(model, latency, error)
+        # For streams the user-perceived latency (and so the SLO) is time to first token
+        self.router.record(model, task_type, first_token_time or latency, not is_model_failure(error))
+        llm_request_seconds.observe(latency, model=model, task_type=task_type)
+        llm_requests_total.inc(model=model, task_type=task_type, outcome="error" if error else "success")
+
+    @staticmethod
+    def _record_rejection(model: str, task_type: str):
+        llm_requests_total.inc(model=model, task_type=task_type, outcome="rejected")
+
+    def _complete(self,
+                  chain: List[str],
+                  task_type: str,
+                  prompt: str,
+                  temperature: float,
+                  max_tokens: int) -> Dict:
+        """Calls the first admitted model in the chain that succeeds; raises the last error."""
+        last_error: Exception = CallRejected("No model available")
+        for model in chain:
+            try:
+                self.resilience.admit(model)
+            except CallRejected as e:
+                self._record_rejection(model, task_type)
+                last_error = e
+                continue
+
+            start_time = time.time()
+            try:
+                response = self.http.chat_completion(
+                    model=model,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=get_timeout(model)
+                )
+            except Exception as e:
+                self._record_attempt(model, task_type, start_time, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Caller was cancelled mid-call: free the slot, not a model failure
+                self.resilience.abandon(model)
+                raise
+
+            self._record_attempt(model, task_type, start_time)
+            return self._build_result(model, task_type, response, start_time)
+
+        raise last_error
+
+    async def _acomplete(self,
+                         chain: List[str],
+                         task_type: str,
+                         prompt: str,
+                         temperature: float,
+                         max_tokens: int) -> Dict:
+        """Async variant of _complete."""
+        last_error: Exception = CallRejected("No model available")
+        for model in chain:
+            try:
+                await self.resilience.aadmit(model)
+            except CallRejected as e:
+                self._record_rejection(model, task_type)
+                last_error = e
+                continue
+
+            start_time = time.time()
+            try:
+                response = await self.http.achat_completion(
+                    model=model,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=get_timeout(model)
+                )
+            except Exception as e:
+                self._record_attempt(model, task_type, start_time, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Caller was cancelled mid-call: free the slot, not a model failure
+                self.resilience.abandon(model)
+                raise
+
+            self._record_attempt(model, task_type, start_time)
+            return self._build_result(model, task_type, response, start_time)
+
+        raise last_error
+
+    def _cache_key(self,
+                   task: str,
+                   model: str,
+                   prompt: str,
+                   temperature: float,
+                   max_tokens: int) -> Optional[str]:
+        """Returns the cache key if caching is enabled for this task, else None."""
+        if not self.cache.is_enabled_for(task):
+            return None
+        return self.cache.make_key(model, prompt, temperature, max_tokens)
+
+    def _flight_key(self,
+                    cache_key: Optional[str],
+                    model: str,
+                    prompt: str,
+                    temperature: float,
+                    max_tokens: int) -> Optional[str]:
+        """
+        Key for coalescing concurrent identical calls, or None to run the call on its own.
+        Only calls whose answer may be shared are coalesced: cacheable ones and temperature 0;
+        sampled generations (e.g. quizzes) must differ between students.
+        """
+        if cache_key is not None:
+            return cache_key
+        if temperature == 0:
+            return self.cache.make_key(model, prompt, temperature, max_tokens)
+        return None
+
+    def _cached_result(self, cache_key: Optional[str]) -> Optional[Dict]:
+        """Returns a cached result marked as such, or None on miss."""
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        cached.update({"response_time": 0, "cached": True})
+        return cached
+
+    def _store_result(self, cache_key: Optional[str], result: Dict, model: str):
+        """
+        Caches successful results of the model the key was built for; answers from a
+        fallback model, fallback responses and parse errors are never cached.
+        """
+        if cache_key is None or not result.get("success") or result.get("model_used") != model:
+            return
+        if result.get("response", "").startswith("Error"):
+            return
+        self.cache.set(cache_key, result)
+
     def generate_response(self,
                           prompt: str,
                           task_type: str = "chat",
@@ -73,39 +268,194 @@ class EuriaiModelFramework:
                           subject: str = "general",
                           grade: str = "6th",
                           temperature: float = 0.7,
-                          max_tokens: int = 4096) -> Dict:
-        """Generates a response with intelligent model selection and appropriate prompting."""
+                          max_tokens: int = 4096,
+                          cache_task: Optional[str] = None) -> Dict:
+        """
+        Generates a response with intelligent model selection and appropriate prompting.
 
-        selected_model = self.select_optimal_model(task_type, complexity, speed_priority, subject)
+        cache_task labels the call for the response cache (defaults to task_type),
+        so e.g. intent detection can be cached while other chat calls are not.
+        """
 
-        # Adapt prompt only for chat tasks
-        final_prompt = self._adapt_prompt_for_chat(prompt, grade) if task_type == "chat" else prompt
+        chain, final_prompt = self._prepare_request(
+            prompt, task_type, complexity, speed_priority, subject, grade
+        )
 
-        start_time = time.time()
+        cache_key = self._cache_key(cache_task or task_type, chain[0], final_prompt, temperature, max_tokens)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            return cached
 
-        try:
-            self.client.model = selected_model
-            response = self.client.generate_completion(
-                prompt=final_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+        def call_upstream() -> Dict:
+            try:
+                result = self._complete(chain, task_type, final_prompt, temperature, max_tokens)
+                self._store_result(cache_key, result, chain[0])
+                return result
+
+            except Exception as e:
+                return self._fallback_response(str(e))
+
+        flight_key = self._flight_key(cache_key, chain[0], final_prompt, temperature, max_tokens)
+        if flight_key is None:
+            return call_upstream()
+        return dict(self.inflight.do(flight_key, call_upstream))
+
+    async def agenerate_response(self,
+                                 prompt: str,
+                                 task_type: str = "chat",
+                                 complexity: str = "medium",
+                                 speed_priority: str = "balanced",
+                                 subject: str = "general",
+                                 grade: str = "6th",
+                                 temperature: float = 0.7,
+                                 max_tokens: int = 4096,
+                                 cache_task: Optional[str] = None) -> Dict:
+        """Async variant of generate_response; many calls can be in flight from one worker."""
+
+        chain, final_prompt = self._prepare_request(
+            prompt, task_type, complexity, speed_priority, subject, grade
+        )
 
-            end_time = time.time()
-            response_time = end_time - start_time
+        cache_key = self._cache_key(cache_task or task_type, chain[0], final_prompt, temperature, max_tokens)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            return cached
+
+        async def call_upstream() -> Dict:
+            try:
+                result = await self._acomplete(chain, task_type, final_prompt, temperature, max_tokens)
+                self._store_result(cache_key, result, chain[0])
+                return result
+
+            except Exception as e:
+                return self._fallback_response(str(e))
+
+        flight_key = self._flight_key(cache_key, chain[0], final_prompt, temperature, max_tokens)
+        if flight_key is None:
+            return await call_upstream()
+        return dict(await self.inflight.ado(flight_key, call_upstream))
+
+    def stream_response(self,
+                        prompt: str,
+                        task_type: str = "chat",
+                        complexity: str = "medium",
+                        speed_priority: str = "balanced",
+                        subject: str = "general",
+                        grade: str = "6th",
+                        temperature: float = 0.7,
+                        max_tokens: int = 4096) -> Iterator[str]:
+        """
+        Streams a response as text chunks; usage is recorded once the stream ends.
+
+        Models in the fallback chain are tried in turn until one produces a first token.
+        Raises StreamInterrupted if the stream fails after that.
+        """
+
+        chain, final_prompt = self._prepare_request(
+            prompt, task_type, complexity, speed_priority, subject, grade
+        )
 
-            parsed_content = self._parse_completion_response(response)
-            self._track_usage(selected_model, response_time, len(parsed_content))
+        last_error: Exception = CallRejected("No model available")
+        for model in chain:
+            try:
+                self.resilience.admit(model)
+            except CallRejected as e:
+                self._record_rejection(model, task_type)
+                last_error = e
+                continue
 
-            return {
-                "response": parsed_content,
-                "model_used": selected_model,
-                "response_time": response_time,
-                "success": True
-            }
+            start_time = time.time()
+            first_token_time = None
+            length = 0
 
-        except Exception as e:
-            return self._fallback_response(str(e))
+            try:
+                for delta in self.http.stream_chat_completion(
+                    model=model,
+                    prompt=final_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=get_timeout(model)
+                ):
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    length += len(delta)
+                    yield delta
+            except Exception as e:
+                self._record_attempt(model, task_type, start_time, e)
+                last_error = e
+                if first_token_time is None:
+                    continue
+                # Text already went out, so another model can't take over; callers must not keep it
+                raise StreamInterrupted(f"{model} stream failed after {length} characters: {e}") from e
+            except BaseException:
+                # Consumer stopped the stream (disconnect/cancel): free the slot, not a model failure
+                self.resilience.abandon(model)
+                raise
+
+            self._record_attempt(model, task_type, start_time, first_token_time=first_token_time)
+            self._track_usage(model, task_type, time.time() - start_time, length, first_token_time=first_token_time)
+            return
+
+        # Only reached if no model produced any output
+        yield self._fallback_response(str(last_error))["response"]
+
+    async def astream_response(self,
+                               prompt: str,
+                               task_type: str = "chat",
+                               complexity: str = "medium",
+                               speed_priority: str = "balanced",
+                               subject: str = "general",
+                               grade: str = "6th",
+                               temperature: float = 0.7,
+                               max_tokens: int = 4096) -> AsyncIterator[str]:
+        """Async variant of stream_response."""
+
+        chain, final_prompt = self._prepare_request(
+            prompt, task_type, complexity, speed_priority, subject, grade
+        )
+
+        last_error: Exception = CallRejected("No model available")
+        for model in chain:
+            try:
+                await self.resilience.aadmit(model)
+            except CallRejected as e:
+                self._record_rejection(model, task_type)
+                last_error = e
+                continue
+
+            start_time = time.time()
+            first_token_time = None
+            length = 0
+
+            try:
+                async for delta in self.http.astream_chat_completion(
+                    model=model,
+                    prompt=final_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=get_timeout(model)
+                ):
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    length += len(delta)
+                    yield delta
+            except Exception as e:
+                self._record_attempt(model, task_type, start_time, e)
+                last_error = e
+                if first_token_time is None:
+                    continue
+                # Text already went out, so another model can't take over; callers must not keep it
+                raise StreamInterrupted(f"{model} stream failed after {length} characters: {e}") from e
+            except BaseException:
+                # Consumer stopped the stream (disconnect/cancel): free the slot, not a model failure
+                self.resilience.abandon(model)
+                raise
+
+            self._record_attempt(model, task_type, start_time, first_token_time=first_token_time)
+            self._track_usage(model, task_type, time.time() - start_time, length, first_token_time=first_token_time)
+            return
+
+        yield self._fallback_response(str(last_error))["response"]
 
     def _fallback_response(self, error: str) -> Dict:
         """Provides a generic fallback response."""
@@ -135,15 +485,60 @@ class EuriaiModelFramework:
         except (KeyError, IndexError, TypeError) as e:
             return f"Error parsing response: {str(response)} - Exception: {e}"
 
-    def _track_usage(self, model: str, response_time: float, response_length: int):
-        """Tracks model usage statistics."""
-        if model not in self.usage_stats:
-            self.usage_stats[model] = {"calls": 0, "total_time": 0, "total_tokens": 0}
+    def _track_usage(self,
+                     model: str,
+                     task_type: str,
+                     response_time: float,
+                     response_length: int,
+                     usage: Optional[Dict] = None,
+                     first_token_time: Optional[float] = None):
+        """
+        Tracks model usage statistics.
+
+        Token counts come from the provider's `usage` block when present
+        (streamed calls do not report one); response_length is in characters.
+        """
+        usage = usage if isinstance(usage, dict) else {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+
+        with self._stats_lock:
+            if model not in self.usage_stats:
+                self.usage_stats[model] = {
+                    "calls": 0, "total_time": 0, "total_chars": 0,
+                    "prompt_tokens": 0, "completion_tokens": 0,
+                    "streamed_calls": 0, "total_first_token_time": 0,
+                }
 
-        stats = self.usage_stats[model]
-        stats["calls"] += 1
-        stats["total_time"] += response_time
-        stats["total_tokens"] += response_length
+            stats = self.usage_stats[model]
+            stats["calls"] += 1
+            stats["total_time"] += response_time
+            stats["total_chars"] += response_length
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            if first_token_time is not None:
+                stats["streamed_calls"] += 1
+                stats["total_first_token_time"] += first_token_time
+
+        if prompt_tokens:
+            llm_tokens_total.inc(prompt_tokens, model=model, task_type=task_type, kind="prompt")
+        if completion_tokens:
+            llm_tokens_total.inc(completion_tokens, model=model, task_type=task_type, kind="completion")
+        if first_token_time is not None:
+            llm_first_token_seconds.observe(first_token_time, model=model, task_type=task_type)
+
+    def get_stats(self) -> Dict:
+        """Returns per-model usage statistics alongside cache, coalescing and resilience state."""
+        with self._stats_lock:
+            usage = {model: dict(stats) for model, stats in self.usage_stats.items()}
+        return {
+            "usage": usage,
+            "cache": self.cache.stats(),
+            "singleflight": self.inflight.stats(),
+            "resilience": self.resilience.stats(),
+            "latency": llm_request_seconds.snapshot(),
+            "routing": self.router.stats(),
+        }
 
 
 # Global instance for easy access
@@ -0,0 +1,141 @@
+"""
+Hybrid Retriever for AI Tutor.
+Fuses BM25 (lexical_index) and vector search results with reciprocal rank
+fusion, and answers from BM25 alone when the embeddings API is down or slow.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ..utils.metrics import retrieval_mode_total
+from ..utils.resilience import get_timeout, resilience
+from .lexical_index import BM25_FILE, BM25Index
+from .partitioned_retriever import grade_numbers, subject_key
+
+RAG_HYBRID_ENABLED = os.environ.get("RAG_HYBRID_ENABLED", "true").lower() == "true"
+# Rank constant of reciprocal rank fusion: score = sum(1 / (RAG_RRF_K + rank))
+RAG_RRF_K = int(os.environ.get("RAG_RRF_K", "60"))
+# Vector search (query embedding + FAISS) slower than this is abandoned and BM25 results
+# are used alone; unset means the embedding model's own request timeout
+RAG_VECTOR_TIMEOUT_SECONDS = float(os.environ["RAG_VECTOR_TIMEOUT_SECONDS"]) if os.environ.get("RAG_VECTOR_TIMEOUT_SECONDS") else None
+
+# Vector searches running at once, abandoned (timed out) ones included; beyond this,
+# retrievals use BM25 alone instead of queueing behind searches that are still running
+RAG_VECTOR_MAX_IN_FLIGHT = int(os.environ.get("RAG_VECTOR_MAX_IN_FLIGHT", "8"))
+
+# Vector searches run here so a slow embeddings call can be timed out. A timed-out search
+# cannot be cancelled, so it keeps its slot until it returns; with one slot per thread
+# nothing ever waits in the executor's queue
+_vector_executor = ThreadPoolExecutor(max_workers=RAG_VECTOR_MAX_IN_FLIGHT, thread_name_prefix="rag-vector")
+_vector_slots = threading.BoundedSemaphore(RAG_VECTOR_MAX_IN_FLIGHT)
+
+
+def _doc_key(doc: Document):
+    return doc.id or hash(doc.page_content[:200])
+
+
+def rrf_fuse(ranked_lists: List[List[Document]], rrf_k: int = RAG_RRF_K) -> List[Document]:
+    """Merge ranked lists by reciprocal rank fusion; each document appears once."""
+    scores: Dict = {}
+    docs: Dict = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked, 1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridSearcher:
+    """
+    BM25 + vector retrieval over the global FAISS index's chunks.
+
+    Features:
+    - BM25 runs locally on the index ingest.py saves next to the FAISS files
+    - Vector results (global or partitioned) and BM25 results are fused with RRF
+    - BM25 only, with no embeddings call, while the embedding model's circuit
+      breaker is open; a vector search slower than vector_timeout() is
+      abandoned for the BM25 results (partition loading is not part of it;
+      callers preload partitions first)
+    - Abandoned searches hold their thread until they return; with all
+      RAG_VECTOR_MAX_IN_FLIGHT busy, retrievals skip the vector path
+    - Modes are counted in tutor_retrieval_mode_total and returned with the
+      results, so callers can tell degraded (BM25-only) results apart
+    """
+
+    def __init__(self, bm25: BM25Index, docstore, embedding_model: Optional[str] = None):
+        self.bm25 = bm25
+        self.docstore = docstore
+        self.embedding_model = embedding_model
+
+    @classmethod
+    def load(cls, vector_store_path: str, vectorstore, embeddings) -> Optional["HybridSearcher"]:
+        """Searcher for a saved FAISS index, or None if disabled or ingest has not written a BM25 index."""
+        path = os.path.join(vector_store_path, BM25_FILE)
+        if not RAG_HYBRID_ENABLED or not os.path.exists(path):
+            return None
+        return cls(BM25Index.load(path), vectorstore.docstore, getattr(embeddings, "model", None))
+
+    def lexical(self, query: str, k: int, subject: Optional[str] = None, grade: Optional[str] = None) -> List[Document]:
+        """BM25 top-k, restricted to the grade/subject when any hit matches them."""
+        docs = [self.docstore.search(doc_id) for doc_id, _ in self.bm25.search(query, k * 4)]
+        docs = [doc for doc in docs if isinstance(doc, Document)]
+
+        grades = grade_numbers(grade)
+        requested = subject_key(subject)
+
+        def matches(doc: Document) -> bool:
+            doc_grades = grade_numbers(doc.metadata.get("grade"))
+            doc_subject = subject_key(doc.metadata.get("subject"))
+            if grades and doc_grades and not grades & doc_grades:
+                return False
+            return not (requested and doc_subject) or requested in doc_subject or doc_subject in requested
+
+        filtered = [doc for doc in docs if matches(doc)]
+        return (filtered or docs)[:k]
+
+    def vector_timeout(self) -> float:
+        """RAG_VECTOR_TIMEOUT_SECONDS, defaulting to the embedding model's request timeout."""
+        if RAG_VECTOR_TIMEOUT_SECONDS is not None:
+            return RAG_VECTOR_TIMEOUT_SECONDS
+        return get_timeout(self.embedding_model) if self.embedding_model else 10.0
+
+    def vector_available(self) -> bool:
+        return self.embedding_model is None or resilience.is_available(self.embedding_model)
+
+    def search(self, queries: List[str], vector_search: Callable[[], List[List[Document]]], k: int,
+               subject: Optional[str] = None, grade: Optional[str] = None) -> Tuple[List[Document], str]:
+        """
+        Fused results for the queries and the mode that produced them
+        ("hybrid", or "lexical", "lexical_busy", "lexical_timeout", "lexical_error"
+        without vectors).
+
+        vector_search returns one ranked list per query; it is only called when
+        the embedding model is available. No vector hits at all counts as an error.
+        """
+        lexical_lists = [self.lexical(query, k, subject, grade) for query in queries]
+
+        vector_lists: List[List[Document]] = []
+        if not self.vector_available():
+            mode = "lexical"
+        elif not _vector_slots.acquire(blocking=False):
+            mode = "lexical_busy"
+        else:
+            future = _vector_executor.submit(vector_search)
+            future.add_done_callback(lambda _: _vector_slots.release())
+            try:
+                vector_lists = future.result(timeout=self.vector_timeout())
+                # Vector search callers swallow embedding failures into empty lists; a
+                # non-empty index always returns neighbours, so no hits means no vectors
+                mode = "hybrid" if any(vector_lists) else "lexical_error"
+            except TimeoutError:
+                mode = "lexical_timeout"
+            except Exception:
+                mode = "lexical_error"
+
+        retrieval_mode_total.inc(mode=mode)
+        return rrf_fuse(vector_lists + lexical_lists), mode
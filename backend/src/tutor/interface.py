@@ -4,16 +4,29 @@ Enhanced for grade-wise question type control.
 """
 
 import os
+import asyncio
 import json
 import logging
 import uuid
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from langchain_community.vectorstores import FAISS
 from .framework import euriai_framework
+from .hybrid_retriever import HybridSearcher
+from .json_stream import JsonArrayStreamParser
+from .partitioned_retriever import PartitionedRetriever
+from .retrieval_cache import index_version, retrieval_cache
+from .quiz_validation import salvage_questions, validate_questions
 from .registry import create_agent, AGENT_CONFIGS
 from src.utils.euriai_embeddings import EuriaiEmbeddings
+from src.utils.metrics import (
+    quiz_generations_total,
+    quiz_questions_total,
+    quiz_repair_requests_total,
+    quiz_repair_tokens_total,
+)
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_ENV_PATH = os.path.join(CURRENT_DIR, "..", "..", "..", ".env")
@@ -26,6 +39,20 @@ else:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+QUIZ_LEVELS = ["basic", "medium", "hard"]
+
+# Upper bound on quiz generations running at once (three per /generate_quiz request)
+QUIZ_GENERATION_WORKERS = int(os.environ.get("QUIZ_GENERATION_WORKERS", "12"))
+
+# Ask for all difficulty levels in one structured response by default
+QUIZ_SINGLE_CALL = os.environ.get("QUIZ_SINGLE_CALL", "false").lower() == "true"
+
+# Follow-up requests for missing/invalid questions before falling back to a placeholder
+QUIZ_REPAIR_ATTEMPTS = int(os.environ.get("QUIZ_REPAIR_ATTEMPTS", "2"))
+
+# Leave explanations out of quiz generation; they are generated on demand (generate_explanations)
+QUIZ_LAZY_EXPLANATIONS = os.environ.get("QUIZ_LAZY_EXPLANATIONS", "false").lower() == "true"
+
 class AI_Tutor:
     """Main interface for AI Tutor with grade-wise quiz type control."""
 
@@ -39,16 +66,36 @@ class AI_Tutor:
 
 
         self.api_key = os.environ.get("EURIAI_API_KEY")
+        self.vector_store_path = vector_store_path
         self.retriever = None
+        self.partitions = None
+        self.lexical = None
         self.model_framework = euriai_framework
         self.agents = {}
+        # Shared pool bounding concurrent quiz generations across requests
+        self.quiz_executor = ThreadPoolExecutor(
+            max_workers=QUIZ_GENERATION_WORKERS, thread_name_prefix="quiz-gen"
+        )
 
         print(f"🔑 EuriAI API Key found: {'✅ Yes' if self.api_key else '❌ No'}")
-        print(f"📂 Checking FAISS path: {vector_store_path}")
-        print(f"📂 FAISS Path exists: {'✅ Yes' if os.path.exists(vector_store_path) else '❌ No'}")
+        self.load_knowledge_base()
+
+        print("🎯 AI Tutor initialization complete.\n")
+
+    def load_knowledge_base(self):
+        """
+        (Re)load the FAISS index, its partitions and BM25 index from vector_store_path
+        and rebuild the subject agents; call again after re-running ingest.py.
+        """
+        print(f"📂 Checking FAISS path: {self.vector_store_path}")
+        print(f"📂 FAISS Path exists: {'✅ Yes' if os.path.exists(self.vector_store_path) else '❌ No'}")
+
+        # Offline backends (stub/replay) can embed queries without a key
+        has_credentials = self.api_key or not getattr(self.model_framework.http, "requires_api_key", True)
 
         # Load retriever if available
-        if self.api_key and os.path.exists(vector_store_path):
+        retriever, partitions, lexical = None, None, None
+        if has_credentials and os.path.exists(self.vector_store_path):
             allow_dangerous = os.environ.get("FAISS_ALLOW_DANGEROUS_DESERIALIZATION", "false").lower() == "true"
             if allow_dangerous:
                 print("⚠️ FAISS dangerous deserialization ENABLED via FAISS_ALLOW_DANGEROUS_DESERIALIZATION")
@@ -56,22 +103,38 @@ class AI_Tutor:
                 print("🧠 Attempting to load FAISS index...")
                 embeddings = EuriaiEmbeddings(model="gemini-embedding-001")
                 vector_store = FAISS.load_local(
-                    vector_store_path,
+                    self.vector_store_path,
                     embeddings,
                     allow_dangerous_deserialization=allow_dangerous
                 )
-                self.retriever = vector_store.as_retriever(search_kwargs={"k": 5})
+                retriever = vector_store.as_retriever(search_kwargs={"k": 5})
                 print("✅ FAISS retriever loaded successfully!")
+
+                # Per-(grade, subject) indexes written alongside by ingest.py
+                partitions = PartitionedRetriever.load(
+                    os.path.join(os.path.dirname(self.vector_store_path), "partitions"),
+                    embeddings,
+                    allow_dangerous_deserialization=allow_dangerous
+                )
+                if partitions:
+                    print(f"✅ {len(partitions.partitions)} grade/subject partitions found")
+
+                # BM25 index written next to the FAISS files by ingest.py
+                lexical = HybridSearcher.load(self.vector_store_path, vector_store, embeddings)
+                if lexical:
+                    print(f"✅ BM25 index loaded ({len(lexical.bm25)} chunks); hybrid retrieval enabled")
             except Exception as e:
                 print(f"❌ Error loading FAISS retriever: {e}")
         else:
             print("⚠️ Skipping FAISS load: Missing API key or invalid path.")
 
+        self.retriever, self.partitions, self.lexical = retriever, partitions, lexical
+        # Cached retrieval results refer to chunks of the previously loaded index
+        retrieval_cache.set_version(index_version(self.vector_store_path) if retriever else None)
+
         # Initialize subject agents
         for agent_type in AGENT_CONFIGS.keys():
-            self.agents[agent_type] = create_agent(agent_type, self.retriever)
-
-        print("🎯 AI Tutor initialization complete.\n")
+            self.agents[agent_type] = create_agent(agent_type, self.retriever, self.partitions, self.lexical)
 
     # ----------------------------------------------------------
     # Agent selection
@@ -136,50 +199,65 @@ class AI_Tutor:
     # ----------------------------------------------------------
     # Quiz generation
     # ----------------------------------------------------------
-    def generate_quiz(
-            self,
-            grade_band: str,
-            subject: str,
-            chapter_id: str,
-            chapter_title: str,
-            chapter_summary: str,
-            num_questions: int = 5,
-            difficulty: str = "basic"
-    ) -> Dict:
-        """Generates quiz dynamically with grade-wise logic, difficulty variation, and pronunciation support."""
-
-        allowed_types = self._get_allowed_question_types(grade_band)
-
-        # Difficulty-based tone and depth
+    def _difficulty_tone(self, difficulty: str) -> str:
+        """Difficulty-based tone and depth."""
         if difficulty == "basic":
-            tone = (
+            return (
                 "Use very simple words and direct questions. Focus on recognition, "
                 "basic facts, and one-step thinking."
             )
         elif difficulty == "medium":
-            tone = (
+            return (
                 "Ask questions that need short reasoning or 2-step thinking. "
                 "Include small word problems or comparisons."
             )
         elif difficulty == "hard":
-            tone = (
+            return (
                 "Ask higher-order thinking questions requiring analysis, application, "
                 "or inference. Avoid repetition of basic questions."
             )
-        else:
-            tone = "Keep questions age-appropriate."
+        return "Keep questions age-appropriate."
 
-        # Special instructions for younger grades
+    def _grade_band_tone(self, grade_band: str) -> str:
+        """Special instructions for younger grades."""
         if grade_band in ["1-2", "1-4"]:
-            tone += (
+            return (
                 " Use pictures, emojis, and simple sentences. "
                 "If the question type is 'pronunciation', include a fun phonetic hint "
                 "and a sample audio link (use a placeholder URL like 'https://example.com/audio/word.mp3'). "
                 "Keep everything friendly and child-focused 🎵."
             )
+        return ""
+
+    def _question_structure(self, difficulty: str) -> str:
+        """Example question object for quiz prompts; no explanation with QUIZ_LAZY_EXPLANATIONS."""
+        explanation = "" if QUIZ_LAZY_EXPLANATIONS else '\n            "explanation": "Why this is correct.",'
+        return f"""{{
+            "id": "Q1",
+            "type": "question_type_here",
+            "question_text": "The actual question?",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "correct_option_index": 0,{explanation}
+            "difficulty": "{difficulty}",
+            "interactive_element": "dropdown"
+        }}"""
+
+    def _build_quiz_prompt(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int,
+            difficulty: str
+    ) -> str:
+        """Builds the quiz prompt with grade-wise question types and difficulty tone."""
+
+        allowed_types = self._get_allowed_question_types(grade_band)
+        tone = self._difficulty_tone(difficulty) + self._grade_band_tone(grade_band)
 
         # Main generation prompt
-        prompt = f"""
+        return f"""
         You are an expert {subject} teacher.
         Generate exactly {num_questions} quiz questions for grade band {grade_band}.
         Chapter: "{chapter_title}"
@@ -194,41 +272,69 @@ class AI_Tutor:
         - The output should start with '[' and end with ']'.
         
         Structure for each question object:
-        {{
-            "id": "Q1",
-            "type": "question_type_here",
-            "question_text": "The actual question?",
-            "options": ["Option A", "Option B", "Option C", "Option D"],
-            "correct_option_index": 0,
-            "explanation": "Why this is correct.",
-            "difficulty": "{difficulty}",
-            "interactive_element": "dropdown"
-        }}
+        {self._question_structure(difficulty)}
 
         Ensure all keys are present. For 'fill_in_the_blank', provide options too.
         """
 
-        response_data = self.model_framework.generate_response(
-            prompt=prompt,
-            task_type="quiz",
-            complexity=difficulty,
-            subject=subject,
-            grade=grade_band
+    def _build_combined_quiz_prompt(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int,
+            levels: List[str]
+    ) -> str:
+        """Builds one prompt asking for every difficulty level as a single JSON object."""
+
+        allowed_types = self._get_allowed_question_types(grade_band)
+        level_guidance = "\n".join(
+            f"        - {lvl}: {self._difficulty_tone(lvl)}" for lvl in levels
         )
+        example = ", ".join(f'"{lvl}": [ ... ]' for lvl in levels)
 
-        questions = self._try_parse_json(response_data.get("response", ""))
+        return f"""
+        You are an expert {subject} teacher.
+        Generate exactly {num_questions} quiz questions for each of these difficulty levels: {', '.join(levels)}.
+        Grade band: {grade_band}
+        Chapter: "{chapter_title}"
+        Summary: {chapter_summary}
+        Allowed question types: {', '.join(allowed_types)}.
+        Difficulty guidance:
+{level_guidance}
+        Questions must not repeat across levels.{self._grade_band_tone(grade_band)}
 
-        # Retry if empty
-        if not questions:
-            retry_prompt = f"{prompt}\n\nMake sure to output valid JSON only."
-            retry_response = self.model_framework.generate_response(
-                prompt=retry_prompt,
-                task_type="quiz",
-                complexity=difficulty,
-                subject=subject,
-                grade=grade_band
-            )
-            questions = self._try_parse_json(retry_response.get("response", ""))
+        ✅ CRITICAL OUTPUT INSTRUCTIONS:
+        - You MUST output a SINGLE valid JSON object: {{{example}}}
+        - Each value is a JSON list of question objects for that difficulty.
+        - Do NOT include any text, markdown formatting (like ```json), or explanations outside the JSON object.
+        
+        Structure for each question object:
+        {self._question_structure("basic | medium | hard")}
+
+        Ensure all keys are present. For 'fill_in_the_blank', provide options too.
+        """
+
+    def _finalize_question(self, question: Dict, index: int, difficulty: str) -> Dict:
+        """Ensures an ID, difficulty and explanation (empty until generated), and adds pronunciation defaults."""
+        question.setdefault("id", f"{difficulty[:1]}-{index + 1}")
+        question.setdefault("difficulty", difficulty)
+        question.setdefault("explanation", "")
+        if question.get("type") == "pronunciation":
+            question.setdefault("phonetic_hint", "example-hint")
+            question.setdefault("audio_url", "https://example.com/audio/sample.mp3")
+        return question
+
+    def _finalize_quiz(
+            self,
+            questions: List[Dict],
+            grade_band: str,
+            subject: str,
+            chapter_id: str,
+            difficulty: str
+    ) -> Dict:
+        """Applies fallback, IDs and pronunciation defaults, and wraps the quiz payload."""
 
         # Final fallback
         if not questions:
@@ -243,13 +349,8 @@ class AI_Tutor:
                 "difficulty": difficulty,
             }]
 
-        # Ensure IDs and add pronunciation defaults
         for i, q in enumerate(questions):
-            q.setdefault("id", f"{difficulty[:1]}-{i + 1}")
-            q.setdefault("difficulty", difficulty)
-            if q.get("type") == "pronunciation":
-                q.setdefault("phonetic_hint", "example-hint")
-                q.setdefault("audio_url", "https://example.com/audio/sample.mp3")
+            self._finalize_question(q, i, difficulty)
 
         return {
             "quiz_id": str(uuid.uuid4()),
@@ -259,6 +360,76 @@ class AI_Tutor:
             "questions": questions
         }
 
+    def generate_quiz(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int = 5,
+            difficulty: str = "basic"
+    ) -> Dict:
+        """Generates quiz dynamically with grade-wise logic, difficulty variation, and pronunciation support."""
+
+        prompt = self._build_quiz_prompt(
+            grade_band, subject, chapter_title, chapter_summary, num_questions, difficulty
+        )
+
+        response_data = self.model_framework.generate_response(
+            prompt=prompt,
+            task_type="quiz",
+            complexity=difficulty,
+            subject=subject,
+            grade=grade_band
+        )
+
+        questions, problems = self._validated_questions(response_data.get("response", ""), difficulty, num_questions)
+        first_pass = len(questions)
+
+        # Re-request only missing/invalid questions
+        questions = self._repair_questions(
+            questions, problems, grade_band, subject, chapter_title, chapter_summary, num_questions, difficulty
+        )
+        self._record_generation(difficulty, first_pass, len(questions), num_questions)
+
+        return self._finalize_quiz(questions, grade_band, subject, chapter_id, difficulty)
+
+    async def agenerate_quiz(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int = 5,
+            difficulty: str = "basic"
+    ) -> Dict:
+        """Async variant of generate_quiz; LLM calls do not hold a worker thread."""
+
+        prompt = self._build_quiz_prompt(
+            grade_band, subject, chapter_title, chapter_summary, num_questions, difficulty
+        )
+
+        response_data = await self.model_framework.agenerate_response(
+            prompt=prompt,
+            task_type="quiz",
+            complexity=difficulty,
+            subject=subject,
+            grade=grade_band
+        )
+
+        questions, problems = self._validated_questions(response_data.get("response", ""), difficulty, num_questions)
+        first_pass = len(questions)
+
+        # Re-request only missing/invalid questions
+        questions = await self._arepair_questions(
+            questions, problems, grade_band, subject, chapter_title, chapter_summary, num_questions, difficulty
+        )
+        self._record_generation(difficulty, first_pass, len(questions), num_questions)
+
+        return self._finalize_quiz(questions, grade_band, subject, chapter_id, difficulty)
+
     # ----------------------------------------------------------
     # Generate all difficulty levels (ensures distinct outputs)
     # ----------------------------------------------------------
@@ -268,42 +439,474 @@ class AI_Tutor:
             grade_band: str,
             chapter_id: str,
             chapter_title: str,
-            chapter_summary: str
+            chapter_summary: str,
+            single_call: Optional[bool] = None,
+            levels: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Generates unique quizzes for basic, medium, and hard levels.
+
+        The levels (and their retries) run concurrently on a shared, bounded
+        thread pool, so latency is roughly that of the slowest level.
+        With single_call (default: QUIZ_SINGLE_CALL) all levels are requested
+        in one structured response instead. levels restricts generation to a
+        subset of QUIZ_LEVELS (e.g. those missing from the quiz bank).
+        """
+
+        levels = levels or QUIZ_LEVELS
+        if len(levels) > 1 and (QUIZ_SINGLE_CALL if single_call is None else single_call):
+            return self._generate_all_quizzes_single_call(
+                subject, grade_band, chapter_id, chapter_title, chapter_summary, levels=levels
+            )
+
+        futures = {
+            lvl: self.quiz_executor.submit(
+                self.generate_quiz,
+                grade_band=grade_band,
+                subject=subject,
+                chapter_id=chapter_id,
+                chapter_title=chapter_title,
+                chapter_summary=chapter_summary,
+                num_questions=5,
+                difficulty=lvl
+            )
+            for lvl in levels
+        }
+
+        return {lvl: [future.result()] for lvl, future in futures.items()}
+
+    async def agenerate_all_quizzes(
+            self,
+            subject: str,
+            grade_band: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            single_call: Optional[bool] = None,
+            levels: Optional[List[str]] = None
     ) -> Dict:
-        """Generates unique quizzes for basic, medium, and hard levels."""
+        """Async variant of generate_all_quizzes; the levels are awaited together."""
+
+        levels = levels or QUIZ_LEVELS
+        if len(levels) > 1 and (QUIZ_SINGLE_CALL if single_call is None else single_call):
+            return await self._agenerate_all_quizzes_single_call(
+                subject, grade_band, chapter_id, chapter_title, chapter_summary, levels=levels
+            )
+
+        quizzes = await asyncio.gather(*[
+            self.agenerate_quiz(
+                grade_band=grade_band,
+                subject=subject,
+                chapter_id=chapter_id,
+                chapter_title=chapter_title,
+                chapter_summary=chapter_summary,
+                num_questions=5,
+                difficulty=lvl
+            )
+            for lvl in levels
+        ])
 
-        levels = ["basic", "medium", "hard"]
-        quiz_set = {}
+        return {lvl: [quiz] for lvl, quiz in zip(levels, quizzes)}
 
+    def _split_combined_quiz(self, text: str, levels: List[str], num_questions: int) -> Dict[str, tuple]:
+        """Parse a combined response into {level: (valid questions, problems)}."""
+        data = self._try_parse_json_object(text)
+        split = {}
         for lvl in levels:
-            quiz_set[lvl] = [
-                self.generate_quiz(
-                    grade_band=grade_band,
-                    subject=subject,
-                    chapter_id=chapter_id,
-                    chapter_title=chapter_title,
-                    chapter_summary=chapter_summary,
-                    num_questions=5,
-                    difficulty=lvl
+            candidates = data.get(lvl) if isinstance(data.get(lvl), list) else []
+            split[lvl] = self._validated_questions(candidates, lvl, num_questions)
+        return split
+
+    def _generate_all_quizzes_single_call(
+            self,
+            subject: str,
+            grade_band: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int = 5,
+            levels: List[str] = QUIZ_LEVELS
+    ) -> Dict:
+        """One request for every level; only levels that fail validation are re-requested."""
+
+        prompt = self._build_combined_quiz_prompt(
+            grade_band, subject, chapter_title, chapter_summary, num_questions, levels
+        )
+        response_data = self.model_framework.generate_response(
+            prompt=prompt,
+            task_type="quiz",
+            complexity="medium",
+            subject=subject,
+            grade=grade_band,
+            max_tokens=8192
+        )
+        parsed = self._split_combined_quiz(response_data.get("response", ""), levels, num_questions)
+
+        # Re-request only the missing/invalid questions of each level (concurrently)
+        repairs = {
+            lvl: self.quiz_executor.submit(
+                self._repair_questions, questions, problems, grade_band, subject,
+                chapter_title, chapter_summary, num_questions, lvl
+            )
+            for lvl, (questions, problems) in parsed.items() if len(questions) < num_questions
+        }
+        if repairs:
+            logger.info(f"Single-call quiz: repairing {', '.join(repairs)}")
+
+        result = {}
+        for lvl in levels:
+            questions = repairs[lvl].result() if lvl in repairs else parsed[lvl][0]
+            self._record_generation(lvl, len(parsed[lvl][0]), len(questions), num_questions)
+            result[lvl] = [self._finalize_quiz(questions, grade_band, subject, chapter_id, lvl)]
+        return result
+
+    async def _agenerate_all_quizzes_single_call(
+            self,
+            subject: str,
+            grade_band: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int = 5,
+            levels: List[str] = QUIZ_LEVELS
+    ) -> Dict:
+        """Async variant of _generate_all_quizzes_single_call."""
+
+        prompt = self._build_combined_quiz_prompt(
+            grade_band, subject, chapter_title, chapter_summary, num_questions, levels
+        )
+        response_data = await self.model_framework.agenerate_response(
+            prompt=prompt,
+            task_type="quiz",
+            complexity="medium",
+            subject=subject,
+            grade=grade_band,
+            max_tokens=8192
+        )
+        parsed = self._split_combined_quiz(response_data.get("response", ""), levels, num_questions)
+
+        incomplete = [lvl for lvl in levels if len(parsed[lvl][0]) < num_questions]
+        if incomplete:
+            logger.info(f"Single-call quiz: repairing {', '.join(incomplete)}")
+        repaired = await asyncio.gather(*[
+            self._arepair_questions(
+                *parsed[lvl], grade_band, subject, chapter_title, chapter_summary, num_questions, lvl
+            )
+            for lvl in incomplete
+        ])
+        repaired_by_level = dict(zip(incomplete, repaired))
+
+        result = {}
+        for lvl in levels:
+            questions = repaired_by_level.get(lvl, parsed[lvl][0])
+            self._record_generation(lvl, len(parsed[lvl][0]), len(questions), num_questions)
+            result[lvl] = [self._finalize_quiz(questions, grade_band, subject, chapter_id, lvl)]
+        return result
+
+    # ----------------------------------------------------------
+    # Streaming quiz generation
+    # ----------------------------------------------------------
+    async def astream_quiz(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int = 5,
+            difficulty: str = "basic"
+    ) -> AsyncIterator[Dict]:
+        """
+        Yields questions one at a time as the model streams them.
+
+        Each question is emitted as soon as its closing brace arrives. If the
+        stream produces no usable question, agenerate_quiz is used instead.
+        """
+
+        prompt = self._build_quiz_prompt(
+            grade_band, subject, chapter_title, chapter_summary, num_questions, difficulty
+        )
+
+        parser = JsonArrayStreamParser()
+        questions: List[Dict] = []
+        problems: List[str] = []
+        try:
+            async for chunk in self.model_framework.astream_response(
+                prompt=prompt,
+                task_type="quiz",
+                complexity=difficulty,
+                subject=subject,
+                grade=grade_band
+            ):
+                # Keep consuming past extras so the stream's usage is recorded
+                valid, invalid = self._validated_questions(
+                    parser.feed(chunk), difficulty, num_questions - len(questions), questions
                 )
-            ]
+                problems += invalid
+                for question in valid:
+                    yield self._finalize_question(question, len(questions), difficulty)
+                    questions.append(question)
+        except Exception as e:
+            logger.warning(f"Quiz stream failed after {len(questions)} questions: {e}")
+
+        first_pass = len(questions)
+        repaired = await self._arepair_questions(
+            questions, problems, grade_band, subject, chapter_title, chapter_summary, num_questions, difficulty
+        )
+        self._record_generation(difficulty, first_pass, len(repaired), num_questions)
+        for index in range(first_pass, len(repaired)):
+            yield self._finalize_question(repaired[index], index, difficulty)
 
-        return quiz_set
+    async def astream_all_quizzes(
+            self,
+            subject: str,
+            grade_band: str,
+            chapter_id: str,
+            chapter_title: str,
+            chapter_summary: str,
+            levels: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Streams every level concurrently as events, in arrival order:
+        `question` ({difficulty, index, question}) for each parsed question and
+        `quiz` ({difficulty, quiz}) once a level is complete.
+        """
+
+        levels = levels or QUIZ_LEVELS
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_level(lvl: str):
+            questions = []
+            try:
+                async for question in self.astream_quiz(
+                    grade_band, subject, chapter_id, chapter_title, chapter_summary, 5, lvl
+                ):
+                    await queue.put({"type": "question", "difficulty": lvl,
+                                     "index": len(questions), "question": question})
+                    questions.append(question)
+            except Exception as e:
+                logger.warning(f"Quiz stream for {lvl} failed: {e}")
+            quiz = self._finalize_quiz(questions, grade_band, subject, chapter_id, lvl)
+            await queue.put({"type": "quiz", "difficulty": lvl, "quiz": quiz})
+
+        tasks = [asyncio.create_task(run_level(lvl)) for lvl in levels]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await queue.get()
+                if event["type"] == "quiz":
+                    remaining -= 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # ----------------------------------------------------------
+    # On-demand explanations
+    # ----------------------------------------------------------
+    def _build_explanation_prompt(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_title: str,
+            questions: List[Dict]
+    ) -> str:
+        """Asks for an explanation of the correct answer of each question, keyed by index."""
+        items = [
+            {
+                "index": index,
+                "question_text": q.get("question_text"),
+                "options": q.get("options", []),
+                "correct_answer": q.get("correct_option"),
+            }
+            for index, q in enumerate(questions)
+        ]
+        return f"""
+        You are an expert {subject} teacher.
+        Explain the correct answer to each of these {len(items)} quiz questions for grade band {grade_band}.
+        Chapter: "{chapter_title}"
+        Use 1-2 short sentences per question.{self._grade_band_tone(grade_band)}
+
+        Questions:
+        {json.dumps(items, ensure_ascii=False)}
+
+        ✅ CRITICAL OUTPUT INSTRUCTIONS:
+        - You MUST output a SINGLE valid JSON list with one object per question:
+          [{{"index": 0, "explanation": "Why this answer is correct."}}]
+        - Do NOT include any text or markdown formatting outside the JSON array.
+        """
+
+    def generate_explanations(
+            self,
+            subject: str,
+            grade_band: str,
+            chapter_title: str,
+            questions: List[Dict]
+    ) -> Dict[int, str]:
+        """
+        Explanations for already generated questions in one LLM call.
+
+        questions need question_text, options and correct_option (the answer
+        text). Returns {position in questions: explanation}; positions the
+        model skipped are missing.
+        """
+        if not questions:
+            return {}
+
+        response_data = self.model_framework.generate_response(
+            prompt=self._build_explanation_prompt(grade_band, subject, chapter_title, questions),
+            task_type="quiz",
+            complexity="simple",
+            subject=subject,
+            grade=grade_band,
+            cache_task="explanation"
+        )
+
+        explanations = {}
+        for item in salvage_questions(response_data.get("response", "")):
+            index, text = item.get("index"), item.get("explanation")
+            if isinstance(index, int) and 0 <= index < len(questions) and isinstance(text, str) and text.strip():
+                explanations[index] = text.strip()
+        return explanations
+
+    # ----------------------------------------------------------
+    # Question validation and repair
+    # ----------------------------------------------------------
+    def _validated_questions(
+            self,
+            output: Union[str, List],
+            difficulty: str,
+            limit: int,
+            existing: Optional[List[Dict]] = None
+    ) -> Tuple[List[Dict], List[str]]:
+        """Valid questions salvaged from model text (or parsed candidates) plus the problems found."""
+        candidates = salvage_questions(output) if isinstance(output, str) else output
+        valid, problems = validate_questions(candidates, max(limit, 0), existing)
+        quiz_questions_total.inc(len(valid), difficulty=difficulty, outcome="valid")
+        quiz_questions_total.inc(len(problems), difficulty=difficulty, outcome="invalid")
+        return valid, problems
+
+    def _build_repair_prompt(
+            self,
+            grade_band: str,
+            subject: str,
+            chapter_title: str,
+            chapter_summary: str,
+            missing: int,
+            difficulty: str,
+            existing: List[Dict],
+            problems: List[str]
+    ) -> str:
+        """Quiz prompt for just the missing questions, listing what to avoid."""
+        prompt = self._build_quiz_prompt(grade_band, subject, chapter_title, chapter_summary, missing, difficulty)
+        if existing:
+            prompt += "\n        These questions already exist; do not repeat them:\n"
+            prompt += "\n".join(f"        - {q['question_text']}" for q in existing)
+        if problems:
+            prompt += "\n        Your previous answer had these problems; avoid them:\n"
+            prompt += "\n".join(f"        - {problem}" for problem in problems[:10])
+        return prompt
+
+    def _record_repair(self, difficulty: str, response_data: Dict):
+        """Count a repair request and the tokens the provider reported for it."""
+        quiz_repair_requests_total.inc(difficulty=difficulty)
+        if response_data.get("cached"):
+            return
+        usage = response_data.get("usage") or {}
+        for kind in ("prompt", "completion"):
+            if usage.get(f"{kind}_tokens"):
+                quiz_repair_tokens_total.inc(usage[f"{kind}_tokens"], difficulty=difficulty, kind=kind)
+
+    @staticmethod
+    def _record_generation(difficulty: str, first_pass: int, final: int, num_questions: int):
+        if first_pass >= num_questions:
+            outcome = "first_pass"
+        elif final >= num_questions:
+            outcome = "repaired"
+        else:
+            outcome = "incomplete"
+        quiz_generations_total.inc(difficulty=difficulty, outcome=outcome)
+
+    def _repair_questions(
+            self,
+            questions: List[Dict],
+            problems: List[str],
+            grade_band: str,
+            subject: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int,
+            difficulty: str
+    ) -> List[Dict]:
+        """Requests only the missing/invalid questions, up to QUIZ_REPAIR_ATTEMPTS times."""
+        for _ in range(QUIZ_REPAIR_ATTEMPTS):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            response_data = self.model_framework.generate_response(
+                prompt=self._build_repair_prompt(
+                    grade_band, subject, chapter_title, chapter_summary, missing, difficulty, questions, problems
+                ),
+                task_type="quiz",
+                complexity=difficulty,
+                subject=subject,
+                grade=grade_band
+            )
+            self._record_repair(difficulty, response_data)
+            new, problems = self._validated_questions(response_data.get("response", ""), difficulty, missing, questions)
+            for question in new:
+                # The model numbers repairs from 1; IDs are reassigned by position
+                question.pop("id", None)
+            questions = questions + new
+        return questions
+
+    async def _arepair_questions(
+            self,
+            questions: List[Dict],
+            problems: List[str],
+            grade_band: str,
+            subject: str,
+            chapter_title: str,
+            chapter_summary: str,
+            num_questions: int,
+            difficulty: str
+    ) -> List[Dict]:
+        """Async variant of _repair_questions."""
+        for _ in range(QUIZ_REPAIR_ATTEMPTS):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            response_data = await self.model_framework.agenerate_response(
+                prompt=self._build_repair_prompt(
+                    grade_band, subject, chapter_title, chapter_summary, missing, difficulty, questions, problems
+                ),
+                task_type="quiz",
+                complexity=difficulty,
+                subject=subject,
+                grade=grade_band
+            )
+            self._record_repair(difficulty, response_data)
+            new, problems = self._validated_questions(response_data.get("response", ""), difficulty, missing, questions)
+            for question in new:
+                # The model numbers repairs from 1; IDs are reassigned by position
+                question.pop("id", None)
+            questions = questions + new
+        return questions
 
     # ----------------------------------------------------------
     # Helper: JSON extraction
     # ----------------------------------------------------------
-    def _try_parse_json(self, text: str) -> List[Dict]:
-        """Extract JSON list from model text output."""
+    def _try_parse_json_object(self, text: str) -> Dict:
+        """Extract a JSON object from model text output."""
         try:
-            json_text = re.search(r"\[.*\]", text, re.DOTALL)
+            json_text = re.search(r"\{.*\}", text, re.DOTALL)
             if json_text:
                 data = json.loads(json_text.group(0))
-                if isinstance(data, list):
+                if isinstance(data, dict):
                     return data
         except Exception:
             pass
-        return []
+        return {}
 
     # ----------------------------------------------------------
     # Chat
@@ -318,5 +921,15 @@ class AI_Tutor:
             complexity="medium"
         )
 
+    async def achat_with_tutor(self, message: str, subject: str, grade: str) -> str:
+        """Async variant of chat_with_tutor."""
+        agent = self._get_agent_for_subject(subject)
+        return await agent.aprocess_request(
+            user_input=message,
+            subject=subject,
+            grade=grade,
+            complexity="medium"
+        )
+
 # Global instance
 tutor_interface = AI_Tutor()
@@ -0,0 +1,78 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+Yields each object of a top-level JSON array as soon as its closing brace arrives.
+"""
+
+import json
+from typing import Dict, List
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a JSON array of objects arriving in chunks.
+
+    Features:
+    - Only scans new text; string/escape state carries across chunk boundaries
+    - Skips any preamble before the first '[' (e.g. a ```json fence)
+    - Elements that are not objects or fail to decode are skipped and counted in `errors`
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []  # characters of the element being read
+        self._depth = 0  # nesting depth inside the current element (0 = between elements)
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        self.errors = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a chunk and return the objects it completed."""
+        items = []
+        for ch in chunk:
+            if self.done:
+                break
+
+            if not self._in_array:
+                self._in_array = ch == "["
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                elif ch == "]":
+                    self.done = True
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    item = self._decode("".join(self._buffer))
+                    self._buffer = []
+                    if item is not None:
+                        items.append(item)
+        return items
+
+    def _decode(self, text: str):
+        try:
+            item = json.loads(text)
+        except ValueError:
+            self.errors += 1
+            return None
+        if not isinstance(item, dict):
+            self.errors += 1
+            return None
+        return item
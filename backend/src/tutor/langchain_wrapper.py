@@ -4,17 +4,18 @@ Enables using existing Euriai infrastructure with LangChain's ecosystem.
 """
 
 import os
-from typing import Any, Dict, Iterator, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
     AIMessage,
+    AIMessageChunk,
     BaseMessage,
     HumanMessage,
     SystemMessage,
 )
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 
 from .framework import euriai_framework, EuriaiModelFramework
 
@@ -82,38 +83,20 @@ class ChatEuriai(BaseChatModel):
 
         return "\n\n".join(prompt_parts)
 
-    def _generate(
-        self,
-        messages: List[BaseMessage],
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> ChatResult:
-        """Generate a response from the Euriai framework."""
-
-        # Override params from kwargs if provided
-        task_type = kwargs.get("task_type", self.task_type)
-        complexity = kwargs.get("complexity", self.complexity)
-        subject = kwargs.get("subject", self.subject)
-        grade = kwargs.get("grade", self.grade)
-        temperature = kwargs.get("temperature", self.temperature)
-        max_tokens = kwargs.get("max_tokens", self.max_tokens)
-
-        # Convert messages to prompt
-        prompt = self._convert_messages_to_prompt(messages)
-
-        # Call the Euriai framework
-        result = self._framework.generate_response(
-            prompt=prompt,
-            task_type=task_type,
-            complexity=complexity,
-            subject=subject,
-            grade=grade,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
+    def _call_params(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve framework parameters, letting per-call kwargs override defaults."""
+        return {
+            "task_type": kwargs.get("task_type", self.task_type),
+            "complexity": kwargs.get("complexity", self.complexity),
+            "subject": kwargs.get("subject", self.subject),
+            "grade": kwargs.get("grade", self.grade),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "cache_task": kwargs.get("cache_task"),
+        }
 
-        # Create ChatResult
+    def _to_chat_result(self, result: Dict) -> ChatResult:
+        """Wrap a framework result dict in a LangChain ChatResult."""
         response_text = result.get("response", "")
         model_used = result.get("model_used", "unknown")
 
@@ -128,6 +111,66 @@ class ChatEuriai(BaseChatModel):
 
         return ChatResult(generations=[generation])
 
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Generate a response from the Euriai framework."""
+        prompt = self._convert_messages_to_prompt(messages)
+        result = self._framework.generate_response(prompt=prompt, **self._call_params(kwargs))
+        return self._to_chat_result(result)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Generate a response without blocking a thread (native async path)."""
+        prompt = self._convert_messages_to_prompt(messages)
+        result = await self._framework.agenerate_response(prompt=prompt, **self._call_params(kwargs))
+        return self._to_chat_result(result)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream response tokens from the Euriai framework as they arrive."""
+        prompt = self._convert_messages_to_prompt(messages)
+        params = self._call_params(kwargs)
+        params.pop("cache_task")  # Streamed responses are never cached
+
+        for delta in self._framework.stream_response(prompt=prompt, **params):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=delta))
+            if run_manager:
+                run_manager.on_llm_new_token(delta, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Async token streaming."""
+        prompt = self._convert_messages_to_prompt(messages)
+        params = self._call_params(kwargs)
+        params.pop("cache_task")  # Streamed responses are never cached
+
+        async for delta in self._framework.astream_response(prompt=prompt, **params):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=delta))
+            if run_manager:
+                await run_manager.on_llm_new_token(delta, chunk=chunk)
+            yield chunk
+
     def with_config(
         self,
         task_type: Optional[str] = None,
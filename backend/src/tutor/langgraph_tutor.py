@@ -3,8 +3,9 @@ LangGraph-based Tutoring Workflow for AI Tutor.
 Provides stateful, multi-step tutoring interactions with intelligent routing.
 """
 
+import asyncio
 import os
-from typing import Annotated, Dict, List, Literal, Optional, TypedDict
+from typing import Annotated, AsyncIterator, Dict, List, Literal, Optional, Tuple, TypedDict
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
@@ -111,29 +112,48 @@ class TutoringWorkflow:
 
         return builder.compile()
 
-    def _detect_intent(self, state: TutorState) -> Dict:
-        """Detect the intent of the student's message."""
+    def _intent_prompt(self, state: TutorState) -> Optional[str]:
+        """Build the intent-detection prompt, or None if there is no message."""
         messages = state.get("messages", [])
         if not messages:
-            return {"intent": "other"}
-
-        last_message = messages[-1].content if messages else ""
+            return None
 
-        prompt = INTENT_PROMPTS["detect"].format(
-            message=last_message,
+        return INTENT_PROMPTS["detect"].format(
+            message=messages[-1].content,
             subject=state.get("subject", "general")
         )
 
+    def _parse_intent(self, content: str) -> str:
+        """Validate the model's intent answer, defaulting to question."""
+        intent = content.strip().lower()
+
+        valid_intents = ["question", "help", "explain", "quiz", "greeting", "clarify", "other"]
+        if intent not in valid_intents:
+            intent = "question"  # Default to question
+
+        return intent
+
+    def _detect_intent(self, state: TutorState) -> Dict:
+        """Detect the intent of the student's message."""
+        prompt = self._intent_prompt(state)
+        if prompt is None:
+            return {"intent": "other"}
+
         try:
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            intent = response.content.strip().lower()
+            response = self.llm.invoke([HumanMessage(content=prompt)], cache_task="intent")
+            return {"intent": self._parse_intent(response.content)}
+        except Exception:
+            return {"intent": "question"}
 
-            # Validate intent
-            valid_intents = ["question", "help", "explain", "quiz", "greeting", "clarify", "other"]
-            if intent not in valid_intents:
-                intent = "question"  # Default to question
+    async def _adetect_intent(self, state: TutorState) -> Dict:
+        """Async variant of _detect_intent."""
+        prompt = self._intent_prompt(state)
+        if prompt is None:
+            return {"intent": "other"}
 
-            return {"intent": intent}
+        try:
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)], cache_task="intent")
+            return {"intent": self._parse_intent(response.content)}
         except Exception:
             return {"intent": "question"}
 
@@ -168,8 +188,8 @@ class TutoringWorkflow:
         except Exception:
             return {"context": ""}
 
-    def _generate_response(self, state: TutorState) -> Dict:
-        """Generate a tutoring response."""
+    def _build_response_request(self, state: TutorState) -> Tuple[ChatEuriai, List[BaseMessage]]:
+        """Build the subject-appropriate LLM and message list for a tutoring response."""
         messages = state.get("messages", [])
         subject = state.get("subject", "general")
         grade = state.get("grade", "6th")
@@ -210,21 +230,33 @@ Guidelines:
         llm_messages = [SystemMessage(content=system_prompt)]
         llm_messages.extend(messages)
 
+        # Use subject-appropriate LLM
+        llm = ChatEuriai(
+            task_type=self._get_task_type(subject),
+            complexity="medium",
+            subject=subject,
+            grade=grade,
+        )
+        return llm, llm_messages
+
+    def _remember_exchange(self, state: TutorState, response_text: str):
+        """Store the student's message and the tutor's reply in memory."""
+        messages = state.get("messages", [])
+        student_id = state.get("student_id", "anonymous")
+        subject = state.get("subject", "general")
+
+        if messages:
+            memory_manager.add_message(student_id, subject, messages[-1].content, is_human=True)
+        memory_manager.add_message(student_id, subject, response_text, is_human=False)
+
+    def _generate_response(self, state: TutorState) -> Dict:
+        """Generate a tutoring response."""
         try:
-            # Use subject-appropriate LLM
-            task_type = self._get_task_type(subject)
-            llm = ChatEuriai(
-                task_type=task_type,
-                complexity="medium",
-                subject=subject,
-                grade=grade,
-            )
+            llm, llm_messages = self._build_response_request(state)
             response = llm.invoke(llm_messages)
 
             # Store in memory
-            if messages:
-                memory_manager.add_message(student_id, subject, messages[-1].content, is_human=True)
-            memory_manager.add_message(student_id, subject, response.content, is_human=False)
+            self._remember_exchange(state, response.content)
 
             return {
                 "response": response.content,
@@ -318,6 +350,73 @@ Guidelines:
             # Fallback: Simple direct response
             return self._fallback_invoke(initial_state)
 
+    async def astream(
+        self,
+        message: str,
+        student_id: str,
+        subject: str = "general",
+        grade: str = "6th",
+    ) -> AsyncIterator[Dict]:
+        """
+        Process a tutoring request, streaming the response as it is generated.
+
+        Args:
+            message: The student's message
+            student_id: Student identifier for memory
+            subject: Subject context
+            grade: Grade level
+
+        Yields:
+            Event dicts: one "meta" event (intent, has_context), "token" events
+            as chunks arrive, and a final "done" event with the full response.
+            Memory is written once the stream finishes. If the model stream breaks
+            after tokens were sent, the error is raised and nothing is remembered.
+        """
+        state = {
+            "messages": [HumanMessage(content=message)],
+            "student_id": student_id,
+            "subject": subject,
+            "grade": grade,
+            "context": "",
+            "intent": "",
+            "response": "",
+            "metadata": {},
+        }
+
+        state.update(await self._adetect_intent(state))
+        route = self._route_by_intent(state)
+
+        if route in ("greeting", "quiz"):
+            handler = self._handle_greeting if route == "greeting" else self._handle_quiz_request
+            response = handler(state)["response"]
+            yield {"type": "meta", "intent": state["intent"], "has_context": False}
+            yield {"type": "token", "content": response}
+            yield {"type": "done", "response": response}
+            return
+
+        state.update(await asyncio.to_thread(self._retrieve_context, state))
+        yield {"type": "meta", "intent": state["intent"], "has_context": bool(state.get("context"))}
+
+        chunks: List[str] = []
+        try:
+            llm, llm_messages = self._build_response_request(state)
+            async for chunk in llm.astream(llm_messages):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+        except Exception:
+            if chunks:
+                # A partial answer must not end with "done" or be saved as complete
+                raise
+            error_msg = "I'm having trouble generating a response. Please try again!"
+            yield {"type": "token", "content": error_msg}
+            yield {"type": "done", "response": error_msg}
+            return
+
+        response = "".join(chunks)
+        self._remember_exchange(state, response)
+        yield {"type": "done", "response": response}
+
     def _fallback_invoke(self, state: Dict) -> Dict:
         """Fallback when LangGraph is not available."""
         # Simple flow: detect intent -> retrieve -> respond
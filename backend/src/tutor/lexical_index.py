@@ -0,0 +1,142 @@
+"""
+Lexical (BM25) Index for AI Tutor.
+A compact inverted index over the ingested chunks, so keyword questions can be
+answered locally without the embeddings API. Tokenization handles English,
+Hindi (Devanagari) and Kannada text.
+"""
+
+import math
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Saved inside the FAISS index directory; ids refer to that index's docstore
+BM25_FILE = "bm25.npz"
+
+# Latin words/numbers, or runs of Devanagari / Kannada letters including their vowel
+# signs and viramas (which \w would split on). Dandas (U+0964/5) separate sentences.
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u0900-\u0963\u0966-\u097F]+|[\u0C80-\u0CFF]+")
+
+STOPWORDS = {
+    # English (including question words that carry no topic)
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "of", "to", "in", "on", "for", "and", "or",
+    "with", "as", "by", "at", "from", "it", "its", "this", "that", "these", "those", "what", "which", "who",
+    "how", "why", "when", "where", "do", "does", "did", "can", "define", "explain", "describe", "give", "me",
+    # Hindi
+    "है", "हैं", "था", "थे", "का", "की", "के", "को", "में", "से", "पर", "और", "या", "यह", "वह", "क्या",
+    "कैसे", "क्यों", "एक", "भी", "तो", "ही",
+    # Kannada
+    "ಮತ್ತು", "ಇದು", "ಅದು", "ಏನು", "ಹೇಗೆ", "ಏಕೆ", "ಒಂದು", "ಈ", "ಆ", "ಅಥವಾ", "ಇದೆ",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """NFKC-normalized, casefolded tokens without stopwords."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return [t for t in _TOKEN_RE.findall(text) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of chunks.
+
+    Features:
+    - Postings stored as flat numpy arrays (term offsets, doc numbers, term
+      frequencies) in one .npz file; no pickles
+    - Chunks are referenced by docstore id, so the text is not stored twice
+    - Scoring is vectorized per query term
+    """
+
+    def __init__(self, terms: Sequence[str], offsets: np.ndarray, postings: np.ndarray, frequencies: np.ndarray,
+                 doc_lengths: np.ndarray, ids: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.ids = list(ids)
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+
+        self._term_index: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        # Per-document length normalization, fixed for the life of the index
+        self._norm = (k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts: Sequence[str], ids: Sequence[str]) -> "BM25Index":
+        """Index chunk texts; ids[i] is the docstore id of texts[i]."""
+        term_docs: Dict[str, Dict[int, int]] = {}
+        lengths = []
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                counts = term_docs.setdefault(token, {})
+                counts[doc] = counts.get(doc, 0) + 1
+
+        terms = sorted(term_docs)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        postings, frequencies = [], []
+        for i, term in enumerate(terms):
+            docs = term_docs[term]
+            postings.extend(docs.keys())
+            frequencies.extend(docs.values())
+            offsets[i + 1] = len(postings)
+
+        return cls(
+            terms,
+            offsets,
+            np.array(postings, dtype=np.uint32),
+            np.minimum(np.array(frequencies, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16),
+            np.array(lengths, dtype=np.uint32),
+            ids,
+        )
+
+    def save(self, path: str):
+        terms = sorted(self._term_index, key=self._term_index.get)
+        np.savez_compressed(
+            path,
+            terms=np.array(terms, dtype=str),
+            offsets=self.offsets,
+            postings=self.postings,
+            frequencies=self.frequencies,
+            doc_lengths=self.doc_lengths,
+            ids=np.array(self.ids, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["terms"].tolist(), data["offsets"], data["postings"], data["frequencies"],
+                data["doc_lengths"], data["ids"].tolist(),
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (docstore id, score) pairs; empty if no query term occurs in the index."""
+        n = len(self.ids)
+        scores = np.zeros(n, dtype=np.float32)
+        matched = False
+
+        for term in set(tokenize(query)):
+            i = self._term_index.get(term)
+            if i is None:
+                continue
+            matched = True
+            start, end = self.offsets[i], self.offsets[i + 1]
+            docs = self.postings[start:end]
+            tf = self.frequencies[start:end].astype(np.float32)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+
+        if not matched:
+            return []
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > 0]
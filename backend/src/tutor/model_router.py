@@ -0,0 +1,273 @@
+"""
+Latency- and cost-aware model routing for the EuriAI framework.
+Picks models per (task_type, complexity) from a configurable routing table and live SLO statistics.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_MODEL = "gpt-4.1-nano"
+COMPLEXITY_LEVELS = ["simple", "medium", "complex"]
+
+# Quiz difficulties map onto complexity tiers
+COMPLEXITY_ALIASES = {"basic": "simple", "easy": "simple", "hard": "complex", "advanced": "complex"}
+
+DEFAULT_ROUTING_CONFIG: Dict = {
+    # Relative cost per 1k tokens, quality score (0-1) and a latency prior (seconds)
+    # used until enough live samples exist
+    "models": {
+        "gpt-4.1-nano": {"cost": 0.1, "quality": 0.6, "latency": 1.0},
+        "llama-4-scout-17b-16e-instruct": {"cost": 0.2, "quality": 0.7, "latency": 1.5},
+        "gemini-2.5-flash": {"cost": 0.3, "quality": 0.7, "latency": 1.2},
+        "gpt-4.1-mini": {"cost": 0.4, "quality": 0.8, "latency": 2.0},
+        "deepseek-r1-distill-llama-70b": {"cost": 0.8, "quality": 0.9, "latency": 6.0},
+        "gemini-2.5-pro": {"cost": 1.25, "quality": 0.95, "latency": 8.0},
+    },
+    # Preferred model per task and complexity (first entry is the primary)
+    "routes": {
+        "chat": {"simple": ["gemini-2.5-flash"], "medium": ["gpt-4.1-nano"], "complex": ["gpt-4.1-mini"]},
+        "math": {"simple": ["gpt-4.1-mini"], "medium": ["deepseek-r1-distill-llama-70b"], "complex": ["gemini-2.5-pro"]},
+        "science": {"simple": ["gemini-2.5-flash"], "medium": ["gpt-4.1-mini"], "complex": ["gemini-2.5-pro"]},
+        "creative": {"simple": ["gpt-4.1-nano"], "medium": ["gpt-4.1-mini"], "complex": ["gemini-2.5-pro"]},
+        "reasoning": {"simple": ["gpt-4.1-mini"], "medium": ["llama-4-scout-17b-16e-instruct"],
+                      "complex": ["gemini-2.5-pro"]},
+        "quiz": {"simple": ["gpt-4.1-nano", "gemini-2.5-flash"], "medium": ["gpt-4.1-mini", "gemini-2.5-flash"],
+                 "complex": ["gpt-4.1-mini", "gemini-2.5-pro"]},
+    },
+    # Complex requests for these subjects go to a specialist
+    "subject_overrides": {
+        "math": {"complex": "deepseek-r1-distill-llama-70b"},
+        "science": {"complex": "gemini-2.5-pro"},
+    },
+    # Minimum model quality per complexity for cost/latency substitution
+    "quality_floor": {"simple": 0.55, "medium": 0.7, "complex": 0.85},
+    # A model violating its task SLO is routed around until the window recovers
+    "slos": {
+        "default": {"p95_seconds": 15.0, "max_error_rate": 0.25},
+        "chat": {"p95_seconds": 3.0, "max_error_rate": 0.2},
+        "quiz": {"p95_seconds": 20.0, "max_error_rate": 0.25},
+    },
+}
+
+
+class RollingStats:
+    """Latency/error samples for one (model, task_type) within a time window."""
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 500):
+        self.window_seconds = window_seconds
+        self._samples: deque = deque(maxlen=max_samples)  # (timestamp, latency, success)
+
+    def add(self, latency: float, success: bool):
+        self._samples.append((time.monotonic(), latency, success))
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def summary(self) -> Dict:
+        self._prune()
+        count = len(self._samples)
+        if not count:
+            return {"count": 0, "p50": 0.0, "p95": 0.0, "error_rate": 0.0}
+        latencies = sorted(s[1] for s in self._samples)
+        errors = sum(1 for s in self._samples if not s[2])
+        return {
+            "count": count,
+            "p50": latencies[count // 2],
+            "p95": latencies[min(count - 1, int(0.95 * count))],
+            "error_rate": errors / count,
+        }
+
+
+class ModelRouter:
+    """
+    Chooses and orders candidate models for a request.
+
+    Features:
+    - Routing table, model cost/quality metadata and SLOs loaded from JSON config
+    - Rolling p50/p95 latency and error rate per (model, task_type)
+    - Models breaching their SLO (or with an open circuit) are moved to the back
+    - speed_priority "fast" prefers the lowest observed latency, "quality" the
+      highest quality score, "balanced" keeps the table order; substitutes are
+      only promoted when they meet the complexity's quality floor, cheapest first
+    """
+
+    def __init__(self, config: Optional[Dict] = None, window_seconds: float = 300.0, min_samples: int = 5):
+        self.config = config or DEFAULT_ROUTING_CONFIG
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+
+        self._stats: Dict[tuple, RollingStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """Build a router; MODEL_ROUTING_CONFIG points to a JSON file merged over the defaults."""
+        return cls(
+            config=load_routing_config(os.environ.get("MODEL_ROUTING_CONFIG")),
+            window_seconds=float(os.environ.get("MODEL_ROUTER_WINDOW_SECONDS", "300")),
+            min_samples=int(os.environ.get("MODEL_ROUTER_MIN_SAMPLES", "5")),
+        )
+
+    # ----------------------------------------------------------
+    # Live statistics
+    # ----------------------------------------------------------
+    def record(self, model: str, task_type: str, latency: float, success: bool):
+        """Add one call outcome to the rolling window."""
+        with self._lock:
+            key = (model, task_type)
+            if key not in self._stats:
+                self._stats[key] = RollingStats(self.window_seconds)
+            self._stats[key].add(latency, success)
+
+    def _summary(self, model: str, task_type: str) -> Dict:
+        with self._lock:
+            stats = self._stats.get((model, task_type))
+            return stats.summary() if stats else {"count": 0, "p50": 0.0, "p95": 0.0, "error_rate": 0.0}
+
+    def slo(self, task_type: str) -> Dict:
+        slos = self.config.get("slos", {})
+        return {**slos.get("default", {}), **slos.get(task_type, {})}
+
+    def meets_slo(self, model: str, task_type: str) -> bool:
+        """True while the model has too few samples or is within the task's SLO."""
+        summary = self._summary(model, task_type)
+        if summary["count"] < self.min_samples:
+            return True
+        slo = self.slo(task_type)
+        if "p95_seconds" in slo and summary["p95"] > slo["p95_seconds"]:
+            return False
+        if "max_error_rate" in slo and summary["error_rate"] > slo["max_error_rate"]:
+            return False
+        return True
+
+    def _profile(self, model: str) -> Dict:
+        return self.config.get("models", {}).get(model, {})
+
+    def _expected_latency(self, model: str, task_type: str) -> float:
+        summary = self._summary(model, task_type)
+        if summary["count"] >= self.min_samples:
+            return summary["p50"]
+        return self._profile(model).get("latency", 5.0)
+
+    # ----------------------------------------------------------
+    # Routing
+    # ----------------------------------------------------------
+    @staticmethod
+    def normalize_complexity(complexity: str) -> str:
+        complexity = (complexity or "medium").lower()
+        complexity = COMPLEXITY_ALIASES.get(complexity, complexity)
+        return complexity if complexity in COMPLEXITY_LEVELS else "medium"
+
+    def _table_candidates(self, task_type: str, complexity: str, subject: str) -> List[str]:
+        """Primary, same-tier alternates, cheaper tiers, stronger tiers, then the default."""
+        row = self.config.get("routes", {}).get(task_type, {})
+
+        def cell(level: str) -> List[str]:
+            value = row.get(level) or []
+            return [value] if isinstance(value, str) else list(value)
+
+        override = self.config.get("subject_overrides", {}).get((subject or "").lower(), {}).get(complexity)
+
+        level = COMPLEXITY_LEVELS.index(complexity)
+        ordered = [override] + cell(complexity)
+        for lower in reversed(COMPLEXITY_LEVELS[:level]):
+            ordered += cell(lower)
+        for higher in COMPLEXITY_LEVELS[level + 1:]:
+            ordered += cell(higher)
+        ordered.append(DEFAULT_MODEL)
+
+        candidates = []
+        for model in ordered:
+            if model and model not in candidates:
+                candidates.append(model)
+        return candidates
+
+    def route(self,
+              task_type: str,
+              complexity: str = "medium",
+              speed_priority: str = "balanced",
+              subject: str = "general",
+              is_available: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        Ordered models to try for a request; the first entry is the routing decision.
+
+        is_available lets the caller exclude models whose circuit breaker is open
+        (they are kept at the very end as a last resort).
+        """
+        complexity = self.normalize_complexity(complexity)
+        candidates = self._table_candidates(task_type, complexity, subject)
+        primary = candidates[0]
+        floor = self.config.get("quality_floor", {}).get(complexity, 0.0)
+
+        healthy, degraded, unavailable = [], [], []
+        for model in candidates:
+            if is_available is not None and not is_available(model):
+                unavailable.append(model)
+            elif self.meets_slo(model, task_type):
+                healthy.append(model)
+            else:
+                degraded.append(model)
+
+        def quality(model: str) -> float:
+            return self._profile(model).get("quality", 0.0)
+
+        def cost(model: str) -> float:
+            return self._profile(model).get("cost", float("inf"))
+
+        # Substitutes must meet the quality floor; the table's own primary always qualifies
+        eligible = [m for m in healthy if m == primary or quality(m) >= floor]
+        below_floor = [m for m in healthy if m not in eligible]
+
+        if speed_priority == "fast":
+            eligible.sort(key=lambda m: (self._expected_latency(m, task_type), cost(m)))
+        elif speed_priority == "quality":
+            eligible.sort(key=lambda m: (-quality(m), cost(m)))
+        else:
+            # Balanced: keep the primary, then the cheapest qualifying substitutes
+            eligible.sort(key=lambda m: (m != primary, cost(m)))
+
+        return eligible + below_floor + degraded + unavailable
+
+    def stats(self) -> Dict:
+        """Rolling latency/error summaries and SLO status per task and model."""
+        with self._lock:
+            keys = sorted(self._stats)
+        result: Dict[str, Dict] = {}
+        for model, task_type in keys:
+            summary = self._summary(model, task_type)
+            summary["meets_slo"] = self.meets_slo(model, task_type)
+            result.setdefault(task_type, {})[model] = summary
+        return result
+
+
+def load_routing_config(path: Optional[str]) -> Dict:
+    """
+    Merge a JSON routing config over DEFAULT_ROUTING_CONFIG.
+
+    "models", "slos" and "quality_floor" are merged key by key; each task in
+    "routes" and each subject in "subject_overrides" replaces the default entry.
+    """
+    config = json.loads(json.dumps(DEFAULT_ROUTING_CONFIG))
+    if not path:
+        return config
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load model routing config '{path}': {e}. Using defaults.")
+        return config
+
+    for section in ("models", "slos"):
+        for name, values in overrides.get(section, {}).items():
+            config[section].setdefault(name, {}).update(values)
+    config["quality_floor"].update(overrides.get("quality_floor", {}))
+    config["routes"].update(overrides.get("routes", {}))
+    config["subject_overrides"].update(overrides.get("subject_overrides", {}))
+    return config
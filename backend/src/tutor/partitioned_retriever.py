@@ -0,0 +1,180 @@
+"""
+Partitioned Retriever for AI Tutor.
+Searches only the per-(grade, subject) FAISS indexes written by ingest.py that
+match a request, instead of filtering the global top-k after the search.
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+
+MANIFEST_FILE = "manifest.json"
+
+
+def subject_key(value: Optional[str]) -> str:
+    """Normalized subject for matching ("Environmental Studies (EVS)" -> "environmental studies")."""
+    s = (value or "").strip().lower()
+    s = re.sub(r"\(.*?\)", "", s)
+    s = s.replace("&", "and")
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def grade_numbers(value: Optional[str]) -> Set[str]:
+    """Grades a request covers: "6th" -> {"6"}, a band like "5-6" -> {"5", "6"}, None -> empty (any)."""
+    numbers = [int(n) for n in re.findall(r"\d+", str(value or ""))]
+    if len(numbers) == 2 and numbers[0] < numbers[1]:
+        return {str(n) for n in range(numbers[0], numbers[1] + 1)}
+    return {str(n) for n in numbers}
+
+
+def search_by_vectors(vectorstore: FAISS, vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[Document, float]]]:
+    """One FAISS search over a matrix of query vectors; (doc, score) lists in query order."""
+    matrix = np.array(vectors, dtype=np.float32)
+    if vectorstore._normalize_L2:
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    scores, indices = vectorstore.index.search(matrix, k)
+
+    results = []
+    for row_scores, row in zip(scores, indices):
+        hits = []
+        for score, i in zip(row_scores, row):
+            if i == -1:
+                continue
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+            if isinstance(doc, Document):
+                hits.append((doc, float(score)))
+        results.append(hits)
+    return results
+
+
+class PartitionedRetriever:
+    """
+    Routes a search to the partitions of one grade/subject and merges their hits.
+
+    Features:
+    - Reads the manifest ingest.py writes next to the partition indexes
+    - Partitions are loaded lazily, so only grades/subjects in use take memory
+    - Partitions without grade/subject metadata are always searched, like the
+      post-filter keeps documents without a subject
+    - Query vectors are embedded once and reused for every partition
+    """
+
+    def __init__(self, path: str, embeddings, allow_dangerous_deserialization: bool = False):
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.path = path
+        self.embeddings = embeddings
+        self.allow_dangerous = allow_dangerous_deserialization
+        self.version = manifest.get("version")
+        self.partitions: List[Dict] = manifest.get("partitions", [])
+
+        self._stores: Dict[str, FAISS] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, embeddings, allow_dangerous_deserialization: bool = False) -> Optional["PartitionedRetriever"]:
+        """The retriever for a partitions directory, or None if ingest has not written one."""
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return None
+        return cls(path, embeddings, allow_dangerous_deserialization)
+
+    # ----------------------------------------------------------
+    # Routing
+    # ----------------------------------------------------------
+    def select(self, subject: Optional[str] = None, grade: Optional[str] = None) -> List[Dict]:
+        """
+        Partitions for a grade and subject; an unknown subject (e.g. "general") matches any subject.
+        Empty if no partition has content for the grade, so the caller searches the global index.
+        """
+        grades = grade_numbers(grade)
+        if grades and not any(p.get("grade") in grades for p in self.partitions):
+            return []
+        in_grade = [
+            p for p in self.partitions
+            if not grades or p.get("grade") is None or p["grade"] in grades
+        ]
+
+        requested = subject_key(subject)
+        if not requested:
+            return in_grade
+
+        def matches(p: Dict) -> bool:
+            key = subject_key(p.get("subject"))
+            return bool(key) and (requested in key or key in requested)
+
+        if not any(matches(p) for p in in_grade):
+            return in_grade
+        return [p for p in in_grade if matches(p) or not p.get("subject")]
+
+    def _store(self, partition: Dict) -> FAISS:
+        name = partition["name"]
+        with self._lock:
+            store = self._stores.get(name)
+        if store is None:
+            store = FAISS.load_local(
+                os.path.join(self.path, name),
+                self.embeddings,
+                allow_dangerous_deserialization=self.allow_dangerous,
+            )
+            with self._lock:
+                store = self._stores.setdefault(name, store)
+        return store
+
+    def preload(self, subject: Optional[str] = None, grade: Optional[str] = None):
+        """Load the partitions a search for this grade/subject will use (no-op once loaded)."""
+        for partition in self.select(subject, grade):
+            self._store(partition)
+
+    # ----------------------------------------------------------
+    # Search
+    # ----------------------------------------------------------
+    def _embed(self, queries: List[str]) -> List[List[float]]:
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(queries)
+        return [self.embeddings.embed_query(query) for query in queries]
+
+    def search_grouped(self, queries: List[str], subject: Optional[str] = None, grade: Optional[str] = None,
+                       k: int = 5) -> Optional[List[List[Document]]]:
+        """
+        Top-k documents per query from the matching partitions (one ranked list per embedded query).
+        Returns None when no partition matches, so the caller can search the global index.
+        """
+        partitions = self.select(subject, grade)
+        if not partitions:
+            return None
+
+        vectors = [v for v in self._embed(queries) if v]
+        if not vectors:
+            return []
+
+        merged: List[List[Tuple[Document, float]]] = [[] for _ in vectors]
+        higher_is_better = False
+        for partition in partitions:
+            store = self._store(partition)
+            higher_is_better = store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT
+            for hits, partition_hits in zip(merged, search_by_vectors(store, vectors, k)):
+                hits.extend(partition_hits)
+
+        for hits in merged:
+            hits.sort(key=lambda hit: hit[1], reverse=higher_is_better)
+        return [[doc for doc, _ in hits[:k]] for hits in merged]
+
+    def search(self, queries: List[str], subject: Optional[str] = None, grade: Optional[str] = None,
+               k: int = 5) -> Optional[List[Document]]:
+        """search_grouped results concatenated in query order."""
+        grouped = self.search_grouped(queries, subject, grade, k)
+        return None if grouped is None else [doc for docs in grouped for doc in docs]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            loaded = len(self._stores)
+        return {"version": self.version, "partitions": len(self.partitions), "loaded": loaded}
@@ -0,0 +1,109 @@
+"""
+Per-question schema validation for generated quizzes.
+Checks each question against the rules for its type and salvages valid questions from broken JSON.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .json_stream import JsonArrayStreamParser
+
+# Option count bounds per question type (min 0 = options are optional)
+QUESTION_SCHEMAS: Dict[str, Dict[str, int]] = {
+    "mcq": {"min_options": 2, "max_options": 6},
+    "true_false": {"min_options": 2, "max_options": 2},
+    "fill_in_the_blank": {"min_options": 2, "max_options": 6},
+    "matching": {"min_options": 2, "max_options": 8},
+    "select_image": {"min_options": 2, "max_options": 6},
+    "spell_word": {"min_options": 0, "max_options": 6},
+    "pronunciation": {"min_options": 0, "max_options": 6},
+    "short_answer": {"min_options": 0, "max_options": 6},
+}
+
+# Spellings models commonly use for the types above
+TYPE_ALIASES = {
+    "multiple_choice": "mcq",
+    "multiple-choice": "mcq",
+    "true/false": "true_false",
+    "true-false": "true_false",
+    "truefalse": "true_false",
+    "fill_in_blank": "fill_in_the_blank",
+    "fill-in-the-blank": "fill_in_the_blank",
+    "fill_in_the_blanks": "fill_in_the_blank",
+    "short-answer": "short_answer",
+}
+
+
+def normalize_question(question: Dict) -> Dict:
+    """Apply harmless fixes in place: type aliases, numeric-string answer index, stray whitespace."""
+    qtype = str(question.get("type") or "").strip().lower()
+    question["type"] = TYPE_ALIASES.get(qtype, qtype)
+
+    idx = question.get("correct_option_index")
+    if isinstance(idx, str) and idx.strip().isdigit():
+        question["correct_option_index"] = int(idx.strip())
+
+    if isinstance(question.get("question_text"), str):
+        question["question_text"] = question["question_text"].strip()
+    return question
+
+
+def validate_question(question: Dict) -> List[str]:
+    """Problems with one question (empty if it is valid)."""
+    if not isinstance(question, dict):
+        return ["not a JSON object"]
+
+    errors = []
+    if not isinstance(question.get("question_text"), str) or not question["question_text"]:
+        errors.append("missing question_text")
+
+    schema = QUESTION_SCHEMAS.get(question.get("type"))
+    if schema is None:
+        errors.append(f"unknown type '{question.get('type')}' (use one of {', '.join(QUESTION_SCHEMAS)})")
+        return errors
+
+    options = question.get("options", [])
+    if not isinstance(options, list) or not all(isinstance(o, (str, int, float)) and str(o).strip() for o in options):
+        return errors + ["options must be a list of non-empty strings"]
+    if not schema["min_options"] <= len(options) <= schema["max_options"]:
+        errors.append(
+            f"{question['type']} needs {schema['min_options']}-{schema['max_options']} options, got {len(options)}"
+        )
+
+    if options:
+        idx = question.get("correct_option_index")
+        if not isinstance(idx, int) or isinstance(idx, bool) or not 0 <= idx < len(options):
+            errors.append(f"correct_option_index must be 0-{len(options) - 1}, got {idx!r}")
+
+    return errors
+
+
+def salvage_questions(text: str) -> List[Dict]:
+    """Every complete question object in model output, even if the array is truncated or malformed."""
+    return JsonArrayStreamParser().feed(text or "")
+
+
+def validate_questions(questions: List[Dict], limit: Optional[int] = None,
+                       existing: Optional[List[Dict]] = None) -> Tuple[List[Dict], List[str]]:
+    """
+    Split candidates into valid questions and problem descriptions.
+
+    Questions repeating one in `existing` (or each other) are dropped, and at
+    most `limit` valid questions are kept.
+    """
+    seen = {q["question_text"].lower() for q in existing or []}
+    valid, problems = [], []
+    for position, question in enumerate(questions, start=1):
+        if isinstance(question, dict):
+            normalize_question(question)
+        errors = validate_question(question)
+        if errors:
+            problems.append(f"question {position}: {'; '.join(errors)}")
+            continue
+        key = question["question_text"].lower()
+        if key in seen:
+            problems.append(f"question {position}: duplicates an earlier question")
+            continue
+        seen.add(key)
+        if limit is None or len(valid) < limit:
+            valid.append(question)
+    return valid, problems
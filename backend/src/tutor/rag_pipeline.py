@@ -4,35 +4,51 @@ Provides better retrieval with query transformation and contextual filtering.
 """
 
 import re
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableLambda
 
+from ..utils.metrics import retrieval_seconds
 from .langchain_wrapper import ChatEuriai
+from .hybrid_retriever import HybridSearcher
+from .partitioned_retriever import PartitionedRetriever, search_by_vectors
+from .retrieval_cache import retrieval_cache
+
+# Runs expanded queries concurrently when they can't be searched as one batch
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-search")
 
 
 class EnhancedRAGPipeline:
     """
     Enhanced RAG pipeline with:
     - Multi-query retrieval for better coverage
-    - Subject-aware filtering
+    - Result cache (docstore ids) for repeated questions
+    - Hybrid BM25 + vector search (BM25 alone while embeddings are unavailable)
+    - Subject-aware filtering (searches only matching grade/subject partitions when available)
     - Grade-appropriate response generation
     - Context compression for relevance
     """
 
-    def __init__(self, retriever, llm: Optional[ChatEuriai] = None):
+    def __init__(self, retriever, llm: Optional[ChatEuriai] = None,
+                 partitions: Optional[PartitionedRetriever] = None, lexical: Optional[HybridSearcher] = None):
         """
         Initialize the RAG pipeline.
 
         Args:
             retriever: Base retriever (e.g., FAISS retriever)
             llm: LangChain-compatible LLM for query expansion
+            partitions: Per-(grade, subject) indexes written by ingest.py, searched before the base retriever
+            lexical: BM25 searcher whose results are fused with the vector results
         """
         self.base_retriever = retriever
+        self.partitions = partitions
+        self.lexical = lexical
         self.llm = llm or ChatEuriai(task_type="chat", complexity="simple")
 
         # Query expansion prompt
@@ -74,7 +90,7 @@ Provide a clear, grade-appropriate explanation:"""
                 subject=subject,
                 grade=grade
             )
-            response = self.llm.invoke([HumanMessage(content=prompt)])
+            response = self.llm.invoke([HumanMessage(content=prompt)], cache_task="query_expansion")
             queries = [q.strip() for q in response.content.strip().split('\n') if q.strip()]
             # Include original query
             return [question] + queries[:3]
@@ -122,6 +138,80 @@ Provide a clear, grade-appropriate explanation:"""
                 unique.append(doc)
         return unique
 
+    def _batch_vectorstore(self) -> Optional[FAISS]:
+        """The retriever's FAISS store if its searches can run as one matrix search."""
+        vectorstore = getattr(self.base_retriever, "vectorstore", None)
+        if not isinstance(vectorstore, FAISS):
+            return None
+        if getattr(self.base_retriever, "search_type", "similarity") != "similarity":
+            return None
+        # Metadata filters and thresholds need the per-query FAISS code path
+        search_kwargs = getattr(self.base_retriever, "search_kwargs", {}) or {}
+        if set(search_kwargs) - {"k"}:
+            return None
+        if not hasattr(vectorstore.embedding_function, "embed_queries"):
+            return None
+        return vectorstore
+
+    def _search_batch(self, vectorstore: FAISS, queries: List[str]) -> List[List[Document]]:
+        """Embed all queries in one call and search FAISS with the whole query matrix."""
+        with retrieval_seconds.time(stage="embedding"):
+            vectors = [v for v in vectorstore.embedding_function.embed_queries(queries) if v]
+        if not vectors:
+            return []
+
+        hits = search_by_vectors(vectorstore, vectors, self._search_k())
+        return [[doc for doc, _ in query_hits] for query_hits in hits]
+
+    def _search_each(self, queries: List[str]) -> List[List[Document]]:
+        """Invoke the retriever for every query concurrently, keeping query order."""
+        def search(query: str) -> List[Document]:
+            try:
+                return self.base_retriever.invoke(query)
+            except Exception:
+                return []
+
+        if len(queries) == 1:
+            return [search(queries[0])]
+        return list(_search_executor.map(search, queries))
+
+    def _preload_partitions(self, subject: str, grade: str):
+        if self.partitions is not None:
+            try:
+                self.partitions.preload(subject, grade)
+            except Exception:
+                pass  # The search falls back to the global index
+
+    def _search_k(self) -> int:
+        return (getattr(self.base_retriever, "search_kwargs", {}) or {}).get("k", 4)
+
+    def _vector_search(self, queries: List[str], subject: str, grade: str) -> List[List[Document]]:
+        """One ranked list per query: grade/subject partitions, else the global index."""
+        if self.partitions is not None:
+            try:
+                grouped = self.partitions.search_grouped(queries, subject, grade, k=self._search_k())
+                if grouped is not None:
+                    return grouped
+            except Exception:
+                pass  # Fall back to the global index
+        vectorstore = self._batch_vectorstore()
+        if vectorstore is None:
+            return self._search_each(queries)
+        try:
+            return self._search_batch(vectorstore, queries)
+        except Exception:
+            return self._search_each(queries)
+
+    def _search(self, queries: List[str], subject: str, grade: str) -> Tuple[List[Document], str]:
+        """Results for the queries and the retrieval mode ("vector" without a BM25 index)."""
+        if self.lexical is not None:
+            # A first-use partition load must not count against the vector search timeout
+            self._preload_partitions(subject, grade)
+            return self.lexical.search(
+                queries, lambda: self._vector_search(queries, subject, grade), self._search_k(), subject, grade
+            )
+        return [doc for docs in self._vector_search(queries, subject, grade) for doc in docs], "vector"
+
     def retrieve(
         self,
         question: str,
@@ -146,29 +236,32 @@ Provide a clear, grade-appropriate explanation:"""
         if not self.base_retriever:
             return []
 
-        all_docs = []
-
-        if use_query_expansion:
-            # Get expanded queries
-            queries = self._expand_query(question, subject, grade)
-
-            # Retrieve for each query
-            for query in queries:
-                try:
-                    docs = self.base_retriever.invoke(query)
-                    all_docs.extend(docs)
-                except Exception:
-                    continue
-        else:
-            try:
-                all_docs = self.base_retriever.invoke(question)
-            except Exception:
-                return []
-
-        # Filter and deduplicate
-        filtered = self._filter_by_subject(all_docs, subject)
-        unique = self._deduplicate_docs(filtered)
-
+        # Cached results are resolved through the global index's docstore
+        docstore = getattr(getattr(self.base_retriever, "vectorstore", None), "docstore", None)
+        cache_key = retrieval_cache.make_key("rag", question, subject, grade, k, use_query_expansion)
+        if docstore is not None:
+            cached = retrieval_cache.get(cache_key, docstore.search)
+            if cached is not None:
+                return cached
+
+        with retrieval_seconds.time(stage="total"):
+            if use_query_expansion:
+                # Get expanded queries
+                with retrieval_seconds.time(stage="expansion"):
+                    queries = self._expand_query(question, subject, grade)
+            else:
+                queries = [question]
+
+            # One batched embedding call and one vector search for all queries (fused with BM25 if loaded)
+            with retrieval_seconds.time(stage="search"):
+                all_docs, mode = self._search(queries, subject, grade)
+
+            # Filter and deduplicate
+            filtered = self._filter_by_subject(all_docs, subject)
+            unique = self._deduplicate_docs(filtered)
+
+        if docstore is not None:
+            retrieval_cache.set(cache_key, unique[:k], docstore.search, mode)
         return unique[:k]
 
     def get_context_string(self, docs: List[Document]) -> str:
@@ -299,6 +392,8 @@ Provide a clear, grade-appropriate explanation:"""
         return chain
 
 
-def create_rag_pipeline(retriever, llm: Optional[ChatEuriai] = None) -> EnhancedRAGPipeline:
+def create_rag_pipeline(retriever, llm: Optional[ChatEuriai] = None,
+                        partitions: Optional[PartitionedRetriever] = None,
+                        lexical: Optional[HybridSearcher] = None) -> EnhancedRAGPipeline:
     """Factory function to create an enhanced RAG pipeline."""
-    return EnhancedRAGPipeline(retriever, llm)
+    return EnhancedRAGPipeline(retriever, llm, partitions, lexical)
@@ -4,9 +4,12 @@ Optimized Multi-Agent Configuration for Subject-Specific AI Tutors
 Uses intelligent model selection from available EuriAI models.
 """
 
+import asyncio
 from typing import Dict
 import re
+from ..utils.metrics import retrieval_seconds
 from .framework import euriai_framework
+from .retrieval_cache import retrieval_cache
 
 # Optimized Agent Configurations with Available EuriAI Models
 AGENT_CONFIGS = {
@@ -40,20 +43,54 @@ AGENT_CONFIGS = {
 class SubjectExpert:
     """A streamlined agent that uses the EuriaiModelFramework for all AI interactions."""
 
-    def __init__(self, agent_type: str, retriever=None):
+    def __init__(self, agent_type: str, retriever=None, partitions=None, lexical=None):
         if agent_type not in AGENT_CONFIGS:
             raise ValueError(f"Unknown agent type: {agent_type}")
 
         self.config = AGENT_CONFIGS[agent_type]
         self.retriever = retriever
-
-    def get_context(self, query: str, subject: str = None) -> str:
+        # Optional PartitionedRetriever: searches only the request's grade/subject indexes
+        self.partitions = partitions
+        # Optional HybridSearcher: BM25 results fused in, and used alone while embeddings are down
+        self.lexical = lexical
+
+    def _vector_search(self, query: str, subject: str = None, grade: str = None):
+        if self.partitions is not None:
+            try:
+                docs = self.partitions.search([query], subject, grade)
+                if docs is not None:
+                    return docs
+            except Exception:
+                pass  # Fall back to the global index
+        return self.retriever.invoke(query)
+
+    def _search(self, query: str, subject: str = None, grade: str = None):
+        if self.lexical is not None:
+            k = (getattr(self.retriever, "search_kwargs", {}) or {}).get("k", 5)
+            # A first-use partition load must not count against the vector search timeout
+            if self.partitions is not None:
+                try:
+                    self.partitions.preload(subject, grade)
+                except Exception:
+                    pass  # The search falls back to the global index
+            return self.lexical.search([query], lambda: [self._vector_search(query, subject, grade)], k, subject, grade)
+        return self._vector_search(query, subject, grade), "vector"
+
+    def get_context(self, query: str, subject: str = None, grade: str = None) -> str:
         """Gets relevant context from the retriever, if available."""
         if not self.retriever:
             return ""
 
+        # Cached results are resolved through the global index's docstore
+        docstore = getattr(getattr(self.retriever, "vectorstore", None), "docstore", None)
+        cache_key = retrieval_cache.make_key("context", query, subject, grade, 3)
         try:
-            docs = self.retriever.invoke(query)
+            cached = retrieval_cache.get(cache_key, docstore.search) if docstore is not None else None
+            if cached is not None:
+                return "\n".join([doc.page_content for doc in cached])
+
+            with retrieval_seconds.time(stage="search"):
+                docs, mode = self._search(query, subject, grade)
             if subject:
                 def subject_key(value: str) -> str:
                     s = (value or "").strip().lower()
@@ -75,17 +112,21 @@ class SubjectExpert:
                 if filtered:
                     docs = filtered
 
+            if docstore is not None:
+                retrieval_cache.set(cache_key, docs[:3], docstore.search, mode)
             return "\n".join([doc.page_content for doc in docs[:3]])
         except Exception:
             return "" # Return empty string on error
 
-    def process_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium") -> str:
-        """Processes a request using the Euriai framework with appropriate context and prompting."""
-
-        context = self.get_context(context_query or user_input, subject) if self.retriever else ""
+    async def aget_context(self, query: str, subject: str = None, grade: str = None) -> str:
+        """Async variant of get_context; the vector search runs off the event loop."""
+        if not self.retriever:
+            return ""
+        return await asyncio.to_thread(self.get_context, query, subject, grade)
 
-        # Construct a detailed prompt that guides the AI
-        enhanced_prompt = f"""
+    def _build_prompt(self, user_input: str, context: str) -> str:
+        """Construct a detailed prompt that guides the AI."""
+        return f"""
         **Role:** {self.config['role']}
         **Goal:** {self.config['goal']}
         **Task:** Respond to the student's request below.
@@ -97,8 +138,28 @@ class SubjectExpert:
         {user_input}
         """
 
+    def process_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium") -> str:
+        """Processes a request using the Euriai framework with appropriate context and prompting."""
+
+        context = self.get_context(context_query or user_input, subject, grade) if self.retriever else ""
+
         result = euriai_framework.generate_response(
-            prompt=enhanced_prompt,
+            prompt=self._build_prompt(user_input, context),
+            task_type=self.config.get("task_type", "chat"),
+            complexity=complexity,
+            subject=subject or self.config.get("task_type"),
+            grade=grade
+        )
+
+        return result["response"]
+
+    async def aprocess_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium") -> str:
+        """Async variant of process_request."""
+
+        context = await self.aget_context(context_query or user_input, subject, grade)
+
+        result = await euriai_framework.agenerate_response(
+            prompt=self._build_prompt(user_input, context),
             task_type=self.config.get("task_type", "chat"),
             complexity=complexity,
             subject=subject or self.config.get("task_type"),
@@ -107,6 +168,6 @@ class SubjectExpert:
 
         return result["response"]
 
-def create_agent(agent_type: str, retriever=None) -> SubjectExpert:
+def create_agent(agent_type: str, retriever=None, partitions=None, lexical=None) -> SubjectExpert:
     """Factory function to create subject expert agents."""
-    return SubjectExpert(agent_type, retriever)
+    return SubjectExpert(agent_type, retriever, partitions, lexical)
@@ -0,0 +1,178 @@
+"""
+LLM Response Cache for AI Tutor.
+Two-tier (in-memory LRU + SQLite) cache for deterministic prompts such as
+quiz generation, intent detection and query expansion.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from ..utils.sqlite_cache import SQLiteCacheTier
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(CURRENT_DIR, "..", "..", "data", "cache", "llm_cache.db")
+
+
+class LLMResponseCache:
+    """
+    Opt-in response cache keyed by (model, normalized prompt hash, temperature, max_tokens).
+
+    Features:
+    - In-memory LRU tier for hot entries
+    - SQLite tier that survives restarts
+    - TTL expiry and size-based (least recently used) eviction in both tiers
+    - Per-task enable/disable
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        task_types: Optional[Iterable[str]] = None,
+        ttl_seconds: int = 86400,
+        max_entries: int = 1000,
+        db_path: Optional[str] = None,
+        max_db_entries: int = 20000,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            enabled: Master switch; when False every lookup is a no-op
+            task_types: Task types to cache (e.g. "quiz", "intent", "query_expansion")
+            ttl_seconds: Entry lifetime in seconds
+            max_entries: Maximum entries in the in-memory tier
+            db_path: SQLite file for the persistent tier (None disables it)
+            max_db_entries: Maximum entries in the SQLite tier
+        """
+        self.enabled = enabled
+        self.task_types = {t.strip().lower() for t in (task_types or []) if t.strip()}
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+
+        # Storage: {key: (expires_at, value)}
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = SQLiteCacheTier(db_path, "llm_cache", max_entries=max_db_entries)
+
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        """Build a cache from LLM_CACHE_* environment variables."""
+        return cls(
+            enabled=os.environ.get("LLM_CACHE_ENABLED", "false").lower() == "true",
+            task_types=os.environ.get("LLM_CACHE_TASK_TYPES", "quiz,intent,query_expansion").split(","),
+            ttl_seconds=int(os.environ.get("LLM_CACHE_TTL_SECONDS", "86400")),
+            max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1000")),
+            db_path=os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+            max_db_entries=int(os.environ.get("LLM_CACHE_MAX_DB_ENTRIES", "20000")),
+        )
+
+    # ----------------------------------------------------------
+    # Keys and configuration
+    # ----------------------------------------------------------
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Build a cache key; prompts are whitespace-normalized before hashing."""
+        normalized = re.sub(r"\s+", " ", prompt or "").strip()
+        prompt_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{model}:{prompt_hash}:{float(temperature):.3f}:{int(max_tokens)}"
+
+    def is_enabled_for(self, task_type: str) -> bool:
+        """Check whether responses for this task type should be cached."""
+        return self.enabled and (task_type or "").lower() in self.task_types
+
+    def set_task_enabled(self, task_type: str, enabled: bool = True):
+        """Enable or disable caching for a single task type at runtime."""
+        task_type = task_type.strip().lower()
+        if enabled:
+            self.task_types.add(task_type)
+        else:
+            self.task_types.discard(task_type)
+
+    # ----------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------
+    def _memory_set(self, key: str, value: Dict, expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a cached response, checking memory first, then SQLite."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return dict(value)
+                del self._memory[key]
+
+        try:
+            stored = self._db.get(key, now)
+        except sqlite3.Error:
+            stored = None
+
+        if stored is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        value, expires_at = json.loads(stored[0]), stored[1]
+        self._memory_set(key, value, expires_at)
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+        return dict(value)
+
+    def set(self, key: str, value: Dict):
+        """Store a response in both tiers."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+
+        self._memory_set(key, value, expires_at)
+        try:
+            evicted = self._db.set(key, json.dumps(value), expires_at, now)
+        except sqlite3.Error:
+            evicted = 0  # The memory tier still serves the entry
+
+        with self._lock:
+            self._stats["writes"] += 1
+            self._stats["evictions"] += evicted
+
+    def clear(self):
+        """Drop all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        self._db.clear()
+
+    def stats(self) -> Dict:
+        """Get cache hit/miss counters and configuration."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._db),
+                "enabled": self.enabled,
+                "task_types": sorted(self.task_types),
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,162 @@
+"""
+Retrieval Result Cache for AI Tutor.
+Remembers which chunks a (question, subject, grade, k) retrieval returned, so
+repeated curriculum questions skip query expansion, embeddings and FAISS.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ..utils.metrics import retrieval_cache_lookups_total
+from .partitioned_retriever import grade_numbers, subject_key
+
+# Written by ingest.py next to the FAISS files; changes whenever the index is rebuilt
+VERSION_FILE = "index_version"
+
+# Retrieval modes whose results are cached; BM25-only results from an embeddings
+# outage (see HybridSearcher.search) are not, so they end with the outage
+CACHEABLE_MODES = {"vector", "hybrid"}
+
+
+def index_version(vector_store_path: str) -> Optional[str]:
+    """Version stamp of a saved index (its version file, else the index file's mtime)."""
+    try:
+        with open(os.path.join(vector_store_path, VERSION_FILE), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        pass
+    try:
+        return str(os.path.getmtime(os.path.join(vector_store_path, "index.faiss")))
+    except OSError:
+        return None
+
+
+class RetrievalCache:
+    """
+    LRU + TTL cache of retrieval results.
+
+    Features:
+    - Keyed by (caller, normalized question, subject, grade, k, ...)
+    - Stores docstore ids only; documents are looked up again on a hit
+    - Empty and degraded (BM25-only) results are never stored
+    - Cleared whenever a different index version is loaded (set_version)
+    - Hit ratio in stats() and tutor_retrieval_cache_lookups_total
+    """
+
+    def __init__(self, enabled: bool = True, ttl_seconds: int = 3600, max_entries: int = 5000):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+
+        # Storage: {key: (expires_at, doc_ids)}
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "skipped": 0, "evictions": 0, "invalidations": 0}
+
+    @classmethod
+    def from_env(cls) -> "RetrievalCache":
+        """Build a cache from RETRIEVAL_CACHE_* environment variables."""
+        return cls(
+            enabled=os.environ.get("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true",
+            ttl_seconds=int(os.environ.get("RETRIEVAL_CACHE_TTL_SECONDS", "3600")),
+            max_entries=int(os.environ.get("RETRIEVAL_CACHE_MAX_ENTRIES", "5000")),
+        )
+
+    @staticmethod
+    def make_key(caller: str, question: str, subject: Optional[str], grade: Optional[str], k: int, *extra) -> tuple:
+        """Cache key; question text is NFKC-normalized, casefolded and whitespace-collapsed."""
+        normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", question or "")).strip().casefold()
+        return (caller, normalized, subject_key(subject), tuple(sorted(grade_numbers(grade))), k, *extra)
+
+    def set_version(self, version: Optional[str]):
+        """Record the loaded index version, dropping every entry if it changed."""
+        with self._lock:
+            if version == self.version:
+                return
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self.version = version
+
+    # ----------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------
+    def _count(self, outcome: str):
+        with self._lock:
+            self._stats["hits" if outcome == "hit" else "misses"] += 1
+        retrieval_cache_lookups_total.inc(outcome=outcome)
+
+    def get(self, key: tuple, lookup: Callable[[str], object]) -> Optional[List[Document]]:
+        """Cached documents for a key, resolved with lookup (e.g. docstore.search); None on a miss."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        docs = [lookup(doc_id) for doc_id in entry[1]] if entry is not None else None
+        if docs is None or not all(isinstance(doc, Document) for doc in docs):
+            self._count("miss")
+            return None
+        self._count("hit")
+        return docs
+
+    def set(self, key: tuple, docs: List[Document], lookup: Callable[[str], object], mode: str = "vector"):
+        """
+        Store the ids of docs retrieved in the given mode. Skipped for empty results,
+        modes outside CACHEABLE_MODES, or documents that can't be found again through lookup.
+        """
+        if not self.enabled:
+            return
+        doc_ids = tuple(doc.id for doc in docs)
+        if (
+            not doc_ids
+            or mode not in CACHEABLE_MODES
+            or not all(doc_id and isinstance(lookup(doc_id), Document) for doc_id in doc_ids)
+        ):
+            with self._lock:
+                self._stats["skipped"] += 1
+            return
+
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, doc_ids)
+            self._entries.move_to_end(key)
+            self._stats["writes"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Get cache hit/miss counters and configuration."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "enabled": self.enabled,
+                "index_version": self.version,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Shared by EnhancedRAGPipeline.retrieve and SubjectExpert.get_context
+retrieval_cache = RetrievalCache.from_env()
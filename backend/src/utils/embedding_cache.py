@@ -0,0 +1,177 @@
+"""
+Query Embedding Cache for AI Tutor.
+Two-tier (in-memory LRU + optional SQLite) cache of query vectors, so repeated
+student questions and the original question of every expanded query skip the
+embeddings API.
+"""
+
+import array
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import embedding_cache_lookups_total
+from .sqlite_cache import SQLiteCacheTier
+
+
+class EmbeddingCache:
+    """
+    Query vector cache keyed by (model, normalized text).
+
+    Features:
+    - In-memory LRU tier, bounded by entry count
+    - Optional SQLite tier storing float32 blobs (4 bytes per dimension) that survives restarts
+    - TTL expiry in both tiers; size-based (least recently used) eviction
+    - Hit ratio in stats() and tutor_embedding_cache_lookups_total
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl_seconds: int = 7 * 86400,
+        max_entries: int = 10000,
+        db_path: Optional[str] = None,
+        max_db_entries: int = 200000,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            enabled: Master switch; when False every lookup is a miss and nothing is stored
+            ttl_seconds: Entry lifetime in seconds
+            max_entries: Maximum vectors in the in-memory tier
+            db_path: SQLite file for the persistent tier (None keeps the cache in memory only)
+            max_db_entries: Maximum vectors in the SQLite tier
+        """
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+
+        # Storage: {key: (expires_at, vector)}
+        self._memory: "OrderedDict[str, Tuple[float, Tuple[float, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = SQLiteCacheTier(db_path, "embedding_cache", value_column="vector", value_type="BLOB",
+                                   max_entries=max_db_entries)
+
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        """Build a cache from EMBEDDING_CACHE_* environment variables."""
+        return cls(
+            enabled=os.environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true",
+            ttl_seconds=int(os.environ.get("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 86400))),
+            max_entries=int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "10000")),
+            db_path=os.environ.get("EMBEDDING_CACHE_PATH") or None,
+            max_db_entries=int(os.environ.get("EMBEDDING_CACHE_MAX_DB_ENTRIES", "200000")),
+        )
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Build a cache key; text is NFKC-normalized, casefolded and whitespace-collapsed."""
+        normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip().casefold()
+        return f"{model}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+    # ----------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------
+    def _memory_set(self, key: str, vector: Tuple[float, ...], expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, vector)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _count(self, outcome: str):
+        with self._lock:
+            if outcome == "miss":
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats[f"{outcome}_hits"] += 1
+        embedding_cache_lookups_total.inc(outcome=outcome)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Cached vector for a query, checking memory first, then SQLite."""
+        if not self.enabled:
+            return None
+        key = self.make_key(model, text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                else:
+                    del self._memory[key]
+                    entry = None
+        if entry is not None:
+            self._count("memory")
+            return list(vector)
+
+        try:
+            stored = self._db.get(key, now)
+        except sqlite3.Error:
+            stored = None
+        if stored is None:
+            self._count("miss")
+            return None
+
+        vector, expires_at = tuple(array.array("f", stored[0])), stored[1]
+        self._memory_set(key, vector, expires_at)
+        self._count("disk")
+        return list(vector)
+
+    def set(self, model: str, text: str, vector: List[float]):
+        """Store a query vector in both tiers (empty vectors from failed calls are ignored)."""
+        if not self.enabled or not vector:
+            return
+        key = self.make_key(model, text)
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        stored = tuple(vector)
+
+        self._memory_set(key, stored, expires_at)
+        try:
+            evicted = self._db.set(key, array.array("f", stored).tobytes(), expires_at, now)
+        except sqlite3.Error:
+            evicted = 0  # The memory tier still serves the entry
+
+        with self._lock:
+            self._stats["writes"] += 1
+            self._stats["evictions"] += evicted
+
+    def clear(self):
+        """Drop all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        self._db.clear()
+
+    def stats(self) -> Dict:
+        """Get cache hit/miss counters and configuration."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._db),
+                "enabled": self.enabled,
+                "persistent": bool(self.db_path),
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Shared by every EuriaiEmbeddings instance (AI_Tutor's retriever, SubjectExpert, EnhancedRAGPipeline)
+embedding_cache = EmbeddingCache.from_env()
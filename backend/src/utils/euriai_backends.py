@@ -0,0 +1,505 @@
+"""
+Pluggable EuriAI backends.
+Live HTTP, a deterministic offline stub, and record/replay against a cassette file.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from dotenv import load_dotenv
+
+from .euriai_http import DEFAULT_TIMEOUT, euriai_http_client
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CASSETTE_PATH = os.path.join(CURRENT_DIR, "..", "..", "data", "cassettes", "euriai.jsonl")
+
+BACKEND_MODES = ("http", "stub", "record", "replay")
+
+# Vocabulary for varying stub quiz questions between prompts
+_STUB_FOCUS_WORDS = (
+    "roots", "leaves", "energy", "water", "light", "soil", "growth", "seeds",
+    "cells", "air", "heat", "motion", "shape", "colour", "sound", "time",
+)
+
+load_dotenv()
+
+
+class CassetteMiss(KeyError):
+    """Raised in strict replay mode when a request was never recorded."""
+
+
+# ----------------------------------------------------------
+# Latency simulation
+# ----------------------------------------------------------
+class LatencyProfile:
+    """
+    Simulated latency distribution for stub calls.
+
+    Supports "fixed", "uniform" (median * [1 - jitter, 1 + jitter]) and
+    "lognormal" (median with sigma = jitter, giving a realistic long tail).
+    Samples are drawn from the caller's RNG so runs are reproducible.
+    """
+
+    def __init__(self, distribution: str = "lognormal", median_ms: float = 0.0, jitter: float = 0.5):
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.jitter = jitter
+
+    @classmethod
+    def from_env(cls, prefix: str, median_ms: float) -> "LatencyProfile":
+        """Read <prefix>_LATENCY_MS, <prefix>_LATENCY_JITTER and <prefix>_LATENCY_DISTRIBUTION."""
+        return cls(
+            distribution=os.environ.get(f"{prefix}_LATENCY_DISTRIBUTION", "lognormal"),
+            median_ms=float(os.environ.get(f"{prefix}_LATENCY_MS", str(median_ms))),
+            jitter=float(os.environ.get(f"{prefix}_LATENCY_JITTER", "0.5")),
+        )
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            ms = self.median_ms
+        elif self.distribution == "uniform":
+            ms = self.median_ms * rng.uniform(1 - self.jitter, 1 + self.jitter)
+        else:
+            ms = self.median_ms * math.exp(rng.gauss(0, self.jitter))
+        return max(0.0, ms) / 1000.0
+
+
+# ----------------------------------------------------------
+# Stub backend
+# ----------------------------------------------------------
+class StubBackend:
+    """
+    Deterministic offline stand-in for the EuriAI API.
+
+    Features:
+    - Quiz prompts get schema-valid JSON with the requested number of questions
+      (a {level: questions} object for multi-difficulty prompts)
+    - Query expansion and intent prompts get parseable answers
+    - Embeddings are fixed-dimension unit vectors derived from the text hash
+    - Configurable latency distributions and error rate for load/latency tests
+    """
+
+    requires_api_key = False
+
+    def __init__(
+        self,
+        chat_latency: Optional[LatencyProfile] = None,
+        embed_latency: Optional[LatencyProfile] = None,
+        embedding_dim: int = 768,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.chat_latency = chat_latency or LatencyProfile(median_ms=0)
+        self.embed_latency = embed_latency or LatencyProfile(median_ms=0)
+        self.embedding_dim = embedding_dim
+        self.error_rate = error_rate
+        self.seed = seed
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "StubBackend":
+        """Build a stub from EURIAI_STUB_* environment variables."""
+        return cls(
+            chat_latency=LatencyProfile.from_env("EURIAI_STUB_CHAT", 300),
+            embed_latency=LatencyProfile.from_env("EURIAI_STUB_EMBED", 30),
+            embedding_dim=int(os.environ.get("EURIAI_STUB_EMBEDDING_DIM", "768")),
+            error_rate=float(os.environ.get("EURIAI_STUB_ERROR_RATE", "0")),
+            seed=int(os.environ.get("EURIAI_STUB_SEED", "0")),
+        )
+
+    def _rng(self, *parts: Any) -> random.Random:
+        """RNG seeded from the request and a call counter: reproducible per run, varied per call."""
+        with self._lock:
+            self._calls += 1
+            call_number = self._calls
+        digest = hashlib.sha256(json.dumps([self.seed, call_number, *parts], default=str).encode("utf-8"))
+        return random.Random(digest.hexdigest())
+
+    def _maybe_fail(self, rng: random.Random, model: str):
+        if self.error_rate and rng.random() < self.error_rate:
+            raise ConnectionError(f"Stub backend injected failure for {model}")
+
+    # ----------------------------------------------------------
+    # Canned content
+    # ----------------------------------------------------------
+    @staticmethod
+    def _quiz_questions(prompt: str, count: int, difficulty: str, rng: random.Random) -> List[Dict]:
+        types_match = re.search(r"Allowed question types:\s*([^\n.]+)", prompt)
+        types = [t.strip() for t in types_match.group(1).split(",")] if types_match else ["mcq"]
+        topic_match = re.search(r'Chapter:\s*"([^"]*)"', prompt)
+        topic = topic_match.group(1) if topic_match else "this chapter"
+
+        # Distinguishes questions from different prompts (e.g. repair requests) and calls,
+        # like a sampled model; the focus words keep them apart under near-duplicate detection
+        digest = hashlib.sha256(f"{prompt}{rng.getrandbits(32)}".encode("utf-8")).digest()
+        variant = digest[:2].hex()
+
+        questions = []
+        for i in range(1, count + 1):
+            qtype = types[(i - 1) % len(types)]
+            letters = "AB" if qtype == "true_false" else "ABCD"
+            answer = (i - 1) % len(letters)
+            questions.append({
+                "id": f"Q{i}",
+                "type": qtype,
+                "question_text": (
+                    f"[{difficulty}] Question {i} about {topic}: "
+                    f"{' and '.join(_STUB_FOCUS_WORDS[b % len(_STUB_FOCUS_WORDS)] for b in digest[i * 3:i * 3 + 3])}? "
+                    f"({variant})"
+                ),
+                "options": (["True", "False"] if qtype == "true_false"
+                            else [f"Option {c} for question {i}" for c in letters]),
+                "correct_option_index": answer,
+                "explanation": f"Option {letters[answer]} is correct for question {i}.",
+                "difficulty": difficulty,
+                "interactive_element": "dropdown",
+            })
+            if '"explanation"' not in prompt:
+                del questions[-1]["explanation"]
+        return questions
+
+    def _completion_text(self, prompt: str, rng: random.Random) -> str:
+        quiz_match = re.search(r"Generate exactly (\d+) quiz questions", prompt)
+        levels_match = re.search(r"for each of these difficulty levels:\s*([^\n.]+)", prompt)
+        if quiz_match and levels_match:
+            levels = [lvl.strip().lower() for lvl in levels_match.group(1).split(",")]
+            count = int(quiz_match.group(1))
+            return json.dumps({lvl: self._quiz_questions(prompt, count, lvl, rng) for lvl in levels})
+
+        if quiz_match:
+            difficulty_match = re.search(r"Difficulty:\s*(\w+)", prompt)
+            difficulty = difficulty_match.group(1).lower() if difficulty_match else "basic"
+            return json.dumps(self._quiz_questions(prompt, int(quiz_match.group(1)), difficulty, rng))
+
+        if "Explain the correct answer to each of these" in prompt:
+            indexes = sorted({int(i) for i in re.findall(r'"index": (\d+)', prompt)})
+            return json.dumps([
+                {"index": i, "explanation": f"The correct answer to question {i + 1} follows from the chapter."}
+                for i in indexes
+            ])
+
+        if "alternative search queries" in prompt:
+            question = re.search(r"Original question:\s*(.+)", prompt)
+            base = question.group(1).strip() if question else "topic"
+            return "\n".join(f"{base} ({angle})" for angle in ("definition", "example", "key concepts"))
+
+        if "determine their intent" in prompt:
+            return "question"
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"This is a stub tutor answer ({digest}). Let's learn step by step!"
+
+    @staticmethod
+    def _completion_response(model: str, prompt: str, text: str) -> Dict:
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(text) // 4)
+        return {
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _embedding(self, model: str, text: str) -> List[float]:
+        rng = random.Random(hashlib.sha256(f"{model}:{text}".encode("utf-8")).hexdigest())
+        vector = [rng.gauss(0, 1) for _ in range(self.embedding_dim)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _embedding_response(self, model: str, text: Union[str, List[str]]) -> Dict:
+        texts = text if isinstance(text, list) else [text]
+        return {
+            "model": model,
+            "data": [{"index": i, "embedding": self._embedding(model, t)} for i, t in enumerate(texts)],
+        }
+
+    @staticmethod
+    def _chunks(text: str, size: int = 16) -> List[str]:
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    # ----------------------------------------------------------
+    # Client interface (mirrors EuriaiHttpClient)
+    # ----------------------------------------------------------
+    def chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                        max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        rng = self._rng("chat", model, prompt)
+        time.sleep(self.chat_latency.sample(rng))
+        self._maybe_fail(rng, model)
+        return self._completion_response(model, prompt, self._completion_text(prompt, rng))
+
+    async def achat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                               max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        rng = self._rng("chat", model, prompt)
+        await asyncio.sleep(self.chat_latency.sample(rng))
+        self._maybe_fail(rng, model)
+        return self._completion_response(model, prompt, self._completion_text(prompt, rng))
+
+    def stream_chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                               max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Iterator[str]:
+        rng = self._rng("chat", model, prompt)
+        chunks = self._chunks(self._completion_text(prompt, rng))
+        # The sampled latency is split between time to first token and the remaining chunks
+        total = self.chat_latency.sample(rng)
+        time.sleep(total / 2)
+        self._maybe_fail(rng, model)
+        for chunk in chunks:
+            yield chunk
+            time.sleep(total / 2 / len(chunks))
+
+    async def astream_chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                                      max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> AsyncIterator[str]:
+        rng = self._rng("chat", model, prompt)
+        chunks = self._chunks(self._completion_text(prompt, rng))
+        total = self.chat_latency.sample(rng)
+        await asyncio.sleep(total / 2)
+        self._maybe_fail(rng, model)
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(total / 2 / len(chunks))
+
+    def embed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        rng = self._rng("embed", model, text)
+        time.sleep(self.embed_latency.sample(rng))
+        self._maybe_fail(rng, model)
+        return self._embedding_response(model, text)
+
+    async def aembed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        rng = self._rng("embed", model, text)
+        await asyncio.sleep(self.embed_latency.sample(rng))
+        self._maybe_fail(rng, model)
+        return self._embedding_response(model, text)
+
+
+# ----------------------------------------------------------
+# Record / replay
+# ----------------------------------------------------------
+class Cassette:
+    """
+    JSONL file of recorded responses keyed by a request hash.
+
+    Each line is {"key", "kind", "model", "response"}; for streams the
+    response is the list of text chunks in arrival order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(kind: str, model: str, payload: Any) -> str:
+        body = json.dumps({"kind": kind, "model": model, "payload": payload}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry["response"]
+                except (ValueError, KeyError):
+                    continue  # Skip a truncated trailing line
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            return self._entries.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def put(self, key: str, kind: str, model: str, response: Any):
+        with self._lock:
+            self._entries[key] = response
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(
+                    {"key": key, "kind": kind, "model": model, "response": response}, ensure_ascii=False
+                ) + "\n")
+
+
+def _chat_request(prompt: str, temperature: float, max_tokens: int) -> Dict:
+    return {"prompt": prompt, "temperature": temperature, "max_tokens": max_tokens}
+
+
+class RecordingBackend:
+    """Passes calls through to another backend and appends every response to a cassette."""
+
+    def __init__(self, cassette: Cassette, inner=None):
+        self.cassette = cassette
+        self.inner = inner or euriai_http_client
+        self.requires_api_key = getattr(self.inner, "requires_api_key", True)
+
+    def chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                        max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = self.inner.chat_completion(model, prompt, temperature, max_tokens, timeout=timeout)
+        key = Cassette.make_key("chat", model, _chat_request(prompt, temperature, max_tokens))
+        self.cassette.put(key, "chat", model, response)
+        return response
+
+    async def achat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                               max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = await self.inner.achat_completion(model, prompt, temperature, max_tokens, timeout=timeout)
+        key = Cassette.make_key("chat", model, _chat_request(prompt, temperature, max_tokens))
+        self.cassette.put(key, "chat", model, response)
+        return response
+
+    def stream_chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                               max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Iterator[str]:
+        chunks = []
+        for delta in self.inner.stream_chat_completion(model, prompt, temperature, max_tokens, timeout=timeout):
+            chunks.append(delta)
+            yield delta
+        key = Cassette.make_key("stream", model, _chat_request(prompt, temperature, max_tokens))
+        self.cassette.put(key, "stream", model, chunks)
+
+    async def astream_chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                                      max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> AsyncIterator[str]:
+        chunks = []
+        async for delta in self.inner.astream_chat_completion(model, prompt, temperature, max_tokens, timeout=timeout):
+            chunks.append(delta)
+            yield delta
+        key = Cassette.make_key("stream", model, _chat_request(prompt, temperature, max_tokens))
+        self.cassette.put(key, "stream", model, chunks)
+
+    def embed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = self.inner.embed(model, text, timeout=timeout)
+        self.cassette.put(Cassette.make_key("embed", model, text), "embed", model, response)
+        return response
+
+    async def aembed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = await self.inner.aembed(model, text, timeout=timeout)
+        self.cassette.put(Cassette.make_key("embed", model, text), "embed", model, response)
+        return response
+
+
+class ReplayBackend:
+    """
+    Serves responses from a cassette without touching the network.
+
+    In strict mode an unrecorded request raises CassetteMiss; otherwise it is
+    answered by the fallback backend (the stub by default).
+    """
+
+    requires_api_key = False
+
+    def __init__(self, cassette: Cassette, strict: bool = True, fallback=None,
+                 latency: Optional[LatencyProfile] = None):
+        self.cassette = cassette
+        self.strict = strict
+        self.fallback = fallback or StubBackend()
+        self.latency = latency or LatencyProfile(median_ms=0)
+        self._rng = random.Random(0)
+
+    def _lookup(self, kind: str, model: str, payload: Any) -> Any:
+        key = Cassette.make_key(kind, model, payload)
+        response = self.cassette.get(key)
+        if response is None and self.strict:
+            raise CassetteMiss(f"No recorded {kind} response for {model} (key {key[:12]})")
+        return response
+
+    def chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                        max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = self._lookup("chat", model, _chat_request(prompt, temperature, max_tokens))
+        if response is None:
+            return self.fallback.chat_completion(model, prompt, temperature, max_tokens, timeout=timeout)
+        time.sleep(self.latency.sample(self._rng))
+        return response
+
+    async def achat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                               max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = self._lookup("chat", model, _chat_request(prompt, temperature, max_tokens))
+        if response is None:
+            return await self.fallback.achat_completion(model, prompt, temperature, max_tokens, timeout=timeout)
+        await asyncio.sleep(self.latency.sample(self._rng))
+        return response
+
+    def stream_chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                               max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> Iterator[str]:
+        chunks = self._lookup("stream", model, _chat_request(prompt, temperature, max_tokens))
+        if chunks is None:
+            yield from self.fallback.stream_chat_completion(model, prompt, temperature, max_tokens, timeout=timeout)
+            return
+        time.sleep(self.latency.sample(self._rng))
+        yield from chunks
+
+    async def astream_chat_completion(self, model: str, prompt: str, temperature: float = 0.7,
+                                      max_tokens: int = 4096, timeout: float = DEFAULT_TIMEOUT) -> AsyncIterator[str]:
+        chunks = self._lookup("stream", model, _chat_request(prompt, temperature, max_tokens))
+        if chunks is None:
+            async for delta in self.fallback.astream_chat_completion(
+                model, prompt, temperature, max_tokens, timeout=timeout
+            ):
+                yield delta
+            return
+        await asyncio.sleep(self.latency.sample(self._rng))
+        for delta in chunks:
+            yield delta
+
+    def embed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = self._lookup("embed", model, text)
+        if response is None:
+            return self.fallback.embed(model, text, timeout=timeout)
+        return response
+
+    async def aembed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        response = self._lookup("embed", model, text)
+        if response is None:
+            return await self.fallback.aembed(model, text, timeout=timeout)
+        return response
+
+
+def create_backend(mode: Optional[str] = None, cassette_path: Optional[str] = None):
+    """
+    Build the backend selected by EURIAI_BACKEND (http, stub, record or replay).
+
+    record/replay use EURIAI_CASSETTE_PATH; replay falls back to the stub for
+    unrecorded requests unless EURIAI_REPLAY_STRICT=true.
+    """
+    mode = (mode or os.environ.get("EURIAI_BACKEND", "http")).strip().lower()
+    if mode not in BACKEND_MODES:
+        raise ValueError(f"Unknown EURIAI_BACKEND '{mode}'; expected one of {', '.join(BACKEND_MODES)}")
+
+    if mode == "http":
+        return euriai_http_client
+    if mode == "stub":
+        return StubBackend.from_env()
+
+    cassette = Cassette(cassette_path or os.environ.get("EURIAI_CASSETTE_PATH") or DEFAULT_CASSETTE_PATH)
+    if mode == "record":
+        return RecordingBackend(cassette)
+    return ReplayBackend(
+        cassette,
+        strict=os.environ.get("EURIAI_REPLAY_STRICT", "false").lower() == "true",
+        fallback=StubBackend.from_env(),
+        latency=LatencyProfile.from_env("EURIAI_REPLAY", 0),
+    )
+
+
+# Shared backend used by the model framework and embeddings
+euriai_backend = create_backend()
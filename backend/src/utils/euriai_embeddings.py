@@ -1,36 +1,162 @@
 import os
-import requests
-from typing import List
+import time
+from typing import Dict, List
 from langchain_core.embeddings import Embeddings
 
+from .embedding_cache import embedding_cache
+from .euriai_backends import euriai_backend
+from .metrics import embedding_request_seconds, embedding_requests_total
+from .resilience import CallRejected, get_timeout, resilience
+from .singleflight import SingleFlight
+
+# Shared across instances so every retriever coalesces identical in-flight texts
+embedding_flight = SingleFlight("embeddings")
+
 
 class EuriaiEmbeddings(Embeddings):
     """Euriai API embeddings for LangChain."""
 
-    def __init__(self, model: str = "gemini-embedding-001"):
+    def __init__(self, model: str = "gemini-embedding-001", backend=None):
+        self.backend = backend or euriai_backend
         self.api_key = os.environ.get("EURIAI_API_KEY")
-        if not self.api_key:
+        if not self.api_key and getattr(self.backend, "requires_api_key", True):
             raise ValueError("EURIAI_API_KEY not found in .env file")
         self.model = model
 
-    def _embed(self, text: str) -> List[float]:
-        """Get embedding for a single text."""
+    def _record(self, start_time: float, error: Exception = None):
+        """Report one embedding call to the circuit breaker and metrics."""
+        latency = time.time() - start_time
+        resilience.record(self.model, latency, error)
+        embedding_request_seconds.observe(latency, model=self.model)
+        embedding_requests_total.inc(model=self.model, outcome="error" if error else "success")
+
+    def _request_embedding(self, text: str) -> List[float]:
+        """Call the embeddings API for a single text."""
+        try:
+            resilience.admit(self.model)
+        except CallRejected as e:
+            embedding_requests_total.inc(model=self.model, outcome="rejected")
+            print(f"Embedding API skipped: {e}")
+            return []
+
+        start_time = time.time()
+        try:
+            response = self.backend.embed(self.model, text, timeout=get_timeout(self.model))
+            embedding = response['data'][0]['embedding']
+        except Exception as e:
+            self._record(start_time, e)
+            print(f"Embedding API error: {e}")
+            return []
+        except BaseException:
+            # Caller was cancelled mid-call: free the slot, not a model failure
+            resilience.abandon(self.model)
+            raise
+
+        self._record(start_time)
+        return embedding
+
+    async def _arequest_embedding(self, text: str) -> List[float]:
+        """Async variant of _request_embedding."""
+        try:
+            await resilience.aadmit(self.model)
+        except CallRejected as e:
+            embedding_requests_total.inc(model=self.model, outcome="rejected")
+            print(f"Embedding API skipped: {e}")
+            return []
+
+        start_time = time.time()
         try:
-            response = requests.post(
-                "https://api.euron.one/api/v1/euri/embeddings",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"input": text, "model": self.model}
-            )
-            response.raise_for_status()
-            return response.json()['data'][0]['embedding']
+            response = await self.backend.aembed(self.model, text, timeout=get_timeout(self.model))
+            embedding = response['data'][0]['embedding']
         except Exception as e:
+            self._record(start_time, e)
             print(f"Embedding API error: {e}")
             return []
+        except BaseException:
+            # Caller was cancelled mid-call: free the slot, not a model failure
+            resilience.abandon(self.model)
+            raise
+
+        self._record(start_time)
+        return embedding
+
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Call the embeddings API once for a batch of texts (empty vectors if it fails)."""
+        try:
+            resilience.admit(self.model)
+        except CallRejected as e:
+            embedding_requests_total.inc(model=self.model, outcome="rejected")
+            print(f"Embedding API skipped: {e}")
+            return [[] for _ in texts]
+
+        start_time = time.time()
+        try:
+            response = self.backend.embed(self.model, texts, timeout=get_timeout(self.model))
+            data = sorted(response['data'], key=lambda item: item.get('index', 0))
+            embeddings = [item['embedding'] for item in data]
+            if len(embeddings) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(embeddings)}")
+        except Exception as e:
+            self._record(start_time, e)
+            print(f"Embedding API error: {e}")
+            return [[] for _ in texts]
+        except BaseException:
+            # Caller was cancelled mid-call: free the slot, not a model failure
+            resilience.abandon(self.model)
+            raise
+
+        self._record(start_time)
+        return embeddings
+
+    def _embed(self, text: str) -> List[float]:
+        """Get embedding for a single text (identical concurrent requests share one call)."""
+        return list(embedding_flight.do((self.model, text), lambda: self._request_embedding(text)))
+
+    async def _aembed(self, text: str) -> List[float]:
+        """Async variant of _embed."""
+        return list(await embedding_flight.ado((self.model, text), lambda: self._arequest_embedding(text)))
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed multiple documents."""
         return [self._embed(text) for text in texts]
 
     def embed_query(self, text: str) -> List[float]:
-        """Embed a query."""
-        return self._embed(text)
\ No newline at end of file
+        """Embed a query (served from the shared query embedding cache when possible)."""
+        cached = embedding_cache.get(self.model, text)
+        if cached is not None:
+            return cached
+        embedding = self._embed(text)
+        embedding_cache.set(self.model, text, embedding)
+        return embedding
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries with one API call for the uncached ones (repeated texts are sent once)."""
+        by_text = {}
+        for text in dict.fromkeys(texts):
+            cached = embedding_cache.get(self.model, text)
+            if cached is not None:
+                by_text[text] = cached
+
+        missing = [text for text in dict.fromkeys(texts) if text not in by_text]
+        if len(missing) == 1:
+            vectors = [self._embed(missing[0])]
+        else:
+            vectors = self._request_embeddings(missing) if missing else []
+        for text, vector in zip(missing, vectors):
+            embedding_cache.set(self.model, text, vector)
+            by_text[text] = vector
+        return [list(by_text[text]) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query without blocking a thread."""
+        cached = embedding_cache.get(self.model, text)
+        if cached is not None:
+            return cached
+        embedding = await self._aembed(text)
+        embedding_cache.set(self.model, text, embedding)
+        return embedding
+
+    @staticmethod
+    def get_stats() -> Dict:
+        """Get request coalescing and query cache counters."""
+        return {"singleflight": embedding_flight.stats(), "cache": embedding_cache.stats()}
\ No newline at end of file
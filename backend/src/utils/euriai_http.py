@@ -0,0 +1,233 @@
+"""
+Pooled HTTP client for the EuriAI REST API.
+Shares keep-alive connections across threads (requests) and coroutines (aiohttp).
+"""
+
+import asyncio
+import json
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = os.environ.get("EURIAI_API_BASE_URL", "https://api.euron.one/api/v1/euri")
+CHAT_COMPLETIONS_URL = f"{API_BASE_URL}/chat/completions"
+EMBEDDINGS_URL = f"{API_BASE_URL}/embeddings"
+
+# Every request carries a timeout so a slow provider cannot hold a worker forever
+CONNECT_TIMEOUT = float(os.environ.get("EURIAI_CONNECT_TIMEOUT_SECONDS", "5"))
+DEFAULT_TIMEOUT = float(os.environ.get("EURIAI_TIMEOUT_SECONDS", "30"))
+
+
+class EuriaiHttpClient:
+    """
+    Thread-safe, connection-pooled client for chat completions and embeddings.
+
+    The model is passed on every call instead of being stored on the client,
+    so a single instance can serve concurrent requests for different models.
+    """
+
+    requires_api_key = True
+
+    def __init__(self, api_key: Optional[str] = None, pool_size: Optional[int] = None):
+        self._api_key = api_key
+        self.pool_size = pool_size or int(os.environ.get("EURIAI_POOL_SIZE", "20"))
+
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        # aiohttp sessions are bound to the event loop that created them
+        self._async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    # ----------------------------------------------------------
+    # Session management
+    # ----------------------------------------------------------
+    @property
+    def api_key(self) -> Optional[str]:
+        """Resolved lazily so a later load_dotenv() is still honoured."""
+        return self._api_key or os.environ.get("EURIAI_API_KEY")
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    def _get_session(self) -> requests.Session:
+        """Lazily create the shared keep-alive session for sync callers."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self._headers())
+                    self._session = session
+        return self._session
+
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """Get the pooled aiohttp session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            session = aiohttp.ClientSession(connector=connector, headers=self._headers())
+            self._async_sessions[loop] = session
+        return session
+
+    def close(self):
+        """Close the sync session (async sessions close with aclose)."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    async def aclose(self):
+        """Close the aiohttp session bound to the running event loop."""
+        session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    # ----------------------------------------------------------
+    # Payloads
+    # ----------------------------------------------------------
+    @staticmethod
+    def _chat_payload(model: str, prompt: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+    @staticmethod
+    def _parse_stream_line(line: str) -> Optional[str]:
+        """Extract the text delta from one SSE line; None for keep-alives and [DONE]."""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+            return (chunk["choices"][0].get("delta") or {}).get("content")
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    # ----------------------------------------------------------
+    # Chat completions
+    # ----------------------------------------------------------
+    def chat_completion(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Dict:
+        """Request a non-streamed completion for the given model."""
+        response = self._get_session().post(
+            CHAT_COMPLETIONS_URL,
+            json=self._chat_payload(model, prompt, temperature, max_tokens),
+            timeout=(CONNECT_TIMEOUT, timeout),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def achat_completion(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Dict:
+        """Async variant of chat_completion; does not block a worker thread."""
+        session = self._get_async_session()
+        async with session.post(
+            CHAT_COMPLETIONS_URL,
+            json=self._chat_payload(model, prompt, temperature, max_tokens),
+            timeout=aiohttp.ClientTimeout(total=timeout, connect=CONNECT_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    def stream_chat_completion(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Iterator[str]:
+        """Stream a completion, yielding text deltas as they arrive (timeout applies per read)."""
+        payload = self._chat_payload(model, prompt, temperature, max_tokens)
+        payload["stream"] = True
+
+        with self._get_session().post(
+            CHAT_COMPLETIONS_URL, json=payload, stream=True, timeout=(CONNECT_TIMEOUT, timeout)
+        ) as response:
+            response.raise_for_status()
+            for raw in response.iter_lines():
+                if not raw:
+                    continue
+                delta = self._parse_stream_line(raw.decode("utf-8", errors="ignore"))
+                if delta:
+                    yield delta
+
+    async def astream_chat_completion(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> AsyncIterator[str]:
+        """Async variant of stream_chat_completion."""
+        payload = self._chat_payload(model, prompt, temperature, max_tokens)
+        payload["stream"] = True
+
+        session = self._get_async_session()
+        async with session.post(
+            CHAT_COMPLETIONS_URL,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(sock_read=timeout, connect=CONNECT_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            async for raw in response.content:
+                delta = self._parse_stream_line(raw.decode("utf-8", errors="ignore"))
+                if delta:
+                    yield delta
+
+    # ----------------------------------------------------------
+    # Embeddings
+    # ----------------------------------------------------------
+    def embed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        """Request embeddings for a string or a batch of strings."""
+        response = self._get_session().post(
+            EMBEDDINGS_URL, json={"input": text, "model": model}, timeout=(CONNECT_TIMEOUT, timeout)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def aembed(self, model: str, text: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT) -> Dict:
+        """Async variant of embed."""
+        session = self._get_async_session()
+        async with session.post(
+            EMBEDDINGS_URL,
+            json={"input": text, "model": model},
+            timeout=aiohttp.ClientTimeout(total=timeout, connect=CONNECT_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+
+# Shared instance so every framework/embedding user reuses the same pool
+euriai_http_client = EuriaiHttpClient()
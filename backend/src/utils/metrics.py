@@ -0,0 +1,337 @@
+"""
+In-process metrics for the tutor stack.
+Counters and latency histograms rendered in the Prometheus text exposition format.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in (extra or {}).items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """Common label handling for counters and histograms."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        lines += [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram per label set.
+
+    Buckets let Prometheus compute quantiles across instances. A bounded window
+    of recent observations additionally gives exact p50/p95/p99 for this process,
+    exported as the `<name>_quantile` gauge and via snapshot().
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        window: int = 1024,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        # {labels: [bucket counts..., sum, count]}
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._recent: Dict[LabelKey, deque] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+                self._recent[key] = deque(maxlen=self.window)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+            self._recent[key].append(value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _quantiles(values: Sequence[float]) -> Dict[float, float]:
+        ordered = sorted(values)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Count, mean and recent p50/p95/p99 per label set (label values joined by '/')."""
+        with self._lock:
+            items = [(k, list(s), list(self._recent[k])) for k, s in self._series.items()]
+        result = {}
+        for key, series, recent in sorted(items):
+            quantiles = self._quantiles(recent)
+            result["/".join(key) or "all"] = {
+                "count": int(series[-1]),
+                "mean": series[-2] / series[-1] if series[-1] else 0.0,
+                "p50": quantiles[0.5],
+                "p95": quantiles[0.95],
+                "p99": quantiles[0.99],
+            }
+        return result
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(s), list(self._recent[k])) for k, s in self._series.items())
+
+        lines = self._header()
+        for key, series, _ in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': '+Inf'})} {int(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {int(series[-1])}")
+
+        if items:
+            lines.append(f"# HELP {self.name}_quantile Quantiles over the last {self.window} observations")
+            lines.append(f"# TYPE {self.name}_quantile gauge")
+            for key, _, recent in items:
+                for q, value in self._quantiles(recent).items():
+                    labels = _format_labels(self.labelnames, key, {"quantile": str(q)})
+                    lines.append(f"{self.name}_quantile{labels} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds named metrics and renders them for the /metrics endpoint."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = MetricsRegistry()
+
+# ----------------------------------------------------------
+# Tutor metrics
+# ----------------------------------------------------------
+llm_request_seconds = registry.histogram(
+    "tutor_llm_request_duration_seconds", "LLM call latency", ["model", "task_type"]
+)
+llm_first_token_seconds = registry.histogram(
+    "tutor_llm_first_token_seconds", "Time to first streamed token", ["model", "task_type"]
+)
+llm_requests_total = registry.counter(
+    "tutor_llm_requests_total", "LLM calls by outcome (success, error, rejected)", ["model", "task_type", "outcome"]
+)
+llm_tokens_total = registry.counter(
+    "tutor_llm_tokens_total", "Tokens reported by the provider", ["model", "task_type", "kind"]
+)
+embedding_request_seconds = registry.histogram(
+    "tutor_embedding_request_duration_seconds", "Embedding call latency", ["model"]
+)
+embedding_requests_total = registry.counter(
+    "tutor_embedding_requests_total", "Embedding calls by outcome", ["model", "outcome"]
+)
+embedding_cache_lookups_total = registry.counter(
+    "tutor_embedding_cache_lookups_total", "Query embedding cache lookups by outcome (memory, disk, miss)", ["outcome"]
+)
+retrieval_cache_lookups_total = registry.counter(
+    "tutor_retrieval_cache_lookups_total", "Retrieval result cache lookups by outcome (hit, miss)", ["outcome"]
+)
+retrieval_mode_total = registry.counter(
+    "tutor_retrieval_mode_total", "Hybrid retrievals by mode (hybrid, lexical, lexical_busy, lexical_timeout, lexical_error)", ["mode"]
+)
+retrieval_seconds = registry.histogram(
+    "tutor_retrieval_duration_seconds", "RAG retrieval latency by stage (expansion, embedding, search, total)", ["stage"]
+)
+http_request_seconds = registry.histogram(
+    "tutor_http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+db_request_seconds = registry.histogram(
+    "tutor_db_duration_seconds", "Total database time spent per HTTP request", ["route"]
+)
+db_queries_total = registry.counter(
+    "tutor_db_queries_total", "Database statements executed", ["route"]
+)
+quiz_generations_total = registry.counter(
+    "tutor_quiz_generations_total",
+    "Generated quiz levels by outcome (first_pass, repaired, incomplete)",
+    ["difficulty", "outcome"],
+)
+quiz_questions_total = registry.counter(
+    "tutor_quiz_questions_total", "Generated questions by validation outcome (valid, invalid)", ["difficulty", "outcome"]
+)
+quiz_repair_requests_total = registry.counter(
+    "tutor_quiz_repair_requests_total", "Follow-up requests for missing or invalid questions", ["difficulty"]
+)
+quiz_repair_tokens_total = registry.counter(
+    "tutor_quiz_repair_tokens_total", "Provider-reported tokens spent on repair requests", ["difficulty", "kind"]
+)
+quiz_bank_draws_total = registry.counter(
+    "tutor_quiz_bank_draws_total", "Quiz bank lookups by outcome (hit, miss)", ["difficulty", "outcome"]
+)
+quiz_bank_refills_total = registry.counter(
+    "tutor_quiz_bank_refills_total", "Background quiz bank generations by outcome (stored, duplicate, failed, busy)", ["difficulty", "outcome"]
+)
+quiz_explanations_total = registry.counter(
+    "tutor_quiz_explanations_total", "On-demand quiz explanations by outcome (cached, generated, missing)", ["outcome"]
+)
+quiz_adaptive_picks_total = registry.counter(
+    "tutor_quiz_adaptive_picks_total", "Adaptive quiz levels chosen, by history used (chapter, subject, none)", ["difficulty", "basis"]
+)
+question_duplicates_total = registry.counter(
+    "tutor_question_duplicates_total", "Near-duplicate questions skipped (flashcard, bank_quiz)", ["kind"]
+)
+quiz_prefetch_total = registry.counter(
+    "tutor_quiz_prefetch_total", "Next-chapter quiz prefetches by outcome (stored, duplicate, failed, cached, skipped, busy, dropped)", ["outcome"]
+)
+flashcard_writes_total = registry.counter(
+    "tutor_flashcard_writes_total", "Flashcards by background write outcome (saved, failed, dropped)", ["outcome"]
+)
+flashcard_write_batch_seconds = registry.histogram(
+    "tutor_flashcard_write_batch_seconds", "Time to persist one batch of flashcard sets"
+)
+
+
+# ----------------------------------------------------------
+# Per-request database timing
+# ----------------------------------------------------------
+class RequestTimings:
+    """Mutable per-request accumulator shared with worker threads via a context variable."""
+
+    __slots__ = ("db_seconds", "db_queries")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+
+current_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_request_timings", default=None)
+
+
+def instrument_engine(engine):
+    """Time every statement on a SQLAlchemy engine and add it to the current request."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        timings = current_request_timings.get()
+        if timings is not None:
+            timings.db_seconds += elapsed
+            timings.db_queries += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
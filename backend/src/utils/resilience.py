@@ -0,0 +1,419 @@
+"""
+Resilience primitives for EuriAI model calls.
+Per-model timeouts, adaptive token-bucket limiting and circuit breaking.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+# Per-model request timeouts in seconds; reasoning models get more headroom
+MODEL_TIMEOUTS = {
+    "gpt-4.1-nano": 20.0,
+    "gpt-4.1-mini": 30.0,
+    "gemini-2.5-flash": 20.0,
+    "gemini-2.5-pro": 60.0,
+    "deepseek-r1-distill-llama-70b": 60.0,
+    "llama-4-scout-17b-16e-instruct": 30.0,
+    "gemini-embedding-001": 10.0,
+}
+DEFAULT_TIMEOUT = float(os.environ.get("EURIAI_TIMEOUT_SECONDS", "30"))
+
+
+def get_timeout(model: str) -> float:
+    """Timeout for a model; EURIAI_TIMEOUT_<MODEL> env vars override the defaults."""
+    env_key = "EURIAI_TIMEOUT_" + "".join(c if c.isalnum() else "_" for c in model).upper()
+    if os.environ.get(env_key):
+        return float(os.environ[env_key])
+    return MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT)
+
+
+class CallRejected(Exception):
+    """Raised when a call is refused locally (breaker open or limiter queue timeout)."""
+
+
+class ModelBusy(CallRejected):
+    """Raised for background calls when interactive traffic kept the model busy past their deadline."""
+
+
+class BackgroundBudget:
+    """
+    Limits for model calls made as background work (see ResilienceManager.background).
+
+    Each call starts only while at most max_in_flight calls are in flight and none
+    are queued for a slot, across all models; after wait_seconds (for the whole
+    block, not per call) waiting calls raise ModelBusy and gave_up is set.
+    """
+
+    def __init__(self, max_in_flight: int = 2, wait_seconds: float = 60.0, poll_seconds: float = 0.5):
+        self.max_in_flight = max_in_flight
+        self.deadline = time.monotonic() + wait_seconds
+        self.poll_seconds = poll_seconds
+        self.gave_up = False
+
+    def wait(self) -> float:
+        """Seconds to sleep before checking again; raises ModelBusy once the deadline passed."""
+        if time.monotonic() >= self.deadline:
+            self.gave_up = True
+            raise ModelBusy("Model busy with interactive traffic")
+        return self.poll_seconds
+
+
+# Budget of the background block the current thread/task is running in, if any
+_background_budget: ContextVar[Optional[BackgroundBudget]] = ContextVar("llm_background_budget", default=None)
+
+
+class AdaptiveLimiter:
+    """
+    Token bucket plus concurrency cap for one model.
+
+    The refill rate adapts AIMD-style: it is halved when the provider throttles
+    or times out, and grows additively on success up to max_rate.
+    """
+
+    def __init__(self, max_rate: float = 10.0, min_rate: float = 0.5, burst: int = 10, max_concurrency: int = 8):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = max_rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """Take a token and a slot if available; otherwise return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+
+            if self._in_flight >= self.max_concurrency:
+                return 0.05
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+
+            self._tokens -= 1
+            self._in_flight += 1
+            return 0.0
+
+    def acquire(self, timeout: float):
+        """Block until the call may proceed; raises CallRejected after timeout."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._waiting += 1
+        try:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0.0:
+                    return
+                if time.monotonic() + wait > deadline:
+                    raise CallRejected("Rate limiter queue timeout")
+                time.sleep(min(wait, 0.05))
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    async def aacquire(self, timeout: float):
+        """Async variant of acquire; waits without blocking the event loop."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._waiting += 1
+        try:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0.0:
+                    return
+                if time.monotonic() + wait > deadline:
+                    raise CallRejected("Rate limiter queue timeout")
+                await asyncio.sleep(min(wait, 0.05))
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self, throttled: bool = False, adapt: bool = True):
+        """Free the slot and (unless adapt is False) adapt the rate to the outcome."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if not adapt:
+                return
+            if throttled:
+                self.rate = max(self.min_rate, self.rate / 2)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "rate_per_second": round(self.rate, 3),
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+            }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one model.
+
+    Trips open after consecutive failures or when most recent calls are slow,
+    rejects calls while open, then lets a single trial call through
+    (half-open) once reset_timeout has elapsed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 15.0,
+        slow_call_ratio: float = 0.5,
+        window_size: int = 20,
+        reset_timeout: float = 30.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_ratio = slow_call_ratio
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self._consecutive_failures = 0
+        self._window: deque = deque(maxlen=window_size)  # (success, latency)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected (without consuming a trial)."""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def _trip(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trips += 1
+
+    def record(self, success: bool, latency: float):
+        """Record a call outcome and update the breaker state."""
+        with self._lock:
+            self._window.append((success, latency))
+
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if success and latency < self.slow_call_seconds:
+                    self.state = self.CLOSED
+                    self._consecutive_failures = 0
+                    self._window.clear()
+                else:
+                    self._trip()
+                return
+
+            self._consecutive_failures = 0 if success else self._consecutive_failures + 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._trip()
+                return
+
+            # Latency spike: most of a reasonably full window was slow
+            if len(self._window) >= self._window.maxlen // 2:
+                slow = sum(1 for _, lat in self._window if lat >= self.slow_call_seconds)
+                if slow / len(self._window) >= self.slow_call_ratio:
+                    self._trip()
+
+    def abandon(self):
+        """Forget an admitted call that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._consecutive_failures,
+                "trips": self._trips,
+            }
+
+
+class ResilienceManager:
+    """Holds one breaker and one limiter per model."""
+
+    def __init__(
+        self,
+        max_rate: float = 10.0,
+        max_concurrency: int = 8,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        queue_timeout: float = 10.0,
+    ):
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.queue_timeout = queue_timeout
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResilienceManager":
+        """Build a manager from EURIAI_* environment variables."""
+        return cls(
+            max_rate=float(os.environ.get("EURIAI_MAX_RATE_PER_MODEL", "10")),
+            max_concurrency=int(os.environ.get("EURIAI_MAX_CONCURRENCY_PER_MODEL", "8")),
+            failure_threshold=int(os.environ.get("EURIAI_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.environ.get("EURIAI_BREAKER_RESET_SECONDS", "30")),
+            queue_timeout=float(os.environ.get("EURIAI_QUEUE_TIMEOUT_SECONDS", "10")),
+        )
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    # A call taking half its timeout counts as slow
+                    slow_call_seconds=get_timeout(model) / 2,
+                    reset_timeout=self.reset_timeout,
+                )
+            return self._breakers[model]
+
+    def limiter(self, model: str) -> AdaptiveLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = AdaptiveLimiter(
+                    max_rate=self.max_rate,
+                    burst=max(1, int(self.max_rate)),
+                    max_concurrency=self.max_concurrency,
+                )
+            return self._limiters[model]
+
+    def busy(self, max_in_flight: int = 0) -> bool:
+        """True while calls are queued for a slot or more than max_in_flight are in flight (all models)."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        in_flight = queued = 0
+        for limiter in limiters:
+            stats = limiter.stats()
+            in_flight += stats["in_flight"]
+            queued += stats["queue_depth"]
+        return queued > 0 or in_flight > max_in_flight
+
+    @contextmanager
+    def background(self, max_in_flight: int = 2, wait_seconds: float = 60.0,
+                   poll_seconds: float = 0.5) -> Iterator[BackgroundBudget]:
+        """
+        Run the model calls made inside (in this thread or task) as low-priority work:
+        every call, retries and repairs included, first waits for idle capacity.
+        """
+        budget = BackgroundBudget(max_in_flight, wait_seconds, poll_seconds)
+        token = _background_budget.set(budget)
+        try:
+            yield budget
+        finally:
+            _background_budget.reset(token)
+
+    def admit(self, model: str):
+        """Wait for a limiter slot and breaker permission; raises CallRejected."""
+        budget = _background_budget.get()
+        while budget is not None and self.busy(budget.max_in_flight):
+            time.sleep(budget.wait())
+        breaker = self.breaker(model)
+        if breaker.is_open():
+            raise CallRejected(f"Circuit open for {model}")
+        limiter = self.limiter(model)
+        limiter.acquire(self.queue_timeout)
+        if not breaker.allow():
+            limiter.release(adapt=False)
+            raise CallRejected(f"Circuit open for {model}")
+
+    async def aadmit(self, model: str):
+        """Async variant of admit."""
+        budget = _background_budget.get()
+        while budget is not None and self.busy(budget.max_in_flight):
+            await asyncio.sleep(budget.wait())
+        breaker = self.breaker(model)
+        if breaker.is_open():
+            raise CallRejected(f"Circuit open for {model}")
+        limiter = self.limiter(model)
+        await limiter.aacquire(self.queue_timeout)
+        if not breaker.allow():
+            limiter.release(adapt=False)
+            raise CallRejected(f"Circuit open for {model}")
+
+    def record(self, model: str, latency: float, error: Optional[BaseException] = None):
+        """Report the outcome of an admitted call; client errors (see is_model_failure) don't trip the breaker."""
+        self.breaker(model).record(not is_model_failure(error), latency)
+        self.limiter(model).release(throttled=is_throttle_error(error))
+
+    def abandon(self, model: str):
+        """Release an admitted call that was cancelled; neither breaker nor rate adapts."""
+        self.breaker(model).abandon()
+        self.limiter(model).release(adapt=False)
+
+    def is_available(self, model: str) -> bool:
+        """True unless the model's breaker is open (does not consume a trial call)."""
+        return not self.breaker(model).is_open()
+
+    def stats(self) -> Dict:
+        """Breaker state and limiter queue depth per model."""
+        with self._lock:
+            models = set(self._breakers) | set(self._limiters)
+        return {
+            model: {**self.breaker(model).stats(), **self.limiter(model).stats(), "timeout": get_timeout(model)}
+            for model in sorted(models)
+        }
+
+
+def error_status(error: Optional[BaseException]) -> Optional[int]:
+    """HTTP status carried by an error (httpx/requests response or aiohttp status), if any."""
+    return getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "status", None)
+
+
+def is_model_failure(error: Optional[BaseException]) -> bool:
+    """
+    Whether an error counts against the model's health. HTTP 4xx other than 408/429
+    (bad request, auth, prompt too long) is the caller's fault: the model answered.
+    """
+    if error is None:
+        return False
+    status = error_status(error)
+    return not (isinstance(status, int) and 400 <= status < 500 and status not in (408, 429))
+
+
+def is_throttle_error(error: Optional[BaseException]) -> bool:
+    """Whether an error means the provider is overloaded (429/503 or a timeout)."""
+    if error is None:
+        return False
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    status = error_status(error)
+    if status in (429, 503):
+        return True
+    return "timeout" in type(error).__name__.lower() or "timed out" in str(error).lower()
+
+
+# Shared across the framework and embeddings so limits apply per process
+resilience = ResilienceManager.from_env()
@@ -0,0 +1,125 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one upstream call.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """An in-flight sync call that followers wait on."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _AsyncCall:
+    """An in-flight async call and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses duplicate concurrent calls into a single execution.
+
+    Sync callers (threads) coalesce through `do`, async callers through `ado`.
+    The two paths are tracked separately because an asyncio future cannot be
+    awaited from another thread, and a thread cannot block an event loop.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # Keyed by (event loop id, key): tasks belong to the loop that made them
+        self._async_calls: Dict[Tuple[int, Hashable], _AsyncCall] = {}
+        self._stats = {"calls": 0, "executions": 0, "collapsed": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn once for all concurrent callers with the same key."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+            else:
+                self._stats["collapsed"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of do; fn is a zero-argument coroutine factory.
+
+        fn runs in its own task, so cancelling any one caller (the first one
+        included) does not cancel the call for the others; it is only
+        cancelled once every caller waiting on it has gone.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._async_calls.get(flight_key)
+            if call is None:
+                call = _AsyncCall(loop.create_task(fn()))
+                call.task.add_done_callback(lambda task: self._finish(flight_key, call))
+                self._async_calls[flight_key] = call
+                self._stats["executions"] += 1
+            else:
+                self._stats["collapsed"] += 1
+            call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.task.done()
+            if abandoned:
+                call.task.cancel()
+
+    def _finish(self, flight_key: Tuple[int, Hashable], call: "_AsyncCall"):
+        with self._lock:
+            if self._async_calls.get(flight_key) is call:
+                del self._async_calls[flight_key]
+        # Mark exceptions as retrieved even when every caller was cancelled
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict:
+        """Get call, execution and collapsed-call counters."""
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
@@ -0,0 +1,133 @@
+"""
+SQLite tier shared by the two-tier caches (LLM responses, query embeddings).
+Rows of (key, value, expires_at, last_access) with TTL expiry and least
+recently used eviction, kept off the full-table scans on the write path.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Optional, Tuple
+
+
+class SQLiteCacheTier:
+    """
+    Persistent key/value tier with TTL and LRU eviction.
+
+    Features:
+    - Lazily opened WAL database; one table per cache
+    - Indexed expires_at and last_access, so pruning and eviction never scan the table
+    - Running row count instead of COUNT(*) on every write (counted once on open,
+      so rows written by another process sharing the file are seen after a restart)
+    - Expired rows are pruned at most every prune_seconds (and dropped on read)
+    - Values are stored as given (TEXT or BLOB); callers encode and decode them
+    """
+
+    def __init__(self, path: Optional[str], table: str, value_column: str = "value", value_type: str = "TEXT",
+                 max_entries: int = 20000, prune_seconds: float = 60.0):
+        """
+        Args:
+            path: SQLite file (None disables the tier)
+            table: Table name, also the prefix of its indexes
+            value_column: Name of the value column
+            value_type: SQL type of the value column
+            max_entries: Rows kept before the least recently used are evicted
+            prune_seconds: Minimum interval between sweeps of expired rows
+        """
+        self.path = path
+        self.table = table
+        self.value_column = value_column
+        self.value_type = value_type
+        self.max_entries = max_entries
+        self.prune_seconds = prune_seconds
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._rows = 0
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        """Lazily open the database and count its rows once."""
+        if not self.path:
+            return None
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"key TEXT PRIMARY KEY, {self.value_column} {self.value_type} NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_last_access ON {self.table} (last_access)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_expires_at ON {self.table} (expires_at)")
+            conn.commit()
+            self._rows = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            self._db = conn
+        return self._db
+
+    def get(self, key: str, now: float) -> Optional[Tuple[Any, float]]:
+        """Stored (value, expires_at) for a key, or None if missing or expired."""
+        with self._lock:
+            db = self._get_db()
+            if db is None:
+                return None
+            row = db.execute(f"SELECT {self.value_column}, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._rows -= db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,)).rowcount
+                db.commit()
+                return None
+            db.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            db.commit()
+            return row[0], row[1]
+
+    def set(self, key: str, value: Any, expires_at: float, now: float) -> int:
+        """Store a value; returns how many least recently used rows were evicted."""
+        with self._lock:
+            db = self._get_db()
+            if db is None:
+                return 0
+            updated = db.execute(
+                f"UPDATE {self.table} SET {self.value_column} = ?, expires_at = ?, last_access = ? WHERE key = ?",
+                (value, expires_at, now, key),
+            ).rowcount
+            if not updated:
+                db.execute(
+                    f"INSERT INTO {self.table} (key, {self.value_column}, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._rows += 1
+
+            if now - self._last_prune >= self.prune_seconds:
+                self._prune(db, now)
+
+            evicted = 0
+            overflow = self._rows - self.max_entries
+            if overflow > 0:
+                evicted = db.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+                self._rows -= evicted
+            db.commit()
+            return evicted
+
+    def _prune(self, db: sqlite3.Connection, now: float):
+        self._rows -= db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,)).rowcount
+        self._last_prune = now
+
+    def clear(self):
+        """Drop every row."""
+        with self._lock:
+            db = self._get_db()
+            if db is not None:
+                db.execute(f"DELETE FROM {self.table}")
+                db.commit()
+                self._rows = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._rows if self._get_db() is not None else 0
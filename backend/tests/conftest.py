@@ -0,0 +1,83 @@
+"""
+Shared test setup: every test runs offline against the stub EuriAI backend
+and an in-memory SQLite database.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Set before any module builds its backend, limiter, caches or engine from the environment
+os.environ["EURIAI_BACKEND"] = "stub"
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("EURIAI_STUB_CHAT_LATENCY_MS", "0")
+os.environ.setdefault("EURIAI_STUB_EMBED_LATENCY_MS", "0")
+os.environ.setdefault("EURIAI_MAX_RATE_PER_MODEL", "10000")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+import pytest  # noqa: E402
+
+import backend.models  # noqa: E402, F401 - Register every table
+from backend.database import Base, SessionLocal, engine  # noqa: E402
+from backend.models.board import Board  # noqa: E402
+from backend.models.chapter import Chapter  # noqa: E402
+from backend.models.students import Student  # noqa: E402
+from backend.models.subject import Subject  # noqa: E402
+from backend.models.syllabus import Syllabus  # noqa: E402
+from backend.services import quiz_bank_service  # noqa: E402
+from src.tutor.framework import EuriaiModelFramework  # noqa: E402
+from src.tutor.interface import AI_Tutor  # noqa: E402
+from src.utils.euriai_backends import StubBackend  # noqa: E402
+from src.utils.resilience import ResilienceManager  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Session on a fresh schema; services opening their own sessions see the same data."""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def subject(db):
+    board = Board(name="CBSE")
+    syllabus = Syllabus(board=board, class_grade=6, subject="Science")
+    subject = Subject(syllabus=syllabus, name="Science")
+    subject.chapters = [
+        Chapter(title="Plants", description="How plants grow", chapter_no=1, order_index=1),
+        Chapter(title="Animals", description="Animal habitats", chapter_no=2, order_index=2),
+    ]
+    db.add_all([board, syllabus, subject])
+    db.commit()
+    return subject
+
+
+@pytest.fixture
+def chapter(subject):
+    return subject.chapters[0]
+
+
+@pytest.fixture
+def student(db):
+    student = Student(name="Asha", email="asha@example.com", grade_band="5-6")
+    db.add(student)
+    db.commit()
+    return student
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """Fresh resilience manager behind a stub-backed tutor for quiz generation."""
+    manager = ResilienceManager(max_rate=1000)
+    # Quiz generation only needs the model framework, not the knowledge base
+    tutor = AI_Tutor.__new__(AI_Tutor)
+    tutor.model_framework = EuriaiModelFramework(http_client=StubBackend(), resilience_manager=manager)
+    tutor.quiz_executor = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(quiz_bank_service, "resilience", manager)
+    monkeypatch.setattr(quiz_bank_service, "get_ai_tutor", lambda: tutor)
+    return manager
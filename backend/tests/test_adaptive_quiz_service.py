@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.scorecard import Scorecard
+from backend.schemas import QuizRequest
+from backend.services.adaptive_quiz_service import next_level, pick_level, resolve_levels
+
+
+def card(difficulty, score, total=10, **fields):
+    return Scorecard(difficulty=difficulty, score=score, total_questions=total, **fields)
+
+
+@pytest.fixture
+def record(db, subject, student):
+    start = datetime.utcnow() - timedelta(days=1)
+
+    def add(chapter, *attempts):
+        # Attempts oldest first
+        for offset, (difficulty, score) in enumerate(attempts):
+            db.add(card(difficulty, score, student_id=student.id, subject_id=subject.id, chapter_id=chapter.id,
+                        timestamp=start + timedelta(minutes=offset)))
+        db.commit()
+    return add
+
+
+def test_next_level_promotes_and_demotes_one_step():
+    assert next_level([]) == "basic"
+    assert next_level([card("basic", 8), card("basic", 9)]) == "medium"
+    assert next_level([card("medium", 7)]) == "medium"
+    assert next_level([card("medium", 4), card("medium", 5)]) == "basic"
+    assert next_level([card("hard", 10)]) == "hard"  # Never past the ends
+    assert next_level([card("basic", 0)]) == "basic"
+
+
+def test_next_level_averages_only_attempts_at_the_latest_level():
+    # Newest first: a strong medium streak after failing hard
+    assert next_level([card("medium", 9), card("medium", 8), card("hard", 1)]) == "hard"
+    assert next_level([card("bogus", 10)]) == "basic"  # Unknown levels restart at basic
+    assert next_level([card("medium", 0, total=0)]) == "medium"  # Nothing to average
+
+
+def test_pick_level_falls_back_from_chapter_to_subject_history(db, subject, student, record):
+    plants, animals = subject.chapters
+    assert pick_level(db, student.id, subject.id, plants.id) == ("basic", "none")
+
+    record(animals, ("basic", 9))
+    assert pick_level(db, student.id, subject.id, plants.id) == ("medium", "subject")
+
+    record(plants, ("medium", 6), ("medium", 3))
+    assert pick_level(db, student.id, subject.id, plants.id) == ("basic", "chapter")
+
+
+def test_resolve_levels(db, chapter, student, record):
+    request = QuizRequest(subject="Science", grade_band="5-6", chapter_id=chapter.id,
+                          chapter_title=chapter.title, chapter_summary=chapter.description)
+    assert resolve_levels(db, request, student.id) is None  # Adaptive mode is off by default
+
+    request.adaptive = True
+    assert resolve_levels(db, request, None) is None  # Anonymous requests get every level
+    record(chapter, ("basic", 10))
+    assert resolve_levels(db, request, student.id) == ["medium"]
+
+    request.levels = ["hard", "hard", "basic"]
+    assert resolve_levels(db, request, student.id) == ["hard", "basic"]
@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+from src.utils.embedding_cache import EmbeddingCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return EmbeddingCache(db_path=str(tmp_path / "embeddings.db"), **kwargs)
+
+
+def test_keys_normalize_the_query_text():
+    key = EmbeddingCache.make_key("m", "  What is  PHOTOSYNTHESIS?\n")
+    assert key == EmbeddingCache.make_key("m", "what is photosynthesis?")
+    assert key != EmbeddingCache.make_key("other", "what is photosynthesis?")
+
+
+def test_vectors_survive_a_restart_as_float32(tmp_path):
+    make_cache(tmp_path).set("m", "photosynthesis", [0.25, -1.5, 0.1])
+    cache = make_cache(tmp_path)
+    assert cache.get("m", "Photosynthesis") == [0.25, -1.5, pytest.approx(0.1)]
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_empty_vectors_and_expired_entries_are_not_served(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=-1)
+    cache.set("m", "failed call", [])
+    cache.set("m", "stale", [1.0])
+    assert cache.get("m", "failed call") is None
+    assert cache.get("m", "stale") is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1, max_db_entries=2)
+    for text in ("a", "b"):
+        cache.set("m", text, [1.0])
+    cache.get("m", "a")
+    cache.set("m", "c", [1.0])
+    assert cache.stats()["disk_entries"] == 2
+    assert cache.stats()["evictions"] == 4  # Three from the one-entry memory tier, one from disk
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("m", "b") is None
+    assert reopened.get("m", "a") == [1.0]
+
+
+def test_existing_cache_files_are_reused(tmp_path):
+    path = tmp_path / "embeddings.db"
+    cache = make_cache(tmp_path)
+    cache.set("m", "kept", [2.0])
+    key = EmbeddingCache.make_key("m", "kept")
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP INDEX ix_embedding_cache_expires_at")  # Files written before the index existed
+    reopened = make_cache(tmp_path)
+    assert reopened.get("m", "kept") == [2.0]
+    with sqlite3.connect(path) as conn:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(embedding_cache)")}
+        assert conn.execute("SELECT COUNT(*) FROM embedding_cache WHERE key = ?", (key,)).fetchone()[0] == 1
+    assert "ix_embedding_cache_expires_at" in indexes
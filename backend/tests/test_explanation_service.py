@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+from backend.models.flashcard import Flashcard
+from backend.services import explanation_service, quiz_bank_service
+from backend.services.explanation_service import explain_questions, explain_quiz
+from backend.services.quiz_bank_service import resolve_scope, store_quiz
+
+
+def make_quiz(questions=3):
+    return {
+        "quiz_id": str(uuid.uuid4()),
+        "difficulty": "basic",
+        "questions": [
+            {"id": f"q{i}", "type": "mcq", "question_text": f"Question {i} {uuid.uuid4().hex}?",
+             "options": ["A", "B", "C"], "correct_option_index": 1}
+            for i in range(questions)
+        ],
+    }
+
+
+@pytest.fixture
+def model_calls(manager, monkeypatch):
+    """Questions sent to the model, one list per generate_explanations call."""
+    tutor = quiz_bank_service.get_ai_tutor()
+    calls = []
+    real_generate = tutor.generate_explanations
+
+    def recording_generate(**kwargs):
+        calls.append([q["question_text"] for q in kwargs["questions"]])
+        return real_generate(**kwargs)
+
+    monkeypatch.setattr(tutor, "generate_explanations", recording_generate)
+    monkeypatch.setattr(explanation_service, "get_ai_tutor", lambda: tutor)
+    return calls
+
+
+@pytest.fixture
+def stored(db, chapter):
+    scope = resolve_scope(db, "Science", "5-6", chapter.id, chapter.title, chapter.description)
+    return store_quiz(db, scope, make_quiz())
+
+
+def test_explanations_are_generated_once_and_cached(db, stored, model_calls):
+    first = explain_quiz(db, stored.id, [2, 0, 2])
+    assert [e["index"] for e in first["explanations"]] == [2, 0]
+    assert all(e["explanation"] and not e["cached"] for e in first["explanations"])
+    assert len(model_calls) == 1 and len(model_calls[0]) == 2
+
+    second = explain_quiz(db, stored.id)
+    assert [e["cached"] for e in second["explanations"]] == [True, False, True]
+    assert model_calls[1] == [second["explanations"][1]["question_text"]]  # Only the missing one
+
+    assert explain_quiz(db, stored.id)["explanations"] == [{**e, "cached": True} for e in second["explanations"]]
+    assert len(model_calls) == 2
+
+
+def test_explanations_fill_the_chapters_flashcards(db, chapter, subject, student, stored, model_calls):
+    question = sorted(stored.questions, key=explanation_service._position)[0]
+    card = Flashcard(student_id=student.id, subject_id=subject.id, chapter_id=chapter.id,
+                     question_text=question.question_text)
+    db.add(card)
+    db.commit()
+
+    result = explain_quiz(db, stored.id, [0])
+    db.refresh(card)
+    assert card.explanation == result["explanations"][0]["explanation"]
+
+
+def test_unstored_quizzes_are_explained_from_the_served_questions(db, model_calls):
+    quiz = make_quiz()
+    quiz["questions"][1]["explanation"] = "Already explained."
+    assert explain_quiz(db, quiz["quiz_id"]) is None
+
+    result = explain_questions(quiz["quiz_id"], quiz["questions"], subject="Science", grade_band="5-6")
+    assert result["quiz_id"] == quiz["quiz_id"]
+    assert [e["explanation"] is not None for e in result["explanations"]] == [True, True, True]
+    assert result["explanations"][1] == {"index": 1, "question_text": quiz["questions"][1]["question_text"],
+                                         "explanation": "Already explained.", "cached": True}
+    assert len(model_calls[0]) == 2
+
+    assert explain_questions(quiz["quiz_id"], quiz["questions"], [1])["explanations"][0]["cached"]
+    assert len(model_calls) == 1  # Nothing left to generate
@@ -0,0 +1,64 @@
+import random
+
+from backend.utils.fingerprint import (
+    FingerprintIndex,
+    hamming_distance,
+    normalize_text,
+    question_fingerprint,
+)
+
+
+def flip_bits(fingerprint, bits):
+    value = int(fingerprint, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f"{value:016x}"
+
+
+def test_normalization_ignores_case_punctuation_and_spacing():
+    assert normalize_text("  What IS photosynthesis?!  🌱") == "what is photosynthesis"
+    assert question_fingerprint("What is photosynthesis?", "Food making") == \
+        question_fingerprint("what   is PHOTOSYNTHESIS", "food making!")
+
+
+def test_fingerprints_are_stable_64_bit_hex():
+    fingerprint = question_fingerprint("Which planet is largest?", "Jupiter")
+    assert len(fingerprint) == 16
+    assert fingerprint == question_fingerprint("Which planet is largest?", "Jupiter")
+
+
+def test_answer_is_part_of_the_fingerprint():
+    question = "Which gas do plants absorb from the air during photosynthesis?"
+    assert question_fingerprint(question, "Carbon dioxide") != question_fingerprint(question, "Oxygen")
+
+
+def test_index_finds_fingerprints_within_max_distance():
+    base = question_fingerprint("Which gas do plants absorb?", "Carbon dioxide")
+    index = FingerprintIndex([base], max_distance=3)
+
+    # Bits spread across bands and bits bunched in one band are both found
+    assert index.find(flip_bits(base, [0, 20, 40])) == base
+    assert index.find(flip_bits(base, [1, 2, 3])) == base
+    assert index.find(flip_bits(base, [0, 20, 40, 60])) is None
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    stored = [f"{rng.getrandbits(64):016x}" for _ in range(200)]
+    index = FingerprintIndex(stored, max_distance=3)
+
+    probes = [flip_bits(rng.choice(stored), rng.sample(range(64), rng.randint(0, 5))) for _ in range(300)]
+    for probe in probes:
+        expected = any(hamming_distance(s, probe) <= 3 for s in stored)
+        found = index.find(probe)
+        assert (found is not None) == expected
+        if found is not None:
+            assert hamming_distance(found, probe) <= 3
+
+
+def test_add_catches_duplicates_within_a_batch():
+    index = FingerprintIndex(max_distance=3)
+    first = question_fingerprint("Name the largest planet.", "Jupiter")
+    assert index.find(first) is None
+    index.add(first)
+    assert index.find(question_fingerprint("Name the largest planet", "Jupiter")) == first
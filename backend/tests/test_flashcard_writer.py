@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+
+from backend.models.flashcard import Flashcard
+from backend.services.flashcard_writer import FlashcardWriter
+from src.utils.metrics import flashcard_writes_total
+
+
+def quiz_set(questions=2):
+    return {"basic": [{
+        "quiz_id": str(uuid.uuid4()),
+        "difficulty": "basic",
+        "questions": [
+            {"id": f"q{i}", "type": "mcq", "question_text": f"Question {uuid.uuid4().hex}?",
+             "options": ["A", "B", "C"], "correct_option_index": 0}
+            for i in range(questions)
+        ],
+    }]}
+
+
+@pytest.fixture
+def target(chapter, student):
+    return dict(subject_name="Science", chapter_title=chapter.title, chapter_summary=chapter.description,
+                student_id=student.id, chapter_id=chapter.id)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = FlashcardWriter(maxsize=100, batch_size=3, flush_seconds=0.5)
+    batches = []
+    real_save = writer._save
+
+    def recording_save(items):
+        batches.append(len(items))
+        return real_save(items)
+
+    monkeypatch.setattr(writer, "_save", recording_save)
+    writer.batches = batches
+    yield writer
+    writer.stop()
+
+
+def test_queued_sets_are_written_in_batches(db, target, writer):
+    for _ in range(4):
+        assert writer.submit(quiz_set(), **target)
+    assert writer.flush()
+
+    assert writer.batches == [3, 1]
+    assert db.query(Flashcard).count() == 8
+
+
+def test_a_failing_set_is_isolated_from_its_batch(db, target, writer):
+    failed = flashcard_writes_total.value(outcome="failed")
+    writer.submit(quiz_set(), **target)
+    writer.submit(quiz_set(questions=3), **{**target, "subject_name": "Unknown"})
+    writer.submit(quiz_set(), **target)
+    assert writer.flush()
+
+    assert writer.batches == [3, 1, 1, 1]  # The batch, then each set on its own
+    assert db.query(Flashcard).count() == 4
+    assert flashcard_writes_total.value(outcome="failed") - failed == 3
+
+
+def test_submissions_beyond_the_queue_are_dropped(target, monkeypatch):
+    writer = FlashcardWriter(maxsize=1)
+    monkeypatch.setattr(writer, "start", lambda: None)  # Nothing drains the queue
+    dropped = flashcard_writes_total.value(outcome="dropped")
+
+    assert writer.submit(quiz_set(), **target)
+    assert not writer.submit(quiz_set(questions=5), **target)
+    assert flashcard_writes_total.value(outcome="dropped") - dropped == 5
+
+
+def test_stop_drains_the_queue(db, target):
+    writer = FlashcardWriter(batch_size=2, flush_seconds=0.5)
+    for _ in range(3):
+        writer.submit(quiz_set(), **target)
+    writer.stop()
+    assert db.query(Flashcard).count() == 6
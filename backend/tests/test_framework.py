@@ -0,0 +1,207 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.tutor.framework import EuriaiModelFramework, StreamInterrupted
+from src.tutor.response_cache import LLMResponseCache
+from src.utils.euriai_backends import LatencyProfile, StubBackend
+from src.utils.resilience import CallRejected, ResilienceManager
+
+MODEL = "gpt-4.1-nano"
+
+
+def make_framework(backend=None, **resilience_kwargs):
+    resilience = ResilienceManager(**{"max_rate": 1000, **resilience_kwargs})
+    return EuriaiModelFramework(http_client=backend or StubBackend(), resilience_manager=resilience)
+
+
+def slow_backend(ms=5000):
+    return StubBackend(chat_latency=LatencyProfile("fixed", ms, 0))
+
+
+class BrokenStreamBackend(StubBackend):
+    """Streams fail for the given models: before any output, or after the first chunk."""
+
+    def __init__(self, fail_before_output=(), fail_after_output=()):
+        super().__init__()
+        self.fail_before_output = set(fail_before_output)
+        self.fail_after_output = set(fail_after_output)
+        self.streamed = []
+
+    def _chunks_for(self, model):
+        self.streamed.append(model)
+        if model in self.fail_before_output:
+            raise ConnectionError(f"{model} unavailable")
+        yield "Hello "
+        if model in self.fail_after_output:
+            raise ConnectionError(f"{model} dropped the connection")
+        yield "world"
+
+    def stream_chat_completion(self, model, prompt, **kwargs):
+        yield from self._chunks_for(model)
+
+    async def astream_chat_completion(self, model, prompt, **kwargs):
+        for chunk in self._chunks_for(model):
+            yield chunk
+
+
+# ----------------------------------------------------------
+# Streaming
+# ----------------------------------------------------------
+def test_stream_falls_back_when_a_model_fails_before_any_output():
+    framework = make_framework()
+    chain = framework.get_fallback_chain("chat", "medium")
+    framework.http = BrokenStreamBackend(fail_before_output=[chain[0]])
+
+    assert "".join(framework.stream_response("hi")) == "Hello world"
+    assert framework.http.streamed == chain[:2]
+
+
+def test_stream_failure_after_output_raises_instead_of_ending_quietly():
+    # Regression: the stream used to just stop, so the partial answer was saved as complete
+    framework = make_framework()
+    chain = framework.get_fallback_chain("chat", "medium")
+    framework.http = BrokenStreamBackend(fail_after_output=[chain[0]])
+
+    received = []
+    with pytest.raises(StreamInterrupted):
+        for chunk in framework.stream_response("hi"):
+            received.append(chunk)
+    assert received == ["Hello "]
+    assert framework.http.streamed == chain[:1]  # No second model appends to a half answer
+    assert framework.resilience.stats()[chain[0]]["in_flight"] == 0
+
+
+async def test_async_stream_failure_after_output_raises():
+    framework = make_framework()
+    chain = framework.get_fallback_chain("chat", "medium")
+    framework.http = BrokenStreamBackend(fail_after_output=[chain[0]])
+
+    received = []
+    with pytest.raises(StreamInterrupted):
+        async for chunk in framework.astream_response("hi"):
+            received.append(chunk)
+    assert received == ["Hello "]
+
+
+# ----------------------------------------------------------
+# Coalescing
+# ----------------------------------------------------------
+async def test_coalesced_request_survives_the_first_caller_being_cancelled():
+    framework = make_framework(slow_backend(100))
+    first = asyncio.create_task(framework.agenerate_response("What is a fraction?", temperature=0))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(framework.agenerate_response("What is a fraction?", temperature=0))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    result = await second
+    assert result["success"] is True
+    assert framework.inflight.stats()["executions"] == 1
+
+
+async def test_sampled_generations_are_not_coalesced():
+    framework = make_framework(slow_backend(50))
+    results = await asyncio.gather(*(framework.agenerate_response("Make a quiz", task_type="quiz") for _ in range(3)))
+    assert all(result["success"] for result in results)
+    assert framework.inflight.stats()["calls"] == 0
+
+
+def test_deterministic_calls_are_coalesced_across_threads():
+    framework = make_framework(StubBackend(chat_latency=LatencyProfile("fixed", 100, 0)))
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(lambda _: framework.generate_response("Classify this", temperature=0), range(3)))
+    assert len({result["response"] for result in results}) == 1
+    assert framework.inflight.stats()["executions"] == 1
+
+
+# ----------------------------------------------------------
+# Resilience
+# ----------------------------------------------------------
+async def test_cancelled_calls_release_their_limiter_slots():
+    # Regression: a cancelled call skipped record(), leaking its concurrency slot for good
+    framework = make_framework(slow_backend(), max_concurrency=3)
+    calls = [asyncio.create_task(framework._acomplete([MODEL], "chat", "hi", 0.7, 100)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert framework.resilience.stats()[MODEL]["in_flight"] == 3
+
+    for call in calls:
+        call.cancel()
+    await asyncio.gather(*calls, return_exceptions=True)
+
+    stats = framework.resilience.stats()[MODEL]
+    assert stats["in_flight"] == 0
+    assert stats["consecutive_failures"] == 0  # Cancellation is not a model failure
+    assert stats["state"] == "closed"
+
+
+async def test_cancelled_half_open_trial_lets_the_next_call_probe():
+    framework = make_framework(slow_backend(), failure_threshold=1, reset_timeout=0.05)
+    framework.resilience.admit(MODEL)
+    framework.resilience.record(MODEL, 0.1, ConnectionError("down"))
+    await asyncio.sleep(0.06)
+
+    trial = asyncio.create_task(framework._acomplete([MODEL], "chat", "hi", 0.7, 100))
+    await asyncio.sleep(0.02)
+    with pytest.raises(CallRejected):  # Only one trial at a time
+        await framework._acomplete([MODEL], "chat", "hi", 0.7, 100)
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+
+    framework.http = StubBackend()
+    result = await framework._acomplete([MODEL], "chat", "hi", 0.7, 100)
+    assert result["model_used"] == MODEL
+    assert framework.resilience.stats()[MODEL]["state"] == "closed"
+
+
+def test_sync_calls_fall_back_to_the_next_model():
+    framework = make_framework(StubBackend(error_rate=1.0))
+    chain = framework.get_fallback_chain("chat", "medium")
+    with pytest.raises(ConnectionError):
+        framework._complete(chain[:2], "chat", "hi", 0.7, 100)
+    assert all(framework.resilience.stats()[m]["in_flight"] == 0 for m in chain[:2])
+
+
+async def test_closing_a_stream_early_releases_the_slot():
+    framework = make_framework()
+    stream = framework.astream_response("hi")
+    model = framework.get_fallback_chain("chat", "medium")[0]
+    await stream.__anext__()
+    assert framework.resilience.stats()[model]["in_flight"] == 1
+
+    await stream.aclose()
+    stats = framework.resilience.stats()[model]
+    assert stats["in_flight"] == 0
+    assert stats["consecutive_failures"] == 0
+
+
+# ----------------------------------------------------------
+# Response cache
+# ----------------------------------------------------------
+class FailingModelBackend(StubBackend):
+    """Completions fail for the given models."""
+
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = set(failing)
+
+    def chat_completion(self, model, prompt, **kwargs):
+        if model in self.failing:
+            raise ConnectionError(f"{model} unavailable")
+        return super().chat_completion(model, prompt, **kwargs)
+
+
+def test_answers_from_a_fallback_model_are_not_cached():
+    framework = make_framework()
+    framework.cache = LLMResponseCache(enabled=True, task_types=["quiz"])
+    primary = framework.get_fallback_chain("quiz", "medium")[0]
+
+    framework.http = FailingModelBackend([primary])
+    degraded = framework.generate_response("Make a quiz", task_type="quiz", temperature=0)
+    assert degraded["model_used"] != primary
+    assert framework.cache.stats()["writes"] == 0
+
+    framework.http = StubBackend()
+    assert framework.generate_response("Make a quiz", task_type="quiz", temperature=0)["model_used"] == primary
+    assert framework.generate_response("Make a quiz", task_type="quiz", temperature=0)["cached"] is True
@@ -0,0 +1,43 @@
+from src.tutor.json_stream import JsonArrayStreamParser
+
+OUTPUT = '```json\n[{"q": "a {brace} in text", "o": ["x", "y"]}, {"q": "escaped \\" quote ]"}, 3, {"q": "last"}]\n```'
+
+
+def feed_in_chunks(text, size):
+    parser = JsonArrayStreamParser()
+    items = []
+    for i in range(0, len(text), size):
+        items += parser.feed(text[i:i + size])
+    return parser, items
+
+
+def test_objects_are_emitted_regardless_of_chunk_boundaries():
+    expected = [{"q": "a {brace} in text", "o": ["x", "y"]}, {"q": 'escaped " quote ]'}, {"q": "last"}]
+    for size in (1, 2, 7, len(OUTPUT)):
+        parser, items = feed_in_chunks(OUTPUT, size)
+        assert items == expected
+        assert parser.done
+
+
+def test_object_is_emitted_as_soon_as_it_closes():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"q": 1}, {"q"') == [{"q": 1}]
+    assert parser.feed(': 2}') == [{"q": 2}]
+    assert not parser.done
+
+
+def test_non_objects_and_bad_elements_are_counted_not_emitted():
+    parser, items = feed_in_chunks('[1, {"q": 1,}, {"q": 2}]', 4)
+    assert items == [{"q": 2}]
+    assert parser.errors == 1  # The number is skipped between elements; the broken object is an error
+
+
+def test_truncated_output_keeps_completed_objects():
+    parser, items = feed_in_chunks('[{"q": 1}, {"q": 2', 3)
+    assert items == [{"q": 1}]
+    assert not parser.done
+
+
+def test_text_after_the_array_is_ignored():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"a": 1}] [{"b": 2}]') == [{"a": 1}]
@@ -0,0 +1,128 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from src.tutor import hybrid_retriever
+from src.tutor.hybrid_retriever import HybridSearcher, rrf_fuse
+from src.tutor.lexical_index import BM25Index, tokenize
+
+TEXTS = [
+    "Photosynthesis is how green plants make food using sunlight",
+    "Fractions have a numerator and a denominator",
+    "Plants need water and sunlight to grow",
+    "प्रकाश संश्लेषण से पौधे भोजन बनाते हैं",
+    "ದ್ಯುತಿಸಂಶ್ಲೇಷಣೆ ಸಸ್ಯಗಳ ಆಹಾರ",
+]
+IDS = ["photo", "fractions", "plants", "hindi", "kannada"]
+
+
+def test_tokenize_drops_stopwords_and_keeps_indic_words_whole():
+    assert tokenize("What is Photosynthesis?") == ["photosynthesis"]
+    # Vowel signs and viramas stay inside the word; stopwords are dropped
+    assert tokenize("पौधे भोजन कैसे बनाते हैं?") == ["पौधे", "भोजन", "बनाते"]
+    assert tokenize("ದ್ಯುತಿಸಂಶ್ಲೇಷಣೆ ಏನು") == ["ದ್ಯುತಿಸಂಶ್ಲೇಷಣೆ"]
+    # NFKC: full-width letters match their ASCII forms
+    assert tokenize("ＣＯ２") == ["co2"]
+
+
+def test_search_ranks_matching_chunks_by_bm25():
+    index = BM25Index.build(TEXTS, IDS)
+    results = index.search("plants sunlight", k=3)
+    assert [doc_id for doc_id, _ in results][:2] == ["plants", "photo"]
+    assert all(score > 0 for _, score in results)
+    assert results == sorted(results, key=lambda r: -r[1])
+
+
+def test_search_in_each_script():
+    index = BM25Index.build(TEXTS, IDS)
+    assert index.search("भोजन", k=1)[0][0] == "hindi"
+    assert index.search("ಆಹಾರ", k=1)[0][0] == "kannada"
+    assert index.search("denominator", k=1)[0][0] == "fractions"
+
+
+def test_search_without_known_terms_is_empty():
+    index = BM25Index.build(TEXTS, IDS)
+    assert index.search("volcano") == []
+    assert index.search("what is the") == []
+
+
+def test_rare_terms_outweigh_common_ones():
+    texts = ["sunlight sunlight sunlight", "sunlight chlorophyll", "sunlight", "sunlight water"]
+    index = BM25Index.build(texts, ["a", "b", "c", "d"])
+    assert index.search("sunlight chlorophyll", k=1)[0][0] == "b"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(TEXTS, IDS)
+    path = str(tmp_path / "bm25.npz")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == len(index)
+    for query in ("plants sunlight", "भोजन", "numerator"):
+        assert loaded.search(query, k=3) == index.search(query, k=3)
+
+
+def doc(doc_id):
+    return Document(id=doc_id, page_content=doc_id)
+
+
+def test_rrf_fuse_rewards_documents_ranked_by_several_lists():
+    vector = [doc("a"), doc("b"), doc("c")]
+    lexical = [doc("d"), doc("b"), doc("e")]
+    fused = [d.id for d in rrf_fuse([vector, lexical], rrf_k=60)]
+    assert fused[0] == "b"  # Second in both lists beats first in one
+    assert set(fused[1:3]) == {"a", "d"}
+    assert set(fused[3:]) == {"c", "e"}
+    assert len(fused) == len(set(fused))
+
+
+def test_rrf_fuse_of_one_list_keeps_its_order():
+    ranked = [doc("x"), doc("y"), doc("z")]
+    assert [d.id for d in rrf_fuse([ranked])] == ["x", "y", "z"]
+    assert rrf_fuse([]) == []
+
+
+def make_searcher():
+    docs = {doc_id: Document(id=doc_id, page_content=text) for doc_id, text in zip(IDS, TEXTS, strict=True)}
+    return HybridSearcher(BM25Index.build(TEXTS, IDS), SimpleNamespace(search=docs.get))
+
+
+def test_abandoned_vector_searches_hold_their_slot_until_they_return(monkeypatch):
+    monkeypatch.setattr(hybrid_retriever, "RAG_VECTOR_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(hybrid_retriever, "_vector_slots", threading.BoundedSemaphore(1))
+    searcher = make_searcher()
+    embeddings_down = threading.Event()
+    calls = []
+
+    def stuck_search():
+        calls.append("stuck")
+        embeddings_down.wait(5)
+        return [[]]
+
+    docs, mode = searcher.search(["plants sunlight"], stuck_search, 2)
+    assert mode == "lexical_timeout"
+    assert [d.id for d in docs] == ["plants", "photo"]
+
+    # The abandoned search still runs, so the next one skips the vector path
+    _, mode = searcher.search(["plants"], lambda: calls.append("skipped") or [[]], 2)
+    assert mode == "lexical_busy"
+    assert calls == ["stuck"]
+
+    embeddings_down.set()
+    deadline = time.monotonic() + 2
+    while searcher.search(["plants"], lambda: [[Document(id="photo", page_content="")]], 2)[1] != "hybrid":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_empty_vector_results_are_reported_as_an_error():
+    searcher = make_searcher()
+    for failed_search in (lambda: [], lambda: [[]], lambda: [[], []]):
+        docs, mode = searcher.search(["photosynthesis"], failed_search, 3)
+        assert mode == "lexical_error"
+        assert [d.id for d in docs] == ["photo"]
+
+    _, mode = searcher.search(["photosynthesis"], lambda: [[], [Document(id="plants", page_content="")]], 3)
+    assert mode == "hybrid"
@@ -0,0 +1,90 @@
+import json
+
+from src.tutor.model_router import ModelRouter, load_routing_config
+
+
+def make_router(**kwargs):
+    return ModelRouter(config=load_routing_config(None), min_samples=3, **kwargs)
+
+
+def record(router, model, task_type, latency, success=True, times=3):
+    for _ in range(times):
+        router.record(model, task_type, latency, success)
+
+
+def test_balanced_keeps_the_table_primary_then_cheapest_substitutes():
+    chain = make_router().route("quiz", "medium")
+    assert chain[0] == "gpt-4.1-mini"
+    assert chain[1] == "gemini-2.5-flash"
+    assert len(chain) == len(set(chain))
+    assert "gpt-4.1-nano" in chain  # The default model is always a candidate
+
+
+def test_quiz_difficulties_map_to_complexity_tiers():
+    router = make_router()
+    assert router.route("quiz", "basic")[0] == "gpt-4.1-nano"
+    assert router.route("quiz", "hard")[0] == "gpt-4.1-mini"
+    assert ModelRouter.normalize_complexity("unknown") == "medium"
+
+
+def test_subject_override_for_complex_requests():
+    assert make_router().route("chat", "complex", subject="Math")[0] == "deepseek-r1-distill-llama-70b"
+
+
+def test_substitutes_below_the_quality_floor_go_after_eligible_models():
+    chain = make_router().route("quiz", "complex")
+    # gpt-4.1-nano (quality 0.6) is below the complex floor of 0.85
+    assert chain.index("gpt-4.1-nano") > chain.index("gemini-2.5-pro")
+
+
+def test_quality_priority_orders_by_quality():
+    chain = make_router().route("quiz", "complex", speed_priority="quality")
+    assert chain[0] == "gemini-2.5-pro"
+
+
+def test_fast_priority_uses_observed_latency_once_there_are_enough_samples():
+    router = make_router()
+    assert router.route("quiz", "complex", speed_priority="fast")[0] == "gpt-4.1-mini"  # Latency prior 2s vs 8s
+    record(router, "gpt-4.1-mini", "quiz", 9.0)
+    record(router, "gemini-2.5-pro", "quiz", 1.0)
+    assert router.route("quiz", "complex", speed_priority="fast")[0] == "gemini-2.5-pro"
+
+
+def test_models_breaching_their_slo_are_routed_around():
+    router = make_router()
+    record(router, "gpt-4.1-nano", "chat", 10.0)  # Chat p95 SLO is 3s
+    chain = router.route("chat", "medium")
+    assert chain[0] != "gpt-4.1-nano"
+    assert "gpt-4.1-nano" in chain
+    assert not router.meets_slo("gpt-4.1-nano", "chat")
+    assert router.meets_slo("gpt-4.1-nano", "quiz")  # SLOs are per task
+
+
+def test_error_rate_breaches_slo():
+    router = make_router()
+    record(router, "gpt-4.1-mini", "quiz", 1.0, success=False)
+    assert router.route("quiz", "medium")[0] == "gemini-2.5-flash"
+
+
+def test_too_few_samples_never_breach():
+    router = make_router()
+    record(router, "gpt-4.1-nano", "chat", 10.0, times=2)
+    assert router.route("chat", "medium")[0] == "gpt-4.1-nano"
+
+
+def test_unavailable_models_are_tried_last():
+    chain = make_router().route("quiz", "medium", is_available=lambda m: m != "gpt-4.1-mini")
+    assert chain[-1] == "gpt-4.1-mini"
+    assert chain[0] == "gemini-2.5-flash"
+
+
+def test_config_file_overrides_routes_and_models(tmp_path):
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps({
+        "routes": {"chat": {"medium": ["gemini-2.5-flash"]}},
+        "models": {"gemini-2.5-flash": {"cost": 0.05}},
+    }))
+    config = load_routing_config(str(path))
+    assert config["models"]["gemini-2.5-flash"] == {"cost": 0.05, "quality": 0.7, "latency": 1.2}
+    assert ModelRouter(config=config).route("chat", "medium")[0] == "gemini-2.5-flash"
+    assert load_routing_config(str(tmp_path / "missing.json"))["routes"]["chat"]["medium"] == ["gpt-4.1-nano"]
@@ -0,0 +1,151 @@
+import copy
+import uuid
+from contextlib import contextmanager
+
+import pytest
+
+from backend.models.quiz import Quiz
+from backend.services import quiz_bank_service
+from backend.services.quiz_bank_service import (
+    QuizBank,
+    draw_quiz,
+    generate_into_bank,
+    refill_count,
+    resolve_scope,
+    store_quiz,
+)
+
+
+def make_quiz(difficulty="basic", topic="plants"):
+    return {
+        "quiz_id": str(uuid.uuid4()),
+        "difficulty": difficulty,
+        "questions": [
+            {"id": f"q{i}", "type": "mcq", "question_text": f"Question {i} about {topic} {uuid.uuid4().hex}?",
+             "options": ["A", "B", "C"], "correct_option_index": i % 3}
+            for i in range(5)
+        ],
+    }
+
+
+@pytest.fixture
+def scope(db, chapter):
+    return resolve_scope(db, "Science", "5-6", chapter.id, chapter.title, chapter.description)
+
+
+def test_scope_needs_an_existing_subject_and_chapter(db, chapter):
+    scope = resolve_scope(db, "Science", "5-6", "", "Plants", "")
+    assert scope.chapter_id == chapter.id
+    assert resolve_scope(db, "History", "5-6", chapter.id, "Plants", "") is None
+    assert resolve_scope(db, "Science", "5-6", "", "Unknown", "") is None
+
+
+def test_stored_quiz_round_trips(db, scope):
+    quiz = make_quiz()
+    store_quiz(db, scope, copy.deepcopy(quiz))
+    drawn = draw_quiz(db, scope, "basic")
+    assert drawn["quiz_id"] == quiz["quiz_id"]
+    assert [q["question_text"] for q in drawn["questions"]] == [q["question_text"] for q in quiz["questions"]]
+    assert [q["correct_option_index"] for q in drawn["questions"]] == [0, 1, 2, 0, 1]
+    assert draw_quiz(db, scope, "hard") is None
+
+
+def test_placeholder_and_near_duplicate_quizzes_are_not_banked(db, scope):
+    fallback = make_quiz()
+    fallback["questions"][0]["id"] = "fallback-1"
+    assert store_quiz(db, scope, fallback) is None
+
+    quiz = make_quiz()
+    assert store_quiz(db, scope, copy.deepcopy(quiz)) is not None
+    repeat = copy.deepcopy(quiz)
+    repeat["quiz_id"] = str(uuid.uuid4())
+    assert store_quiz(db, scope, repeat) is None
+    assert db.query(Quiz).count() == 1
+
+
+def test_students_are_never_served_the_same_quiz_twice(db, scope, student):
+    first, second = make_quiz(), make_quiz()
+    store_quiz(db, scope, first)
+    store_quiz(db, scope, second)
+
+    served = [draw_quiz(db, scope, "basic", student.id)["quiz_id"] for _ in range(2)]
+    assert sorted(served) == sorted([first["quiz_id"], second["quiz_id"]])
+    assert draw_quiz(db, scope, "basic", student.id) is None
+    assert refill_count(db, scope, "basic", student.id) == 1  # One more for the student who saw them all
+
+
+def test_anonymous_draws_are_spread_over_the_bank(db, scope):
+    ids = set()
+    for _ in range(3):
+        quiz = make_quiz()
+        store_quiz(db, scope, quiz)
+        ids.add(quiz["quiz_id"])
+    drawn = {draw_quiz(db, scope, "basic")["quiz_id"] for _ in range(40)}
+    assert drawn == ids
+
+
+def test_refill_count_tops_up_to_the_target(db, scope, monkeypatch):
+    monkeypatch.setattr(quiz_bank_service, "QUIZ_BANK_TARGET", 2)
+    assert refill_count(db, scope, "medium") == 2
+    store_quiz(db, scope, make_quiz("medium"))
+    assert refill_count(db, scope, "medium") == 1
+    store_quiz(db, scope, make_quiz("medium"))
+    assert refill_count(db, scope, "medium") == 0
+
+
+def test_refill_generates_into_the_bank(db, scope, manager):
+    assert generate_into_bank(scope, "basic", max_in_flight=0, wait_seconds=1) == "stored"
+    assert draw_quiz(db, scope, "basic") is not None
+
+
+def test_refill_waits_for_interactive_traffic_and_gives_up(db, scope, manager):
+    manager.admit("gpt-4.1-mini")  # A student's call in flight
+    assert generate_into_bank(scope, "basic", max_in_flight=0, wait_seconds=0.1) == "busy"
+    assert draw_quiz(db, scope, "basic") is None
+    assert manager.stats()["gpt-4.1-mini"]["in_flight"] == 1  # Nothing else was admitted
+
+    manager.record("gpt-4.1-mini", 0.1)
+    assert generate_into_bank(scope, "basic", max_in_flight=0, wait_seconds=0.1) == "stored"
+
+
+def test_get_quizzes_generates_misses_live_and_banks_them(db, chapter, student, manager, monkeypatch):
+    monkeypatch.setattr(quiz_bank_service, "QUIZ_BANK_TARGET", 1)  # No background refills
+    bank = QuizBank(workers=1)
+    request = dict(subject="Science", grade_band="5-6", chapter_id=chapter.id,
+                   chapter_title=chapter.title, chapter_summary=chapter.description)
+
+    live = bank.get_quizzes(db, **request, levels=["basic"])
+    assert len(live["basic"][0]["questions"]) == 5
+    assert bank.stats()["pending_refills"] == 0
+
+    # The live quiz was banked, so the next student is served from the bank
+    banked = bank.get_quizzes(db, **request, levels=["basic"], student_id=student.id)
+    assert banked["basic"][0]["quiz_id"] == live["basic"][0]["quiz_id"]
+
+
+async def test_streaming_opens_a_session_per_database_step(db, scope, chapter, manager, monkeypatch):
+    monkeypatch.setattr(quiz_bank_service, "QUIZ_BANK_TARGET", 1)
+    store_quiz(db, scope, make_quiz("basic"))
+    opened = []
+    real_context = quiz_bank_service.get_db_context
+
+    @contextmanager
+    def recording_context():
+        with real_context() as session:
+            opened.append(session)
+            yield session
+
+    monkeypatch.setattr(quiz_bank_service, "get_db_context", recording_context)
+    events = [
+        event async for event in QuizBank(workers=1).astream_quizzes(
+            subject="Science", grade_band="5-6", chapter_id=chapter.id, chapter_title=chapter.title,
+            chapter_summary=chapter.description, levels=["basic", "medium"],
+        )
+    ]
+
+    quizzes = {event["difficulty"]: event["quiz"] for event in events if event["type"] == "quiz"}
+    assert set(quizzes) == {"basic", "medium"}
+    assert draw_quiz(db, scope, "medium")["quiz_id"] == quizzes["medium"]["quiz_id"]  # The live quiz was banked
+    # Scope, two draws, banking the live quiz and the refill check: no session crosses threads
+    assert len(opened) == 5
+    assert len({id(session) for session in opened}) == 5
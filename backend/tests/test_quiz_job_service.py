@@ -0,0 +1,168 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.models.quiz_job import QuizJob
+from backend.schemas import QuizRequest
+from backend.services import quiz_bank_service, quiz_job_service
+from backend.services.quiz_job_service import (
+    COMPLETED,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    QuizJobQueue,
+    enqueue_job,
+    get_job,
+    job_levels,
+)
+
+
+@pytest.fixture
+def request_for(chapter):
+    def make(**kwargs):
+        return QuizRequest(subject="Science", grade_band="5-6", chapter_id=chapter.id,
+                           chapter_title=chapter.title, chapter_summary=chapter.description, **kwargs)
+    return make
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    # enqueue_job wakes the module queue; tests drive their own queue instead
+    monkeypatch.setattr(quiz_job_service, "quiz_jobs", SimpleNamespace(start=lambda: None, notify=lambda: None))
+    return QuizJobQueue(workers=1, lease_seconds=60)
+
+
+def add_job(db, request, status=QUEUED, **values):
+    job = QuizJob(request=request.model_dump_json(), questions_total=5, status=status, **values)
+    db.add(job)
+    db.commit()
+    return job
+
+
+# ----------------------------------------------------------
+# Enqueueing
+# ----------------------------------------------------------
+def test_jobs_reject_options_they_cannot_honour(db, request_for):
+    with pytest.raises(ValueError, match="single_call"):
+        job_levels(db, request_for(single_call=True))
+    with pytest.raises(ValueError, match="questions per level"):
+        job_levels(db, request_for(num_questions=8))
+    assert job_levels(db, request_for(levels=["hard", "basic", "hard"])) == ["hard", "basic"]
+
+
+def test_enqueued_job_fixes_its_levels_and_progress_total(db, request_for, queue):
+    job = enqueue_job(db, request_for(levels=["basic", "medium"]))
+    assert job.status == QUEUED
+    assert job.questions_total == 10
+    assert json.loads(job.request)["levels"] == ["basic", "medium"]
+
+
+# ----------------------------------------------------------
+# Claiming and leases
+# ----------------------------------------------------------
+def test_claim_takes_the_oldest_queued_job_once(db, request_for, queue):
+    now = datetime.utcnow()
+    newer = add_job(db, request_for(), created_at=now)
+    older = add_job(db, request_for(), created_at=now - timedelta(minutes=1))
+
+    assert queue._claim(db) == older.id
+    db.refresh(older)
+    assert (older.status, older.worker, older.attempts) == (RUNNING, queue.worker_id, 1)
+
+    assert queue._claim(db) == newer.id
+    assert queue._claim(db) is None
+
+
+def test_claim_reports_a_lost_race(db, request_for, queue, monkeypatch):
+    job = add_job(db, request_for())
+    other = QuizJobQueue(workers=1)
+    query_class = type(db.query(QuizJob))
+    real_update = query_class.update
+
+    def racing_update(query, values, **kwargs):
+        # Another worker claims the job between our SELECT and conditional UPDATE
+        monkeypatch.setattr(query_class, "update", real_update)
+        other._claim(db)
+        return real_update(query, values, **kwargs)
+
+    monkeypatch.setattr(query_class, "update", racing_update)
+    assert queue._claim(db) == ""
+    db.refresh(job)
+    assert (job.worker, job.attempts) == (other.worker_id, 1)
+
+
+def test_recover_requeues_only_expired_leases(db, request_for, queue):
+    stale = datetime.utcnow() - timedelta(minutes=5)
+    expired = add_job(db, request_for(), status=RUNNING, worker="dead", heartbeat_at=stale, attempts=1)
+    live = add_job(db, request_for(), status=RUNNING, worker="alive", heartbeat_at=datetime.utcnow(), attempts=1)
+    exhausted = add_job(db, request_for(), status=RUNNING, worker="dead", heartbeat_at=stale,
+                        attempts=queue.max_attempts)
+
+    assert queue.recover() == 1
+    for job in (expired, live, exhausted):
+        db.refresh(job)
+    assert (expired.status, expired.worker) == (QUEUED, None)
+    assert (live.status, live.worker) == (RUNNING, "alive")
+    assert exhausted.status == FAILED
+    assert "Interrupted" in exhausted.error
+
+
+def test_updates_fail_once_the_lease_is_lost(db, request_for, queue):
+    job = add_job(db, request_for())
+    queue._claim(db)
+    assert queue._update(db, job.id, {QuizJob.questions_ready: 1})
+
+    # Re-queued by recover() and claimed elsewhere while this worker was stalled
+    db.query(QuizJob).filter(QuizJob.id == job.id).update({QuizJob.worker: "other"})
+    db.commit()
+    assert not queue._update_in_session(job.id, {QuizJob.questions_ready: 2})
+    db.refresh(job)
+    assert job.questions_ready == 1
+
+
+# ----------------------------------------------------------
+# Running
+# ----------------------------------------------------------
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def runnable(monkeypatch, manager):
+    monkeypatch.setattr(quiz_bank_service, "QUIZ_BANK_TARGET", 1)  # No background refills
+    submitted = []
+    monkeypatch.setattr(quiz_job_service, "flashcard_writer",
+                        SimpleNamespace(submit=lambda quizzes, **kwargs: submitted.append(quizzes)))
+    return submitted
+
+
+def test_job_streams_progress_and_stores_its_result(db, request_for, queue, runnable, loop):
+    job = add_job(db, request_for(levels=["basic"]))
+    queue._claim(db)
+    queue._run(loop, job.id)
+
+    db.refresh(job)
+    assert job.status == COMPLETED
+    assert job.questions_ready == 5
+    result = json.loads(job.result)
+    assert list(result) == ["basic"]
+    assert runnable == [result]
+    assert get_job(db, job.id).finished_at is not None
+
+
+def test_run_is_dropped_when_its_lease_is_lost(db, request_for, queue, runnable, loop):
+    job = add_job(db, request_for(levels=["basic"]))
+    queue._claim(db)
+    db.query(QuizJob).filter(QuizJob.id == job.id).update({QuizJob.worker: "other"})
+    db.commit()
+
+    queue._run(loop, job.id)
+    db.refresh(job)
+    assert (job.status, job.worker, job.result) == (RUNNING, "other", None)
+    assert runnable == []  # No flashcards from the abandoned run
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from backend.models.chapter import Chapter
+from backend.services import quiz_bank_service, quiz_prefetch_service
+from backend.services.quiz_bank_service import draw_quiz, generate_into_bank
+from backend.services.quiz_prefetch_service import QuizPrefetcher, next_chapter
+from src.utils.metrics import quiz_prefetch_total
+
+
+@pytest.fixture
+def prefetch(monkeypatch, manager):
+    monkeypatch.setattr(quiz_prefetch_service, "QUIZ_PREFETCH_WAIT_SECONDS", 0.1)
+    return QuizPrefetcher(workers=1)
+
+
+def outcomes(*names):
+    return [quiz_prefetch_total.value(outcome=name) for name in names]
+
+
+def test_next_chapter_follows_the_subject_order(db, subject):
+    plants, animals = subject.chapters
+    intro = Chapter(subject_id=subject.id, title="Intro", chapter_no=0, order_index=0)
+    db.add(intro)
+    db.commit()
+
+    assert next_chapter(db, intro).id == plants.id
+    assert next_chapter(db, plants).id == animals.id
+    assert next_chapter(db, animals) is None
+
+
+def test_plan_targets_levels_without_an_unserved_quiz(db, subject, student, prefetch):
+    plants, animals = subject.chapters
+    scope, levels = prefetch._plan(student.id, plants.id)
+    assert (scope.chapter_id, scope.grade_band) == (animals.id, "5-6")
+    assert levels == ["basic", "medium", "hard"]
+
+    assert generate_into_bank(scope, "medium") == "stored"
+    assert prefetch._plan(student.id, plants.id)[1] == ["basic", "hard"]
+
+    skipped = outcomes("skipped")
+    assert prefetch._plan(student.id, animals.id) == (None, [])  # Last chapter
+    assert outcomes("skipped")[0] - skipped[0] == 1
+
+
+def test_prefetch_banks_the_next_chapter(db, subject, student, prefetch):
+    plants, animals = subject.chapters
+    stored = outcomes("stored")
+    prefetch._prefetch(student.id, plants.id)
+
+    assert outcomes("stored")[0] - stored[0] == 3
+    scope, levels = prefetch._plan(student.id, plants.id)
+    assert levels == []
+    assert draw_quiz(db, scope, "hard", student.id) is not None
+    assert prefetch.stats()["pending"] == 0
+
+
+def test_prefetch_gives_up_while_students_use_the_model(db, subject, student, prefetch, manager):
+    plants, _ = subject.chapters
+    for _ in range(3):  # Interactive calls beyond QUIZ_PREFETCH_MAX_IN_FLIGHT
+        manager.admit("gpt-4.1-mini")
+    busy, stored = outcomes("busy", "stored")
+
+    prefetch._prefetch(student.id, plants.id)
+    assert outcomes("busy", "stored") == [busy + 1, stored]  # Gave up at the first level
+    assert manager.stats()["gpt-4.1-mini"]["in_flight"] == 3
+    assert prefetch._plan(student.id, plants.id)[1] == ["basic", "medium", "hard"]
+
+
+def test_prefetch_rechecks_the_model_before_every_call(db, subject, student, prefetch, manager, monkeypatch):
+    plants, _ = subject.chapters
+    tutor = quiz_bank_service.get_ai_tutor()
+    real_generate = tutor.generate_quiz
+
+    def generate_then_students_arrive(**kwargs):
+        quiz = real_generate(**kwargs)
+        # Interactive calls come from request threads, outside the prefetch's background block
+        students = threading.Thread(target=lambda: [manager.admit("gpt-4.1-mini") for _ in range(3)])
+        students.start()
+        students.join()
+        return quiz
+
+    monkeypatch.setattr(tutor, "generate_quiz", generate_then_students_arrive)
+    busy, stored = outcomes("busy", "stored")
+
+    prefetch._prefetch(student.id, plants.id)
+    assert outcomes("busy", "stored") == [busy + 1, stored + 1]
@@ -0,0 +1,92 @@
+import json
+
+from src.tutor.interface import AI_Tutor
+from src.tutor.quiz_validation import salvage_questions, validate_question, validate_questions
+
+
+def mcq(text, options=("A", "B", "C"), answer=0):
+    return {"type": "mcq", "question_text": text, "options": list(options), "correct_option_index": answer}
+
+
+def test_validate_question_checks_rules_per_type():
+    assert validate_question(mcq("What is 2 + 2?")) == []
+    assert validate_question({"type": "true_false", "question_text": "Sky is blue",
+                              "options": ["True", "False"], "correct_option_index": 1}) == []
+    assert validate_question({"type": "short_answer", "question_text": "Name a planet"}) == []
+
+    assert "missing question_text" in validate_question(mcq(""))
+    assert any("unknown type" in e for e in validate_question({"type": "essay", "question_text": "x"}))
+    assert any("needs 2-2 options" in e for e in validate_question(
+        {"type": "true_false", "question_text": "x", "options": ["a", "b", "c"], "correct_option_index": 0}
+    ))
+    assert any("correct_option_index" in e for e in validate_question(mcq("x", answer=3)))
+
+
+def test_validate_questions_normalizes_before_checking():
+    question = {"type": "Multiple_Choice", "question_text": "  Which?  ", "options": ["a", "b"],
+                "correct_option_index": "1"}
+    valid, problems = validate_questions([question])
+    assert problems == []
+    assert valid[0]["type"] == "mcq"
+    assert valid[0]["correct_option_index"] == 1
+    assert valid[0]["question_text"] == "Which?"
+
+
+def test_validate_questions_selects_only_good_unique_questions_up_to_limit():
+    existing = [mcq("Already asked")]
+    candidates = [mcq("Q1"), mcq("q1"), mcq("already asked"), mcq("Q2", answer=9), mcq("Q3"), mcq("Q4")]
+
+    valid, problems = validate_questions(candidates, limit=2, existing=existing)
+
+    assert [q["question_text"] for q in valid] == ["Q1", "Q3"]
+    assert problems[0].startswith("question 2: duplicates")
+    assert problems[1].startswith("question 3: duplicates")
+    assert problems[2].startswith("question 4: correct_option_index")
+
+
+def test_salvage_questions_keeps_complete_objects_of_truncated_output():
+    text = json.dumps([mcq("Q1"), mcq("Q2")])[:-20]
+    assert [q["question_text"] for q in salvage_questions(text)] == ["Q1"]
+
+
+class ScriptedFramework:
+    """Returns canned responses in order and records the prompts it was given."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_response(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return {"response": self.responses.pop(0), "success": True}
+
+
+def make_tutor(framework):
+    # Quiz generation only needs the model framework, not the knowledge base
+    tutor = AI_Tutor.__new__(AI_Tutor)
+    tutor.model_framework = framework
+    return tutor
+
+
+def test_generate_quiz_repairs_only_the_invalid_questions():
+    first = [mcq("Q1"), mcq("Q2"), {"type": "mcq", "question_text": "Broken", "options": []},
+             mcq("Q3", answer=7), mcq("Q4")]
+    repair = [mcq("Q5"), mcq("Q6"), mcq("Q7")]
+    framework = ScriptedFramework(json.dumps(first), json.dumps(repair))
+
+    quiz = make_tutor(framework).generate_quiz("5-6", "Science", "ch1", "Plants", "How plants grow", 5, "basic")
+
+    assert [q["question_text"] for q in quiz["questions"]] == ["Q1", "Q2", "Q4", "Q5", "Q6"]
+    assert [q["id"] for q in quiz["questions"]] == ["b-1", "b-2", "b-3", "b-4", "b-5"]
+
+    repair_prompt = framework.prompts[1]
+    assert "Generate exactly 2 quiz questions" in repair_prompt
+    assert "- Q1" in repair_prompt and "- Q4" in repair_prompt  # Existing questions are not asked for again
+    assert "question 4: correct_option_index" in repair_prompt
+
+
+def test_generate_quiz_makes_no_repair_call_when_all_questions_are_valid():
+    framework = ScriptedFramework(json.dumps([mcq(f"Q{i}") for i in range(5)]))
+    quiz = make_tutor(framework).generate_quiz("5-6", "Science", "ch1", "Plants", "How plants grow", 5, "basic")
+    assert len(quiz["questions"]) == 5
+    assert len(framework.prompts) == 1
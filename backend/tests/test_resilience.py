@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.resilience import (
+    AdaptiveLimiter,
+    CallRejected,
+    CircuitBreaker,
+    ModelBusy,
+    ResilienceManager,
+    get_timeout,
+    is_model_failure,
+    is_throttle_error,
+)
+
+
+# ----------------------------------------------------------
+# Limiter
+# ----------------------------------------------------------
+def test_limiter_caps_concurrency_and_rejects_after_queue_timeout():
+    limiter = AdaptiveLimiter(max_rate=1000, burst=1000, max_concurrency=2)
+    limiter.acquire(0.1)
+    limiter.acquire(0.1)
+    with pytest.raises(CallRejected):
+        limiter.acquire(0.1)
+    assert limiter.stats()["in_flight"] == 2
+
+    limiter.release()
+    limiter.acquire(0.1)
+    assert limiter.stats()["in_flight"] == 2
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_limiter_rate_is_halved_on_throttling_and_grows_back_additively():
+    limiter = AdaptiveLimiter(max_rate=10, min_rate=1, burst=10)
+    limiter.acquire(1)
+    limiter.release(throttled=True)
+    assert limiter.rate == 5
+    for _ in range(3):
+        limiter.acquire(1)
+        limiter.release()
+    assert limiter.rate == pytest.approx(5.3)
+
+    for _ in range(5):
+        limiter.acquire(1)
+        limiter.release(throttled=True)
+    assert limiter.rate == 1  # Never below min_rate
+
+
+def test_limiter_release_without_adapting_keeps_the_rate():
+    limiter = AdaptiveLimiter(max_rate=10, burst=10)
+    limiter.acquire(1)
+    limiter.release(throttled=True, adapt=False)
+    assert limiter.rate == 10
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_limiter_token_bucket_spaces_calls_at_the_rate():
+    limiter = AdaptiveLimiter(max_rate=20, burst=1, max_concurrency=10)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire(1)
+    assert time.monotonic() - start >= 0.08  # Two refills at 20/s
+
+
+async def test_async_acquire_waits_for_a_free_slot():
+    limiter = AdaptiveLimiter(max_rate=1000, burst=1000, max_concurrency=1)
+    await limiter.aacquire(0.1)
+    waiter = asyncio.create_task(limiter.aacquire(1))
+    await asyncio.sleep(0.06)
+    assert not waiter.done()
+    assert limiter.stats()["queue_depth"] == 1
+    limiter.release()
+    await waiter
+    assert limiter.stats() | {"rate_per_second": 0} == {"rate_per_second": 0, "in_flight": 1, "queue_depth": 0}
+
+
+# ----------------------------------------------------------
+# Circuit breaker
+# ----------------------------------------------------------
+def test_breaker_opens_after_consecutive_failures_and_recovers_through_one_trial():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert not breaker.is_open()
+    assert breaker.allow()  # The single half-open trial
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["trips"] == 2
+
+
+def test_slow_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=1.0, reset_timeout=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_success_resets_the_failure_streak():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for success in (False, False, True, False, False):
+        breaker.record(success, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_trips_when_most_recent_calls_are_slow():
+    breaker = CircuitBreaker(failure_threshold=100, slow_call_seconds=1.0, slow_call_ratio=0.5, window_size=10)
+    for latency in (2.0, 0.1, 2.0, 0.1):
+        breaker.record(True, latency)
+    assert breaker.state == CircuitBreaker.CLOSED  # Window not half full yet
+    breaker.record(True, 2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_abandoned_trial_frees_the_half_open_slot_without_an_outcome():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()  # A new trial may start
+
+
+# ----------------------------------------------------------
+# Manager
+# ----------------------------------------------------------
+def test_manager_rejects_while_open_and_releases_the_slot():
+    manager = ResilienceManager(max_rate=1000, max_concurrency=4, failure_threshold=1, reset_timeout=60)
+    manager.admit("m")
+    manager.record("m", 0.1, RuntimeError("boom"))
+    with pytest.raises(CallRejected):
+        manager.admit("m")
+    assert not manager.is_available("m")
+    assert manager.stats()["m"]["in_flight"] == 0
+    assert manager.stats()["m"]["state"] == "open"
+
+
+def test_manager_abandon_releases_without_counting_a_result():
+    manager = ResilienceManager(max_rate=1000, max_concurrency=1, failure_threshold=1)
+    manager.admit("m")
+    manager.abandon("m")
+    stats = manager.stats()["m"]
+    assert stats["in_flight"] == 0
+    assert stats["state"] == "closed"
+    assert stats["consecutive_failures"] == 0
+    manager.admit("m")  # The slot is usable again
+
+
+def test_background_calls_wait_for_interactive_traffic():
+    manager = ResilienceManager(max_rate=1000)
+    manager.admit("interactive")
+    threading.Timer(0.1, manager.record, ("interactive", 0.1)).start()
+
+    start = time.monotonic()
+    with manager.background(max_in_flight=0, wait_seconds=5, poll_seconds=0.01) as budget:
+        manager.admit("background")
+    assert time.monotonic() - start >= 0.09
+    assert not budget.gave_up
+    manager.admit("interactive")  # Interactive calls are never gated
+
+
+def test_background_block_gives_up_once_its_deadline_passes():
+    manager = ResilienceManager(max_rate=1000)
+    manager.admit("interactive")
+    with manager.background(max_in_flight=0, wait_seconds=0.05, poll_seconds=0.01) as budget:
+        with pytest.raises(ModelBusy):
+            manager.admit("background")
+        start = time.monotonic()
+        with pytest.raises(ModelBusy):  # The deadline covers the block, not each call
+            manager.admit("background")
+        assert time.monotonic() - start < 0.01
+    assert budget.gave_up
+    assert manager.stats().get("background", {}).get("in_flight", 0) == 0
+
+
+async def test_async_background_calls_are_gated_too():
+    manager = ResilienceManager(max_rate=1000)
+    await manager.aadmit("interactive")
+    with manager.background(max_in_flight=1, wait_seconds=1, poll_seconds=0.01):
+        await manager.aadmit("background")  # Within the in-flight allowance
+        with pytest.raises(ModelBusy):
+            with manager.background(max_in_flight=1, wait_seconds=0.05, poll_seconds=0.01):
+                await manager.aadmit("background")
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def test_client_errors_do_not_open_the_breaker():
+    manager = ResilienceManager(max_rate=1000, failure_threshold=2)
+    for status in (400, 401, 413, 422):
+        manager.admit("m")
+        manager.record("m", 0.1, StatusError(status))
+    assert manager.stats()["m"]["state"] == "closed"
+    assert manager.stats()["m"]["consecutive_failures"] == 0
+
+    for _ in range(2):
+        manager.admit("m")
+        manager.record("m", 0.1, StatusError(500))
+    assert manager.stats()["m"]["state"] == "open"
+
+
+def test_which_errors_count_as_model_failures():
+    assert not is_model_failure(None)
+    assert not is_model_failure(StatusError(400))
+    assert not is_model_failure(StatusError(404))
+    assert is_model_failure(StatusError(408))
+    assert is_model_failure(StatusError(429))
+    assert is_model_failure(StatusError(502))
+    assert is_model_failure(ConnectionError("reset"))
+
+
+def test_throttle_errors_and_timeouts(monkeypatch):
+    class HttpError(Exception):
+        status = 429
+
+    assert is_throttle_error(asyncio.TimeoutError())
+    assert is_throttle_error(HttpError())
+    assert is_throttle_error(RuntimeError("Read timed out"))
+    assert not is_throttle_error(ValueError("bad json"))
+    assert not is_throttle_error(None)
+
+    monkeypatch.setenv("EURIAI_TIMEOUT_GPT_4_1_NANO", "3")
+    assert get_timeout("gpt-4.1-nano") == 3.0
+    assert get_timeout("gemini-2.5-pro") == 60.0
@@ -0,0 +1,78 @@
+import sqlite3
+
+from src.tutor.response_cache import LLMResponseCache
+from src.utils.sqlite_cache import SQLiteCacheTier
+
+
+def make_cache(tmp_path, **kwargs):
+    return LLMResponseCache(enabled=True, task_types=["quiz"], db_path=str(tmp_path / "llm.db"), **kwargs)
+
+
+def test_keys_normalize_whitespace_but_not_parameters():
+    key = LLMResponseCache.make_key("m", "Explain  fractions\n", 0.2, 100)
+    assert key == LLMResponseCache.make_key("m", "Explain fractions", 0.2, 100)
+    assert key != LLMResponseCache.make_key("m", "Explain fractions", 0.7, 100)
+    assert key != LLMResponseCache.make_key("other", "Explain fractions", 0.2, 100)
+
+
+def test_entries_survive_a_restart(tmp_path):
+    make_cache(tmp_path).set("k", {"response": "cached"})
+    cache = make_cache(tmp_path)
+    assert cache.get("k") == {"response": "cached"}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("k") == {"response": "cached"}
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=-1)
+    cache.set("k", {"response": "stale"})
+    assert cache.get("k") is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1, max_db_entries=2)
+    cache.set("a", {"response": "a"})
+    cache.set("b", {"response": "b"})
+    cache.get("a")
+    cache.set("c", {"response": "c"})
+    assert cache.stats()["disk_entries"] == 2
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("b") is None
+    assert reopened.get("a") == {"response": "a"}
+
+
+def test_tier_keeps_a_running_count_and_prunes_periodically(tmp_path):
+    path = str(tmp_path / "tier.db")
+    tier = SQLiteCacheTier(path, "t", max_entries=100, prune_seconds=60)
+    tier.set("old", "x", expires_at=10, now=0)
+    tier.set("old", "y", expires_at=10, now=1)  # Overwrite, not a new row
+    assert len(tier) == 1
+
+    tier.set("new", "z", expires_at=200, now=30)
+    assert len(tier) == 2  # Expired row is left until the next sweep
+    tier.set("newer", "z", expires_at=200, now=70)
+    assert len(tier) == 2
+    assert tier.get("old", now=70) is None
+
+    assert len(SQLiteCacheTier(path, "t")) == 2  # Counted again on open
+
+
+def test_tier_indexes_expiry_and_access_time(tmp_path):
+    path = str(tmp_path / "tier.db")
+    SQLiteCacheTier(path, "t").set("k", "v", expires_at=10, now=0)
+    with sqlite3.connect(path) as conn:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(t)")}
+        plan = " ".join(str(row) for row in conn.execute("EXPLAIN QUERY PLAN DELETE FROM t WHERE expires_at <= 5"))
+    assert {"ix_t_expires_at", "ix_t_last_access"} <= indexes
+    assert "ix_t_expires_at" in plan
+
+
+def test_disabled_task_types_are_not_cached(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.is_enabled_for("quiz")
+    assert not cache.is_enabled_for("chat")
+    cache.set_task_enabled("quiz", False)
+    assert not cache.is_enabled_for("quiz")
@@ -0,0 +1,58 @@
+from langchain_core.documents import Document
+
+from src.tutor.retrieval_cache import RetrievalCache
+
+DOCS = {doc_id: Document(id=doc_id, page_content=doc_id) for doc_id in ("a", "b", "c")}
+lookup = DOCS.get
+
+
+def key(question, k=4):
+    return RetrievalCache.make_key("rag", question, "Science", "6", k)
+
+
+def test_hit_returns_the_documents_again():
+    cache = RetrievalCache()
+    cache.set(key("What is photosynthesis?"), [DOCS["a"], DOCS["b"]], lookup)
+    # Case, spacing and full-width forms don't change the key
+    assert cache.get(key("  what IS   photosynthesis？ "), lookup) == [DOCS["a"], DOCS["b"]]
+    assert cache.get(key("What is photosynthesis?", k=8), lookup) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_empty_and_lexical_only_results_are_not_cached():
+    cache = RetrievalCache()
+    cache.set(key("q1"), [], lookup)
+    cache.set(key("q2"), [DOCS["a"]], lookup, mode="lexical")
+    cache.set(key("q3"), [Document(id="gone", page_content="")], lookup)
+    assert cache.stats()["skipped"] == 3
+    assert cache.stats()["entries"] == 0
+
+    cache.set(key("q2"), [DOCS["a"]], lookup, mode="hybrid")
+    assert cache.get(key("q2"), lookup) == [DOCS["a"]]
+
+
+def test_new_index_version_drops_entries():
+    cache = RetrievalCache()
+    cache.set_version("v1")
+    cache.set(key("q"), [DOCS["a"]], lookup)
+    cache.set_version("v1")
+    assert cache.get(key("q"), lookup) is not None
+    cache.set_version("v2")
+    assert cache.get(key("q"), lookup) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_entries=2)
+    cache.set(key("q1"), [DOCS["a"]], lookup)
+    cache.set(key("q2"), [DOCS["b"]], lookup)
+    cache.get(key("q1"), lookup)
+    cache.set(key("q3"), [DOCS["c"]], lookup)
+    assert cache.get(key("q2"), lookup) is None
+    assert cache.get(key("q1"), lookup) == [DOCS["a"]]
+
+
+def test_expired_entries_miss():
+    cache = RetrievalCache(ttl_seconds=-1)
+    cache.set(key("q"), [DOCS["a"]], lookup)
+    assert cache.get(key("q"), lookup) is None
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.singleflight import SingleFlight
+
+
+async def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+
+    async def fetch():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return 42
+
+    results = await asyncio.gather(*(flight.ado("k", fetch) for _ in range(5)))
+    assert results == [42] * 5
+    assert executions == 1
+    assert flight.stats() == {"calls": 5, "executions": 1, "collapsed": 4, "in_flight": 0}
+
+
+async def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def fetch(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    assert await asyncio.gather(flight.ado("a", lambda: fetch(1)), flight.ado("b", lambda: fetch(2))) == [1, 2]
+    assert flight.stats()["executions"] == 2
+
+
+async def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    results = await asyncio.gather(flight.ado("k", fail), flight.ado("k", fail), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def succeed():
+        return "ok"
+
+    assert await flight.ado("k", succeed) == "ok"
+
+
+async def test_cancelling_the_first_caller_does_not_fail_the_others():
+    # Regression: the first caller used to run fn itself, so its cancellation reached every follower
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.1)
+        return 42
+
+    leader = asyncio.create_task(flight.ado("k", fetch))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(flight.ado("k", fetch))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await follower == 42
+    assert flight.stats()["executions"] == 1
+
+
+async def test_call_is_cancelled_once_every_caller_has_gone():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.create_task(flight.ado("k", fetch)) for _ in range(2)]
+    await started.wait()
+
+    callers[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()  # One caller still waits on it
+
+    callers[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_threads_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+    release = threading.Event()
+
+    def fetch():
+        nonlocal executions
+        executions += 1
+        release.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 4
+    assert executions == 1
+    assert flight.stats()["collapsed"] == 3
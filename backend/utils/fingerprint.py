@@ -0,0 +1,85 @@
+"""
+Near-duplicate detection for generated questions.
+64-bit SimHash fingerprints over normalized text, plus a small banded index
+that finds fingerprints within a Hamming distance without comparing every pair.
+"""
+
+import hashlib
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+# Fingerprints at most this many bits apart are treated as the same question
+QUESTION_DEDUP_DISTANCE = int(os.getenv("QUESTION_DEDUP_DISTANCE", "3"))
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Casefolded words only (NFKC), so punctuation, spacing and emoji don't matter."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(_WORD_RE.findall(text))
+
+
+def _features(text: str) -> List[str]:
+    words = normalize_text(text).split()
+    # Words and word pairs, so reordering changes the hash less than rewording
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def simhash(text: str) -> int:
+    weights = [0] * FINGERPRINT_BITS
+    for feature in _features(text):
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def question_fingerprint(question_text: str, answer: Optional[str] = None) -> str:
+    """Hex SimHash of a question and its correct answer (stored in the fingerprint columns)."""
+    text = f"{question_text} {answer or ''}"
+    return f"{simhash(text):016x}"
+
+
+def hamming_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class FingerprintIndex:
+    """
+    Finds stored fingerprints near a new one.
+
+    Features:
+    - Splits fingerprints into max_distance + 1 bands; any two within
+      max_distance bits agree exactly on at least one band (pigeonhole),
+      so only fingerprints sharing a band are compared
+    - add() as you go to catch duplicates within the same batch
+    """
+
+    def __init__(self, fingerprints: Iterable[str] = (), max_distance: int = QUESTION_DEDUP_DISTANCE):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        edges = [FINGERPRINT_BITS * i // bands for i in range(bands + 1)]
+        self._bands: List[Tuple[int, int]] = list(zip(edges, edges[1:]))
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+        for fingerprint in fingerprints:
+            self.add(fingerprint)
+
+    def _keys(self, fingerprint: str) -> List[Tuple[int, int]]:
+        value = int(fingerprint, 16)
+        return [(band, value >> lo & ((1 << (hi - lo)) - 1)) for band, (lo, hi) in enumerate(self._bands)]
+
+    def add(self, fingerprint: str):
+        for key in self._keys(fingerprint):
+            self._buckets.setdefault(key, []).append(fingerprint)
+
+    def find(self, fingerprint: str) -> Optional[str]:
+        """A stored fingerprint within max_distance, or None."""
+        for key in self._keys(fingerprint):
+            for candidate in self._buckets.get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return candidate
+        return None
@@ -0,0 +1,14 @@
+"""
+Server-Sent Events helpers shared by the streaming endpoints.
+"""
+
+import json
+from typing import Dict
+
+# Disable proxy buffering so events reach the client as they are produced
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"